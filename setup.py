@@ -43,6 +43,8 @@ setup(
         ],
     },
     install_requires=requirements,
+    # contrast checks of many color pairs at once are vectorized with it
+    extras_require={"numpy": ["numpy"]},
     long_description=readme + "\n\n" + history,
     include_package_data=True,
     keywords="webanalyst",
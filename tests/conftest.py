@@ -0,0 +1,10 @@
+import pytest
+
+from webanalyst import validator as val
+
+
+@pytest.fixture(autouse=True)
+def no_results_cache(monkeypatch):
+    """tests never read or write a WEBANALYST_CACHE on this machine"""
+    monkeypatch.setattr(val, "results_cache", None)
+    monkeypatch.setattr(val, "cache_path", "off")
@@ -0,0 +1,152 @@
+import json
+import os
+
+import pytest
+
+from webanalyst import batch
+from webanalyst import validator as val
+
+projects_path = "tests/test_files/projects"
+
+
+@pytest.fixture(scope="module")
+def local_validation():
+    """no validator on the network (workers get the same settings)"""
+    engines = val.get_css_engine(), val.get_markup_engine()
+    val.set_css_engine("local")
+    val.set_markup_engine("off")
+    yield
+    val.set_css_engine(engines[0])
+    val.set_markup_engine(engines[1])
+
+
+@pytest.fixture(scope="module")
+def batch_results(tmp_path_factory, local_validation):
+    output_dir = str(tmp_path_factory.mktemp("reports"))
+    results = batch.grade_projects(projects_path, output_dir, jobs=2)
+    return output_dir, results
+
+
+def test_find_projects_for_six_projects():
+    projects = batch.find_projects(projects_path)
+    names = [os.path.basename(path) for path in projects]
+    assert len(names) == 6
+    assert names == sorted(names)
+
+
+def test_get_output_path_for_project_folder():
+    results = batch.get_output_path("reports", "projects/about_me/")
+    assert results == os.path.join("reports", "about_me", "report.html")
+
+
+def test_grade_projects_for_project_order(batch_results):
+    output_dir, results = batch_results
+    names = [item["project"] for item in results]
+    expected = [
+        os.path.basename(path) for path in batch.find_projects(projects_path)
+    ]
+    assert names == expected
+
+
+def test_grade_projects_for_separate_reports(batch_results):
+    output_dir, results = batch_results
+    for item in results:
+        assert item["status"] == "ok", item["error"]
+        assert item["report_path"].startswith(output_dir)
+        assert os.path.isfile(item["report_path"])
+    paths = {item["report_path"] for item in results}
+    assert len(paths) == len(results)
+
+
+def test_grade_project_for_missing_readme(tmp_path):
+    results = batch.grade_project(str(tmp_path), str(tmp_path / "r.html"))
+    assert results["status"] == "failed"
+    assert "README.md" in results["error"]
+
+
+def test_get_summary_table_for_totals():
+    results = [
+        {
+            "project": "one",
+            "status": "ok",
+            "seconds": 1.5,
+            "report_path": "report/one/report.html",
+        },
+        {
+            "project": "two",
+            "status": "failed",
+            "seconds": 0.25,
+            "report_path": "report/two/report.html",
+        },
+    ]
+    table = batch.get_summary_table(results).splitlines()
+    assert table[0].split() == ["Project", "Status", "Seconds", "Report"]
+    assert table[2].split() == ["one", "ok", "1.50", "report/one/report.html"]
+    assert table[-1].split() == ["2", "projects", "1", "failed", "1.75"]
+
+
+def test_grade_projects_for_ndjson_stream(tmp_path, local_validation):
+    output_dir = str(tmp_path)
+    results = batch.grade_projects(projects_path, output_dir, 2, "json")
+    with open(batch.get_ndjson_path(output_dir)) as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) == len(results)
+    assert {line["project"] for line in lines} == {
+        item["project"] for item in results
+    }
+    for line in lines:
+        assert set(line["details"]) == {"project", "general", "html", "css"}
+    assert "details" not in results[0]
+
+
+def test_get_stages_table_for_stage_rows():
+    stages = {
+        "html": {"seconds": 0.5, "calls": 1, "bytes": 2048},
+        "css.parse": {"seconds": 0.125, "calls": 2, "bytes": 512},
+    }
+    table = batch.get_stages_table(stages).splitlines()
+    assert table[0].split() == ["Stage", "Seconds", "Calls", "Bytes"]
+    assert table[3].split() == ["css.parse", "0.125", "2", "512"]
+
+
+def test_get_contrast_audit_table_for_untestable_rows():
+    report = {"Normal AA": "Pass", "Normal AAA": "Fail"}
+    rows = [
+        {
+            "html_file": "index.html",
+            "selector": "nav a",
+            "color": "#333",
+            "bg-color": "#fff",
+            "contrast": 12.63,
+            "report": report,
+        },
+        {
+            "html_file": "index.html",
+            "selector": ".hero",
+            "color": None,
+            "bg-color": "url(hero.png)",
+            "contrast": None,
+            "report": None,
+        },
+    ]
+    table = batch.get_contrast_audit_table(rows).splitlines()
+    assert table[0].split()[:5] == [
+        "Page",
+        "Selector",
+        "Color",
+        "Background",
+        "Contrast",
+    ]
+    assert table[2].split()[-6:] == ["#fff", "12.63", "Pass", "Fail", "-", "-"]
+    assert table[3].split()[2:] == ["-", "url(hero.png)"] + ["-"] * 5
+
+
+def test_configure_worker_for_shared_request_rate():
+    original = val.rate_limiter
+    settings = batch.get_validator_settings()
+    settings["rate_interval"] = 0.5
+    try:
+        batch.configure_worker(settings, jobs=4)
+        assert val.rate_limiter.interval == 2.0
+    finally:
+        val.rate_limiter = original
@@ -0,0 +1,60 @@
+import os
+
+from webanalyst import CSSinator, benchmark, clerk
+
+
+def test_make_project_for_files(tmp_path):
+    dir_path = benchmark.make_project(str(tmp_path), 3, 2, 20)
+    assert os.path.isfile(os.path.join(dir_path, "README.md"))
+    assert len(clerk.get_all_files_of_type(dir_path, "html")) == 3
+    assert len(clerk.get_all_files_of_type(dir_path, "css")) == 2
+
+
+def test_make_project_for_same_project_from_seed(tmp_path):
+    first = benchmark.make_project(str(tmp_path / "first"), 1, 1, 30)
+    second = benchmark.make_project(str(tmp_path / "second"), 1, 1, 30)
+    for name in ("index.html", os.path.join("css", "style0.css")):
+        with open(os.path.join(first, name)) as f:
+            first_code = f.read()
+        with open(os.path.join(second, name)) as f:
+            assert f.read() == first_code
+
+
+def test_get_stylesheet_for_rules_and_nested_media():
+    rand = benchmark.random.Random(3)
+    code = benchmark.get_stylesheet(rand, 1, 200)
+    sheet = CSSinator.Stylesheet("style1.css", code)
+    assert "@media" in code
+    assert "linear-gradient" in code
+    nested = sum(len(rules) for rules in sheet.nested_at_rules.values())
+    assert len(sheet.rulesets) + nested == 200
+
+
+def test_run_benchmarks_for_each_benchmark():
+    results = benchmark.run_benchmarks(["small"], repeat=1)
+    names = [item["benchmark"] for item in results]
+    assert names == [
+        "stylesheet",
+        "html_report",
+        "css_report",
+        "report",
+        "contrast_audit",
+    ]
+    for item in results:
+        assert item["seconds"] > 0
+        assert item["peak_bytes"] > 0
+        assert 0 < item["retained_bytes"] <= item["peak_bytes"]
+    assert not [
+        name for name in os.listdir(".") if "webanalyst-benchmark" in name
+    ]
+
+
+def test_run_specificity_benchmarks_for_each_way():
+    results = benchmark.run_specificity_benchmarks(["small"], repeat=1)
+    names = [item["benchmark"] for item in results]
+    assert names == [
+        "specificity_regex",
+        "specificity_scanner",
+        "specificity_scanner_cached",
+    ]
+    assert all(item["selectors"] > 40 for item in results)
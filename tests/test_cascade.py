@@ -0,0 +1,165 @@
+import pytest
+
+from webanalyst import CSSinator as css
+from webanalyst import cascade
+
+base_css = """
+body {
+    color: black;
+    background-color: white;
+}
+h1, h2 {
+    color: navy;
+}
+"""
+
+page_css = """
+:root {
+    color: #333;
+}
+html {
+    background: beige;
+}
+h1 {
+    color: maroon;
+    background-color: ivory;
+}
+"""
+
+specific_css = """
+.a.b.c.d.e.f.g.h.i.j h1 {
+    color: teal;
+}
+.a.b h1 {
+    color: olive;
+}
+h2 {
+    color: red;
+    color: blue;
+    background-color: x;
+}
+"""
+
+
+@pytest.fixture
+def base_sheet():
+    return css.Stylesheet("base.css", base_css)
+
+
+@pytest.fixture
+def page_sheet():
+    return css.Stylesheet("page.css", page_css)
+
+
+def test_add_stylesheet_for_global_colors(base_sheet):
+    global_cascade = cascade.get_global_colors_cascade()
+    global_cascade.add_stylesheet(base_sheet)
+    assert global_cascade.get("global", "color").value == "black"
+    assert global_cascade.get("global", "bg-color").value == "white"
+    assert global_cascade.sources == ["base.css"]
+
+
+def test_merge_for_later_sheet_winning(base_sheet, page_sheet):
+    base = cascade.get_global_colors_cascade()
+    base.add_stylesheet(base_sheet)
+    page = cascade.get_global_colors_cascade()
+    page.add_stylesheet(page_sheet)
+    global_cascade = cascade.get_global_colors_cascade()
+    global_cascade.merge(base)
+    global_cascade.merge(page)
+    # :root outranks body; html ties with body but comes later
+    assert global_cascade.get("global", "color").value == "#333"
+    assert global_cascade.get("global", "bg-color").value == "beige"
+    assert global_cascade.sources == ["base.css", "page.css"]
+
+
+def test_merge_for_specificity_over_order(base_sheet, page_sheet):
+    page = cascade.get_global_colors_cascade()
+    page.add_stylesheet(page_sheet)
+    base = cascade.get_global_colors_cascade()
+    base.add_stylesheet(base_sheet)
+    global_cascade = cascade.get_global_colors_cascade()
+    global_cascade.merge(page)
+    global_cascade.merge(base)
+    assert global_cascade.get("global", "color").selector == ":root"
+    assert global_cascade.get("global", "bg-color").value == "white"
+
+
+def test_add_stylesheet_for_header_selectors(base_sheet, page_sheet):
+    header_cascade = cascade.get_header_colors_cascade()
+    header_cascade.add_stylesheet(base_sheet)
+    header_cascade.add_stylesheet(page_sheet)
+    styled = header_cascade.get_elements_styled()
+    assert list(styled) == ["h1", "h2"]
+    assert styled["h1"]["color"].value == "maroon"
+    assert styled["h1"]["bg-color"].href == "page.css"
+    assert "bg-color" not in styled["h2"]
+
+
+def test_add_stylesheet_for_numeric_specificity():
+    header_cascade = cascade.get_header_colors_cascade()
+    header_cascade.add_stylesheet(css.Stylesheet("a.css", specific_css))
+    winner = header_cascade.get(".a.b.c.d.e.f.g.h.i.j h1", "color")
+    assert winner.specificity[:2] == (0, 10)
+    # as a string, its specificity would lose to .a.b h1
+    loser = header_cascade.get(".a.b h1", "color")
+    assert winner.specificity > loser.specificity
+    assert css.get_specificity(winner.selector) < css.get_specificity(
+        loser.selector
+    )
+    assert header_cascade.get("h2", "color").value == "blue"
+    # x is a one character (invalid) value
+    assert header_cascade.get("h2", "bg-color") is None
+
+
+def test_get_rank_for_specificity_then_order():
+    first = cascade.CascadedValue("red", "#a", (1, 0, 0), 0, 0, "a.css")
+    later = first._replace(specificity=(0, 12, 0), sheet=3)
+    assert cascade.get_rank(first) > cascade.get_rank(later)
+
+
+color_rulesets_css = """
+.card, .note {
+    color: #333;
+    background-color: #fff;
+}
+@media (max-width: 600px) {
+    .card {
+        background-color: #000;
+    }
+}
+@keyframes pulse {
+    0% {
+        color: #f00;
+    }
+}
+"""
+
+
+def test_color_rulesets_cascade_for_each_selector_in_group():
+    sheet = css.Stylesheet("colors.css", color_rulesets_css)
+    color_cascade = cascade.get_color_rulesets_cascade()
+    color_cascade.add_stylesheet(sheet)
+    styled = color_cascade.get_elements_styled()
+    assert list(styled) == [".card", ".note"]
+    assert styled[".note"]["bg-color"].value == "#fff"
+    # nested in @media, later in the sheet
+    assert styled[".card"]["bg-color"].value == "#000"
+    assert styled[".card"]["color"].value == "#333"
+
+
+prefixed_css = """
+html {
+    background: #082604;
+    background: linear-gradient(135deg, #46aba6 0%, #092756 200%);
+    background: -ms-linear-gradient(-45deg, #46aba6 0%, #092756 200%);
+}
+"""
+
+
+def test_add_stylesheet_for_standard_value_over_later_prefixed():
+    global_cascade = cascade.get_global_colors_cascade()
+    global_cascade.add_stylesheet(css.Stylesheet("a.css", prefixed_css))
+    assert global_cascade.get("global", "bg-color").value.startswith(
+        "linear-gradient("
+    )
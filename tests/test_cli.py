@@ -0,0 +1,140 @@
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from webanalyst import cli
+from webanalyst import validator as val
+
+about_me_path = "tests/test_files/projects/about_me"
+projects_path = "tests/test_files/projects"
+
+
+@pytest.fixture
+def runner():
+    engines = val.get_css_engine(), val.get_markup_engine()
+    cache = val.results_cache, val.cache_path
+    try:
+        cli_runner = CliRunner(mix_stderr=False)
+    except TypeError:
+        # click 8.2+ always keeps stderr separate
+        cli_runner = CliRunner()
+    yield cli_runner
+    val.set_css_engine(engines[0])
+    val.set_markup_engine(engines[1])
+    val.results_cache, val.cache_path = cache
+
+
+def test_main_for_commands(runner):
+    results = runner.invoke(cli.main, ["--help"])
+    assert results.exit_code == 0
+    assert "grade" in results.output
+    assert "batch" in results.output
+
+
+def test_grade_for_html_report(runner, tmp_path):
+    output = str(tmp_path / "about_me.html")
+    args = ["grade", about_me_path, "--offline", "-o", output]
+    results = runner.invoke(cli.main, args)
+    assert results.exit_code == 0, results.output
+    assert os.path.isfile(output)
+
+
+def test_grade_for_offline_validators(runner, tmp_path):
+    output = str(tmp_path / "about_me.html")
+    args = ["grade", about_me_path, "--offline", "-o", output]
+    runner.invoke(cli.main, args)
+    assert val.get_css_engine() == "local"
+    assert val.get_markup_engine() == "off"
+
+
+def test_grade_for_cache_path(runner, tmp_path):
+    output = str(tmp_path / "about_me.html")
+    cache = str(tmp_path / "validation.sqlite3")
+    args = ["grade", about_me_path, "--offline", "--cache", cache]
+    results = runner.invoke(cli.main, args + ["-o", output])
+    assert results.exit_code == 0, results.output
+    assert val.cache_path == cache
+
+
+def test_grade_for_json_report(runner, tmp_path):
+    output = str(tmp_path / "about_me.json")
+    args = ["grade", about_me_path, "--offline", "--format", "json"]
+    results = runner.invoke(cli.main, args + ["-o", output])
+    assert results.exit_code == 0, results.output
+    with open(output) as f:
+        details = json.load(f)
+    assert set(details) == {"project", "general", "html", "css"}
+    assert os.path.isfile(str(tmp_path / "about_me.html"))
+
+
+def test_grade_for_json_report_with_html_output(runner, tmp_path):
+    output = str(tmp_path / "about_me.html")
+    args = ["grade", about_me_path, "--offline", "--format", "json"]
+    results = runner.invoke(cli.main, args + ["-o", output])
+    assert results.exit_code == 0, results.output
+    with open(str(tmp_path / "about_me.json")) as f:
+        assert set(json.load(f)) == {"project", "general", "html", "css"}
+    with open(output) as f:
+        assert f.read().lstrip().startswith("<")
+
+
+def test_grade_for_profile(runner, tmp_path):
+    output = str(tmp_path / "about_me.html")
+    args = ["grade", about_me_path, "--offline", "--profile", "-o", output]
+    results = runner.invoke(cli.main, args)
+    # a header and its underline, then a row per stage
+    stages = [line.split()[0] for line in results.stderr.splitlines()[2:]]
+    report_stages = [stage for stage in stages if "." not in stage]
+    assert report_stages == ["prep", "general", "html", "css", "save", "total"]
+    assert "css.validate" in stages
+
+
+def test_grade_for_pstats_file(runner, tmp_path):
+    output = str(tmp_path / "about_me.html")
+    args = ["grade", about_me_path, "--offline", "--pstats", "-o", output]
+    results = runner.invoke(cli.main, args)
+    assert results.exit_code == 0, results.output
+    assert os.path.isfile(str(tmp_path / "about_me.pstats"))
+
+
+def test_grade_for_contrast_audit(runner, tmp_path):
+    output = str(tmp_path / "large_project.html")
+    project = os.path.join(projects_path, "large_project")
+    args = ["grade", project, "--offline", "--audit", "-o", output]
+    results = runner.invoke(cli.main, args)
+    assert results.exit_code == 0, results.output
+    lines = results.stdout.splitlines()
+    headers = [line for line in lines if line.startswith("Page ")]
+    assert headers[0].split()[:5] == [
+        "Page",
+        "Selector",
+        "Color",
+        "Background",
+        "Contrast",
+    ]
+    assert any("nav li a:hover" in line for line in lines)
+
+
+def test_batch_for_summary_table(runner, tmp_path):
+    args = ["batch", projects_path, "--offline", "-j", "2"]
+    results = runner.invoke(cli.main, args + ["-o", str(tmp_path)])
+    assert results.exit_code == 0, results.stderr
+    assert results.output.splitlines()[-1].split()[:4] == [
+        "6",
+        "projects",
+        "0",
+        "failed",
+    ]
+    assert os.path.isfile(str(tmp_path / "single_page" / "report.html"))
+
+
+def test_batch_for_profile_of_each_project(runner, tmp_path):
+    args = ["batch", projects_path, "--offline", "-j", "2", "--profile"]
+    results = runner.invoke(cli.main, args + ["-o", str(tmp_path)])
+    lines = results.stderr.splitlines()
+    assert "about_me:" in lines
+    stages = lines[lines.index("about_me:") + 1].split()
+    assert stages == ["Stage", "Seconds", "Calls", "Bytes"]
+    assert any(line.startswith("css.validate ") for line in lines)
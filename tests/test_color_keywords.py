@@ -0,0 +1,43 @@
+import pytest
+
+from webanalyst import color_keywords as keywords
+
+
+def test_is_a_keyword_for_basic_and_extended_keywords():
+    assert keywords.is_a_keyword("navy")
+    assert keywords.is_a_keyword("beige")
+    assert not keywords.is_a_keyword("linear")
+
+
+def test_get_hex_by_keyword_for_extended_value():
+    # the extended list's value wins over the basic one
+    assert keywords.get_hex_by_keyword("gray") == "#7F7F7F"
+    assert keywords.get_hex_by_keyword("grayk") == "#808080"
+    assert keywords.get_hex_by_keyword("nocolor") is None
+
+
+def test_get_full_color_keywords_for_basic_keywords_untouched():
+    full = keywords.get_full_color_keywords()
+    full["beige"] = "#000000"
+    assert "beige" not in keywords.get_basic_color_keywords()
+    assert keywords.get_hex_by_keyword("beige") == "#F5F5DC"
+
+
+def test_keyword_index_for_read_only():
+    with pytest.raises(TypeError):
+        keywords.keyword_index["beige"] = "#000000"
+
+
+def test_get_rgb_by_keyword_for_rgb_from_hex():
+    assert keywords.get_rgb_by_keyword("azure") == (240, 255, 255)
+    assert keywords.get_rgb_by_keyword("nocolor") is None
+
+
+def test_get_keywords_in_for_order_and_repeats():
+    words = ["to", "right", "red", "blue", "red"]
+    assert keywords.get_keywords_in(words) == ["red", "blue", "red"]
+
+
+def test_get_hex_by_keywords_for_each_word():
+    results = keywords.get_hex_by_keywords(["red", "to"])
+    assert results == ["#FF0000", None]
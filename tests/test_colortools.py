@@ -223,6 +223,115 @@ def test_is_color_value_for_non_color_fill():
     assert not color.is_color_value("fill")
 
 
+def test_get_contrast_ratios_for_same_ratios_as_contrast_ratio():
+    pairs = [
+        (indigo, white),
+        (aquamarine, white),
+        (favorite_test_color, white),
+        (white, favorite_test_color),
+    ]
+    expected = [color.contrast_ratio(*pair) for pair in pairs]
+    assert color.get_contrast_ratios(pairs) == expected
+
+
+def test_get_contrast_ratios_for_non_color():
+    assert color.get_contrast_ratios([("indigoish", white)]) == [0]
+
+
+def test_get_contrast_ratios_for_no_numpy(monkeypatch):
+    pairs = [(indigo, white), (aquamarine, white), ("indigoish", white)]
+    expected = color.get_contrast_ratios(pairs)
+    monkeypatch.setattr(color, "np", None)
+    assert color.get_contrast_ratios(pairs) == expected
+
+
+def test_get_color_contrast_reports_for_every_level():
+    pairs = [
+        (favorite_test_color, white),
+        (indigo, white),
+        (aquamarine, white),
+    ]
+    expected = [
+        favorite_test_color_contrast_report,
+        all_pass_color_contrast_report,
+        all_fail_color_contrast_report,
+    ]
+    assert color.get_color_contrast_reports(pairs) == expected
+    assert not color.get_color_contrast_reports([])
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("#fff", (255, 255, 255, 1.0)),
+        ("#336699", (51, 102, 153, 1.0)),
+        ("#33669980", (51, 102, 153, 128 / 255)),
+        ("#0000", (0, 0, 0, 0.0)),
+        ("rgb(230, 5, 23)", (230, 5, 23, 1.0)),
+        ("rgba(143, 193, 242, 0.22)", (143, 193, 242, 0.22)),
+        ("rgb(143 193 242 / 50%)", (143, 193, 242, 0.5)),
+        ("rgb(100%, 0%, 0%)", (255, 0, 0, 1.0)),
+        (hsl_string_1, hsl_string_1_as_rgb + (1.0,)),
+        (hsla_string_1, hsl_string_1_as_rgb + (1.0,)),
+        ("hsl(0.5turn 100% 50%)", (0, 255, 255, 1.0)),
+        ("Navy", (0, 0, 128, 1.0)),
+        ("transparent", (0, 0, 0, 0.0)),
+    ],
+)
+def test_parse_color_for_each_syntax(value, expected):
+    assert color.parse_color(value) == expected
+
+
+def test_parse_color_for_current_color():
+    assert color.parse_color("currentColor") is None
+    assert color.parse_color("currentColor", "red") == (255, 0, 0, 1.0)
+
+
+def test_parse_color_for_non_colors():
+    for value in ("#12345", "#-12345", "rgb(1, 2)", "linear", "url(a.png)"):
+        assert color.parse_color(value) is None
+
+
+def test_rgba_to_hex_for_alpha_dropped():
+    assert color.rgba_to_hex((51, 102, 153, 0.5)) == "#336699"
+
+
+def test_contrast_ratio_for_any_color_syntax():
+    expected = color.contrast_ratio(favorite_test_color, white)
+    assert color.contrast_ratio("rgb(51, 102, 153)", "#fff") == expected
+
+
+def test_get_effective_colors_for_transparency_on_white():
+    stacks = [["rgba(0, 0, 0, .4)"], ["#000"], [], ["rgba(0,0,0,0)"]]
+    expected = ["#999999", "#000000", "#ffffff", "#ffffff"]
+    assert color.get_effective_colors(stacks) == expected
+
+
+def test_get_effective_colors_for_stacked_layers():
+    stacks = [["navy", "rgba(255, 255, 255, .5)"], ["red", "url(a.png)"]]
+    assert color.get_effective_colors(stacks) == ["#8080c0", None]
+
+
+def test_get_effective_colors_for_no_numpy(monkeypatch):
+    stacks = [
+        ["#336699", "hsla(0, 0%, 100%, .25)", "rgba(200, 0, 0, .3)"],
+        ["rgba(0, 0, 0, .4)"],
+        [],
+    ]
+    expected = color.get_effective_colors(stacks)
+    monkeypatch.setattr(color, "np", None)
+    assert color.get_effective_colors(stacks) == expected
+
+
+def test_get_effective_pairs_for_text_over_background():
+    pairs = [
+        ("rgba(0, 0, 0, .5)", ["rgba(255, 0, 0, .5)"]),
+        ("#000000", []),
+    ]
+    expected = [("#804040", "#ff8080"), ("#000000", "#ffffff")]
+    assert color.get_effective_pairs(pairs) == expected
+
+
 def test_is_color_value_for_non_color_url():
     assert not color.is_color_value('url("images/BannerFlag.png")')
 
@@ -0,0 +1,102 @@
+from webanalyst import css_parser
+
+stylesheet_code = """/* styles.css */
+@import url("reset.css");
+body {
+    background: url("data:image/png;base64,iVBO") no-repeat;
+    color: #333 !important;
+}
+@media screen and (min-width: 500px) {
+    nav a { display: inline-block; }
+}
+"""
+
+broken_code = """p {
+    color red;
+}
+}
+h1 { font-size: 2em;
+"""
+
+
+def test_parse_for_top_level_nodes():
+    sheet = css_parser.parse(stylesheet_code)
+    names = [type(node).__name__ for node in sheet.children]
+    assert names == ["AtRuleNode", "RuleNode", "AtRuleNode"]
+
+
+def test_parse_for_statement_at_rule():
+    sheet = css_parser.parse(stylesheet_code)
+    at_rule = sheet.children[0]
+    assert at_rule.name == "@import"
+    assert not at_rule.has_block
+
+
+def test_parse_for_semicolon_inside_url():
+    sheet = css_parser.parse(stylesheet_code)
+    body = sheet.children[1]
+    assert len(body.declarations) == 2
+    assert body.declarations[0].property == "background"
+
+
+def test_parse_for_important_declaration():
+    sheet = css_parser.parse(stylesheet_code)
+    color = sheet.children[1].declarations[1]
+    assert color.value == "#333"
+    assert color.important
+
+
+def test_parse_for_nested_rule_in_media_query():
+    sheet = css_parser.parse(stylesheet_code)
+    media = sheet.children[2]
+    assert media.name == "@media"
+    assert media.get_rules()[0].selector == "nav a"
+
+
+def test_parse_for_comments():
+    sheet = css_parser.parse(stylesheet_code)
+    assert sheet.comments[0].text == "/* styles.css */"
+
+
+def test_parse_for_offsets_and_line_numbers():
+    sheet = css_parser.parse(stylesheet_code)
+    body = sheet.children[1]
+    source = stylesheet_code[body.start:body.end]
+    assert source.startswith("body {")
+    assert stylesheet_code[body.end - 1] == "}"
+    assert sheet.get_line(body.start) == 3
+
+
+def test_parse_for_no_errors():
+    sheet = css_parser.parse(stylesheet_code)
+    assert not sheet.errors
+
+
+def test_parse_for_errors_in_broken_code():
+    sheet = css_parser.parse(broken_code)
+    errors = [
+        (sheet.get_line(offset), message) for offset, message in sheet.errors
+    ]
+    assert errors == [
+        (2, "Declaration is missing a colon"),
+        (4, "Unexpected closing brace"),
+        (5, "Missing closing brace"),
+    ]
+
+
+def test_walk_for_document_order():
+    sheet = css_parser.parse(stylesheet_code)
+    preludes = [node.prelude for node in sheet.walk()]
+    assert preludes[-1] == "nav a"
+    assert len(preludes) == 4
+
+
+def test_parse_for_interned_declarations():
+    first = css_parser.parse("h1 { color: navy; }")
+    second = css_parser.parse("p { margin: 0; }\nh1 { color: navy; }")
+    first_rule, second_rule = first.children[0], second.children[1]
+    assert first_rule.selector is second_rule.selector
+    first_dec = first_rule.declarations[0]
+    second_dec = second_rule.declarations[0]
+    assert first_dec.property is second_dec.property
+    assert first_dec.value is second_dec.value
@@ -0,0 +1,124 @@
+import pytest
+
+from webanalyst import css_validator
+from webanalyst import validator as val
+
+valid_css_code = """@charset "utf-8";
+@import url("reset.css");
+:root { --accent: #336699; }
+body {
+    font-size: 1.1em;
+    color: var(--accent);
+    background: url("bg.png") no-repeat, linear-gradient(#fff, #000);
+    margin: 0 auto;
+    -webkit-font-smoothing: antialiased;
+}
+@media only screen and (min-width: 600px) {
+    nav a { display: inline-block; padding: .5rem 1%; }
+}
+@font-face { font-family: "Body"; src: url("body.woff2"); }
+"""
+invalid_css_code = """ body {
+   font-family: Arial, Helvetica, sans-serif;
+   font-size: 100pct;
+ }
+ #graphic, h1 {
+   text-align: center;
+ }
+ p {
+   align: left;
+ }"""
+
+
+@pytest.fixture
+def local_engine():
+    engine = val.get_css_engine()
+    val.set_css_engine("local")
+    yield val
+    val.set_css_engine(engine)
+
+
+def get_errors(code):
+    messages = css_validator.get_messages(code)
+    return [m for m in messages if m.level == "error"]
+
+
+def test_get_messages_for_valid_css():
+    assert not get_errors(valid_css_code)
+
+
+def test_get_messages_for_vendor_prefix_warning():
+    messages = css_validator.get_messages(valid_css_code)
+    assert [m.level for m in messages] == ["warning"]
+
+
+def test_get_messages_for_two_errors():
+    errors = get_errors(invalid_css_code)
+    assert [(e.line, e.context) for e in errors] == [(3, "body"), (9, "p")]
+
+
+def test_get_messages_for_unknown_property():
+    error = get_errors(invalid_css_code)[1]
+    assert error.message == "Property “align” doesn't exist :"
+    assert error.extract == "left"
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "p { display: phred; }",
+        "p { color: #12345; }",
+        "p { margin: 1em 2em 3em 4em 5em; }",
+        "p { width: 100pct; }",
+        "p { color red; }",
+        "p { color: red; ",
+        "@mdia screen { p { color: red; } }",
+        "p { color: red; }\n@import url(a.css);",
+    ],
+)
+def test_get_messages_for_one_error(code):
+    assert len(get_errors(code)) == 1
+
+
+def test_get_messages_for_unterminated_string():
+    messages = [e.extract for e in get_errors('p { content: "oops; }')]
+    assert messages == ["unterminated string", "missing closing brace"]
+
+
+def test_check_value_for_global_keyword():
+    assert css_validator.check_value("display", "inherit") is None
+
+
+def test_check_value_for_color_keyword():
+    assert css_validator.check_value("color", "AntiqueWhite") is None
+
+
+def test_validate_css_for_congrats():
+    results = css_validator.validate_css("p { font-size: 3em; }")
+    assert val.is_css_valid(results)
+
+
+def test_validate_css_for_error_rows():
+    results = css_validator.validate_css(invalid_css_code)
+    errors = val.get_css_errors_list(results)
+    assert errors[1] == "Property “align” doesn't exist: left"
+
+
+def test_validate_css_for_errors_without_markup():
+    results = css_validator.validate_css(invalid_css_code)
+    errors = val.get_css_errors_list(results)
+    assert not val.is_css_valid(results)
+    assert results.tags is None
+    # the same errors the rendered markup holds
+    assert errors == val.get_css_errors_list(str(results))
+
+
+def test_validate_css_with_local_engine(local_engine):
+    results = local_engine.validate_css(invalid_css_code)
+    assert not local_engine.is_css_valid(results)
+    assert local_engine.get_num_errors(val.get_css_errors_list(results)) == 2
+
+
+def test_set_css_engine_for_unknown_engine():
+    with pytest.raises(ValueError):
+        val.set_css_engine("jigsaw")
@@ -365,6 +365,30 @@ def test_get_specificity_for_002():
     assert results == "002"
 
 
+def test_get_specificity_tuple_for_pseudo_elements():
+    assert css.get_specificity_tuple("p::first-line") == (0, 0, 2)
+    assert css.get_specificity_tuple("p:before") == (0, 0, 2)
+    assert css.get_specificity_tuple("*") == (0, 0, 0)
+
+
+def test_get_specificity_tuple_for_attribute_selectors():
+    selector = 'a[href^="http"][target=_blank]'
+    assert css.get_specificity_tuple(selector) == (0, 2, 1)
+
+
+def test_get_specificity_tuple_for_not_arguments():
+    assert css.get_specificity_tuple("a:not(#x, .y)") == (1, 0, 1)
+    assert css.get_specificity_tuple("li:not(:first-child)") == (0, 1, 1)
+    assert css.get_specificity_tuple("a:where(#x) b") == (0, 0, 2)
+    assert css.get_specificity_tuple("li:nth-child(2n+1)") == (0, 1, 1)
+
+
+def test_get_specificity_tuple_for_numeric_comparison():
+    many_classes = css.get_specificity_tuple(".a.b.c.d.e.f.g.h.i.j.k")
+    assert many_classes > css.get_specificity_tuple(".a.b h1")
+    assert many_classes < css.get_specificity_tuple("#nav")
+
+
 def test_has_vendor_prefix_for_false():
     selector = "transition"
     results = css.has_vendor_prefix(selector)
@@ -545,3 +569,127 @@ def test_has_repeat_selectors_for_true(styles_with_multiple_selectors):
 
 # TODO: test stylesheet_with_gradients for color rulesets
 # not sure what we want out of it.
+
+
+many_media_queries = """
+body { color: #000; }
+@media (min-width: 400px) { body { font-size: 1em; } }
+@media (min-width: 600px) { body { font-size: 1.1em; } }
+@media (min-width: 800px) { body { font-size: 1.2em; } }
+@media (min-width: 1000px) { body { font-size: 1.3em; } }
+@supports (display: grid) {
+    @media screen { main { display: grid; } }
+}
+"""
+
+
+def test_stylesheet_for_more_than_three_media_queries():
+    sheet = css.Stylesheet("local", many_media_queries)
+    assert len(sheet.nested_at_rules) == 6
+
+
+def test_stylesheet_for_at_rule_nested_in_at_rule():
+    sheet = css.Stylesheet("local", many_media_queries)
+    nested = sheet.nested_at_rules["@media screen "]
+    assert nested[0].selector == "main"
+
+
+def test_stylesheet_for_nested_rules():
+    code = (
+        "nav, footer { color: #000;\n"
+        "  a { color: #336699; }\n"
+        "  &:hover { background-color: #fff; }\n"
+        "  @media print { color: #111; } }"
+    )
+    sheet = css.Stylesheet("local", code)
+    selectors = [ruleset.selector for ruleset in sheet.rulesets]
+    assert selectors == [
+        "nav, footer",
+        "nav a, footer a",
+        "nav:hover, footer:hover",
+    ]
+    assert sheet.rulesets[1].line == 2
+    assert {"nav a, footer a": {"color": "#336699"}} in sheet.color_rulesets
+    nested = sheet.nested_at_rules["@media print "]
+    assert nested[0].selector == "nav, footer"
+
+
+def test_get_nested_selector_for_parent_reference():
+    assert css.get_nested_selector("a", "b") == "a b"
+    assert css.get_nested_selector("a, p", "& + &") == "a + a, p + p"
+
+
+def test_stylesheet_text_without_at_rules():
+    sheet = css.Stylesheet("local", many_media_queries)
+    assert sheet.text == "body { color: #000; }"
+
+
+def test_stylesheet_for_braces_inside_strings():
+    code = 'a::after { content: "}"; color: red; }\np { color: blue; }'
+    sheet = css.Stylesheet("local", code)
+    assert sheet.selectors == ["a::after", "p"]
+
+
+def test_ruleset_for_slots(ruleset1):
+    assert not hasattr(ruleset1, "__dict__")
+    assert not hasattr(ruleset1.declaration_block, "__dict__")
+    assert not hasattr(ruleset1.declaration_block.declarations[0], "__dict__")
+
+
+def test_stylesheet_for_lines_without_parse_tree():
+    code = "p {color: red;}\n@media print {\n  h1 {color: navy;}\n}"
+    sheet = css.Stylesheet("style.css", code)
+    assert not hasattr(sheet, "tree")
+    assert sheet.rulesets[0].line == 1
+    assert sheet.nested_at_rules["@media print "][0].line == 3
+
+
+def test_ruleset_declaration_block_text_for_block_code(ruleset1):
+    expected = declaration_block_with_selector.split("{")[1]
+    expected = expected.replace("\n", "")
+    assert ruleset1.declaration_block.text == expected
+
+
+def test_declaration_block_text_for_new_text(declaration_block_no_selector):
+    declaration_block_no_selector.text = "color: red;"
+    assert declaration_block_no_selector.text == "color: red;"
+
+
+def test_declaration_text_for_valid_declaration(valid_color_declaration):
+    assert valid_color_declaration.text == "color: #336699;"
+
+
+def test_declaration_text_for_invalid_declaration():
+    dec = css.Declaration(declarations["invalid3"])
+    assert dec.text == "property:val; something"
+
+
+def test_stylesheet_for_interned_selectors_and_declarations():
+    code = "nav ul li a {color: #336699;}"
+    first = css.Stylesheet("first.css", code)
+    second = css.Stylesheet("second.css", "p {}" + code)
+    first_rule, second_rule = first.rulesets[0], second.rulesets[1]
+    assert first_rule.selector is second_rule.selector
+    first_dec = first_rule.declaration_block.declarations[0]
+    second_dec = second_rule.declaration_block.declarations[0]
+    assert first_dec.property is second_dec.property
+    assert first_dec.value is second_dec.value
+
+
+def test_selector_index_for_occurrences_with_lines():
+    code = "p {color: red;}\nh1 {color: navy;}\n\np {margin: 0;}"
+    index = css.SelectorIndex([css.Stylesheet("style.css", code)])
+    assert index.occurrences["p"] == [("style.css", 1), ("style.css", 4)]
+    assert index.count("h1") == 1
+    assert index.count("h2") == 0
+
+
+def test_selector_index_for_repeats_across_stylesheets():
+    first = css.Stylesheet("first.css", "nav a {color: red;} p {margin: 0;}")
+    second = css.Stylesheet("second.css", "nav a {color: blue;}")
+    index = css.SelectorIndex([first, second])
+    assert index.get_repeats() == {
+        "nav a": [("first.css", 1), ("second.css", 1)]
+    }
+    assert index.has_repeats()
+    assert not css.SelectorIndex([first]).has_repeats()
@@ -0,0 +1,131 @@
+from webanalyst import CSSinator as css
+from webanalyst import gradients
+
+gradients_css_path = (
+    "tests/test_files/projects/page_with_gradients_and_alpha/style.css"
+)
+
+linear = "linear-gradient(to right, red 10%, rgba(0,0,255,.5) 20% 40%, #fff)"
+prefixed = (
+    "-webkit-linear-gradient(top, #46ABA6 0%, #092756 200%), "
+    "linear-gradient(to bottom, #46ABA6 0%, #092756 200%)"
+)
+legacy = (
+    "-webkit-gradient(linear, left top, left bottom, from(#fff), "
+    "color-stop(50%, red), to(#000))"
+)
+
+
+def test_parse_gradients_for_stops_and_positions():
+    gradient = gradients.parse_gradients(linear)[0]
+    assert gradient.kind == "linear"
+    assert not gradient.repeating
+    assert gradient.stops == (
+        ("red", ("10%",)),
+        ("rgba(0,0,255,.5)", ("20%", "40%")),
+        ("#fff", ()),
+    )
+
+
+def test_parse_gradients_for_radial_and_conic():
+    value = (
+        "repeating-radial-gradient(circle at center, "
+        "hsl(0, 100%, 50%) 0 10px, navy 20px), "
+        "conic-gradient(from 90deg at 50% 50%, red, blue)"
+    )
+    radial, conic = gradients.parse_gradients(value)
+    assert (radial.kind, radial.repeating) == ("radial", True)
+    assert [stop.color for stop in radial.stops] == [
+        "hsl(0, 100%, 50%)",
+        "navy",
+    ]
+    assert conic.kind == "conic"
+    assert [stop.color for stop in conic.stops] == ["red", "blue"]
+
+
+def test_parse_gradients_for_vendor_prefixes():
+    webkit, standard = gradients.parse_gradients(prefixed)
+    assert webkit.prefix == "-webkit-"
+    assert not standard.prefix
+    assert webkit.stops == standard.stops
+
+
+def test_parse_gradients_for_legacy_webkit_gradient():
+    gradient = gradients.parse_gradients(legacy)[0]
+    assert gradient.kind == "linear"
+    assert gradient.stops == (
+        ("#fff", ("0%",)),
+        ("red", ("50%",)),
+        ("#000", ("100%",)),
+    )
+
+
+def test_parse_gradients_for_legacy_functional_colors():
+    code = (
+        "-webkit-gradient(linear, 0 0, 0 100%, from(rgb(255,255,255)), "
+        "color-stop(50%, rgba(0,0,0,.5)), to(rgb(0,0,0)))"
+    )
+    gradient = gradients.parse_gradients(code)[0]
+    assert gradient.stops == (
+        ("rgb(255,255,255)", ("0%",)),
+        ("rgba(0,0,0,.5)", ("50%",)),
+        ("rgb(0,0,0)", ("100%",)),
+    )
+    # black text on the black stop
+    assert gradients.get_min_contrast("#000", [code]) == 1.0
+
+
+def test_parse_gradients_for_no_gradient():
+    assert gradients.parse_gradients("url(images/banner.png)") == ()
+
+
+def test_expand_stack_for_each_layer_bottom_up():
+    layers = "linear-gradient(red, blue), linear-gradient(#fff, #000) navy"
+    stacks = gradients.expand_stack(["white", layers])
+    assert stacks == [
+        ["white", "navy", "#fff", "red"],
+        ["white", "navy", "#fff", "blue"],
+        ["white", "navy", "#000", "red"],
+        ["white", "navy", "#000", "blue"],
+    ]
+
+
+def test_get_min_contrast_for_layers_with_transparent_stops():
+    with open(gradients_css_path, encoding="utf-8") as fp:
+        sheet = css.Stylesheet("style.css", fp.read())
+    html = [rule for rule in sheet.rulesets if rule.selector == "html"][0]
+    backgrounds = [
+        declaration.value
+        for declaration in html.declaration_block.declarations
+        if declaration.property == "background"
+        and "gradient" in declaration.value
+    ]
+    assert backgrounds
+    for background in backgrounds:
+        # the teal layer shows through the transparent stops above it
+        ratio = gradients.get_min_contrast("#fff", [background])
+        assert 2 < ratio < 3
+
+
+def test_get_min_contrasts_for_worst_stop():
+    pairs = [
+        ("#000", ["linear-gradient(#fff, #777)"]),
+        ("#000", ["#777"]),
+        ("#000", ["url(banner.png)"]),
+        ("#fff", []),
+    ]
+    results = gradients.get_min_contrasts(pairs)
+    assert results[0] == results[1]
+    assert results[2] is None
+    assert results[3] == 1.0
+
+
+def test_get_min_contrasts_for_repeated_pairs():
+    pairs = [("#000", ["#777"]), ("#fff", []), ("#000", ["#777"])] * 3
+    results = gradients.get_min_contrasts(pairs)
+    assert results == gradients.get_min_contrasts(pairs[:3]) * 3
+
+
+def test_get_min_contrast_for_transparent_stop():
+    stack = ["navy", "linear-gradient(transparent, white)"]
+    assert gradients.get_min_contrast("white", stack) == 1.0
@@ -1,9 +1,12 @@
+import os
+
 import pytest
 
 from webanalyst import HTMLinator as html
 from webanalyst import clerk
 
 file_with_inline_styles = "tests/test_files/sample_with_inline_styles.html"
+large_project_path = "tests/test_files/projects/large_project/"
 
 
 @pytest.fixture
@@ -16,3 +19,83 @@ def test_html_report_for_file_that_uses_inline_styles(
     markup_with_inline_styles,
 ):
     assert html.uses_inline_styles(markup_with_inline_styles)
+
+
+@pytest.fixture
+def document_cache():
+    return html.DocumentCache()
+
+
+def test_document_cache_for_one_miss_then_hits(document_cache):
+    document_cache.get_document(file_with_inline_styles)
+    document_cache.get_document(file_with_inline_styles)
+    document_cache.get_document(file_with_inline_styles)
+    assert document_cache.hits == 2
+    assert document_cache.misses == 1
+
+
+def test_document_cache_for_reparse_after_file_changes(
+    document_cache, tmp_path
+):
+    path = tmp_path / "index.html"
+    path.write_text("<html><body><p>one</p></body></html>")
+    first = document_cache.get_document(str(path))
+    path.write_text("<html><body><p>one</p><p>two</p></body></html>")
+    os.utime(path, ns=(first.mtime + 10 ** 9, first.mtime + 10 ** 9))
+    second = document_cache.get_document(str(path))
+    assert document_cache.misses == 2
+    assert second.get_num_elements("p") == 2
+
+
+def test_get_num_elements_in_file_with_cache_for_doctype(document_cache):
+    results = html.get_num_elements_in_file(
+        "DOCTYPE", file_with_inline_styles, document_cache
+    )
+    assert results == 1
+
+
+def test_get_num_elements_in_file_with_cache_for_2_paragraphs(document_cache):
+    results = html.get_num_elements_in_file(
+        "p", file_with_inline_styles, document_cache
+    )
+    expected = html.get_num_elements_in_file("p", file_with_inline_styles)
+    assert results == expected == 2
+
+
+def test_html_document_for_uses_inline_styles(document_cache):
+    document = document_cache.get_document(file_with_inline_styles)
+    assert document.uses_inline_styles()
+
+
+def test_html_document_for_get_linked_css_for_none(document_cache):
+    document = document_cache.get_document(file_with_inline_styles)
+    assert document.get_linked_css() is None
+
+
+@pytest.fixture
+def large_project_census():
+    return html.ElementCensus(large_project_path)
+
+
+def test_element_census_for_doctype_per_file(large_project_census):
+    assert large_project_census.get_num_elements("DOCTYPE") == 3
+
+
+def test_element_census_for_head_not_counting_header(large_project_census):
+    results = large_project_census.get_num_elements("head")
+    expected = html.get_num_elements_in_folder("head", large_project_path)
+    assert results == expected == 3
+
+
+def test_element_census_matches_folder_counts(large_project_census):
+    for el in ("a", "P", "h1", "img", "strong", "marquee"):
+        expected = html.get_num_elements_in_folder(el, large_project_path)
+        assert large_project_census.get_num_elements(el) == expected
+
+
+def test_element_census_parses_each_file_once(document_cache):
+    census = html.ElementCensus(large_project_path, document_cache)
+    census.get_num_elements("p")
+    census.get_num_elements("a")
+    assert document_cache.misses == 3
+    assert document_cache.hits == 0
@@ -0,0 +1,58 @@
+import pstats
+
+import pytest
+
+from webanalyst import instrumentation
+
+
+class Parser:
+    def __init__(self):
+        self.bytes_parsed = 0
+
+    def parse(self, text):
+        self.bytes_parsed += len(text)
+        return text.upper()
+
+
+@pytest.fixture
+def stages():
+    return instrumentation.Stages()
+
+
+def test_time_for_results_and_stats(stages):
+    results = stages.time("double", lambda x: x * 2, 21)
+    assert results == 42
+    stats = stages.get_stats()["double"]
+    assert stats["calls"] == 1
+    assert stats["seconds"] >= 0
+    assert stats["bytes"] == 0
+
+
+def test_time_for_failed_call_recorded(stages):
+    with pytest.raises(ZeroDivisionError):
+        stages.time("divide", lambda: 1 / 0)
+    assert stages.get_stats()["divide"]["calls"] == 1
+
+
+def test_wrap_for_calls_and_bytes(stages):
+    parser = Parser()
+    stages.wrap(
+        parser, "parse", "parse", count_bytes=lambda: parser.bytes_parsed
+    )
+    assert parser.parse("h1") == "H1"
+    parser.parse("p {}")
+    assert stages.get_stats()["parse"]["calls"] == 2
+    assert stages.get_stats()["parse"]["bytes"] == 6
+
+
+def test_get_stats_for_copy(stages):
+    stages.record("save", 0.5)
+    stages.get_stats()["save"]["calls"] = 10
+    assert stages.get_stats()["save"]["calls"] == 1
+
+
+def test_run_profiled_for_pstats_file(tmp_path):
+    path = str(tmp_path / "run.pstats")
+    results = instrumentation.run_profiled(path, sorted, [3, 1, 2])
+    assert results == [1, 2, 3]
+    assert pstats.Stats(path).total_calls > 0
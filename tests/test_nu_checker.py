@@ -0,0 +1,63 @@
+import sys
+
+import pytest
+
+from webanalyst import nu_checker
+
+jar_path = "tests/test_files/sample_with_errors.html"
+
+
+@pytest.fixture
+def stand_in_server():
+    # python's http.server stands in for the JVM
+    server = nu_checker.NuServer(jar_path, startup_timeout=10)
+    server.get_command = lambda: [
+        sys.executable,
+        "-m",
+        "http.server",
+        str(server.port),
+        "--bind",
+        "127.0.0.1",
+    ]
+    yield server
+    server.stop()
+
+
+def test_get_command_for_web_service_mode():
+    server = nu_checker.NuServer("vnu.jar", port=8888, java="java")
+    command = server.get_command()
+    assert command == [
+        "java",
+        "-cp",
+        "vnu.jar",
+        "nu.validator.servlet.Main",
+        "8888",
+    ]
+
+
+def test_start_for_missing_jar():
+    server = nu_checker.NuServer("no/such/vnu.jar")
+    with pytest.raises(FileNotFoundError):
+        server.start()
+
+
+def test_start_for_one_process(stand_in_server):
+    url = stand_in_server.start()
+    process = stand_in_server.process
+    assert url == stand_in_server.start()
+    assert stand_in_server.process is process
+    assert nu_checker.is_listening(stand_in_server.port)
+
+
+def test_stop_for_stopped_process(stand_in_server):
+    stand_in_server.start()
+    process = stand_in_server.process
+    stand_in_server.stop()
+    assert process.poll() is not None
+    assert not stand_in_server.is_running()
+
+
+def test_get_identity_for_port_independence():
+    server1 = nu_checker.NuServer(jar_path, port=8888)
+    server2 = nu_checker.NuServer(jar_path, port=9999)
+    assert server1.get_identity() == server2.get_identity()
@@ -5,7 +5,7 @@
 import pytest
 from bs4 import BeautifulSoup
 
-from webanalyst import clerk, report
+from webanalyst import cascade, clerk, report
 
 about_me_path = "tests/test_files/projects/about_me/"
 about_me_file_path = about_me_path + "index.html"
@@ -829,3 +829,134 @@ def test_about_me_html_report_for_html_results_in_report_html_doc_html_results_c
     report_contents = clerk.file_to_string(report_html_doc_path)
     report_tr = "<tr><td>H2</td><td>2</td><td>2</td><td>Meets</td></tr>"
     assert report_tr in report_contents
+
+
+def test_report_document_for_one_save(tmp_path):
+    report_path = str(tmp_path / "about_me" / "report.html")
+    my_report = report.Report(about_me_path, report_path)
+    my_report.generate_report()
+    with open(report_path) as f:
+        report_contents = f.read()
+    assert report_contents.startswith('<html lang="en">')
+    assert "<td>H2</td><td>2</td><td>2</td><td>Meets</td>" in report_contents
+
+
+def test_report_document_for_publishing_in_memory(
+    about_me_readme_list, tmp_path
+):
+    report_path = str(tmp_path / "report.html")
+    report_document = report.ReportDocument()
+    general_report = report.GeneralReport(
+        about_me_readme_list, about_me_path, None, report_path, report_document
+    )
+    general_report.generate_report()
+    results = report_document.soup.find(class_="general-wps-results")
+    # filled in, but nothing written until the document is saved
+    assert "Avg. Words / Sentence" in results.text
+    assert not (tmp_path / "report.html").exists()
+
+
+def test_get_stage_stats_for_report_stages(large_project_report):
+    stages = large_project_report.get_stage_stats()
+    for stage in ("prep", "general", "html", "css", "save", "total"):
+        assert stages[stage]["calls"] == 1
+    assert stages["css.validate"]["calls"] == 1
+    assert stages["css.parse"]["bytes"] > 0
+    assert stages["total"]["bytes"] >= stages["css.parse"]["bytes"]
+
+
+def test_set_repeat_selectors_for_selector_index(large_project_css_report):
+    occurrences = large_project_css_report.selector_index.occurrences
+    sources = sorted(href for href, line in occurrences["body"])
+    assert sources == large_project_css_report.repeat_selectors["body"]
+
+
+def test_get_final_header_colors_for_one_item_per_heading(
+    large_project_css_report,
+):
+    css_report = large_project_css_report
+    all_styles = css_report.get_all_styles_in_order()
+    # pages are matched by name
+    pages = [page.split("/")[-1] for page in css_report.html_files]
+    css_report.html_files = pages
+    header_colors = css_report.get_final_header_colors(all_styles)
+    for page in css_report.get_html_pages_addressed(header_colors):
+        selectors = [
+            item["selector"]
+            for item in header_colors
+            if item["html_file"] == page
+        ]
+        assert len(selectors) == len(set(selectors))
+    assert css_report.get_final_global_colors(all_styles)
+
+
+def test_get_header_color_contrast_for_transparent_colors(
+    large_project_css_report,
+):
+    header_colors = {
+        "index.html": {
+            # 40% black on white is #999999: too light even for Large AA
+            "h1": {"color": "rgba(0, 0, 0, .4)", "bg-color": "#fff"},
+            "h2": {"color": "#000", "global-bg-color": "rgba(0,0,0,.1)"},
+            "h3": {"color": "#000", "bg-color": "url(h3.png)"},
+            "h4": {"color": "#000", "bg-color": "linear-gradient(#fff, #333)"},
+        }
+    }
+    results = large_project_css_report.get_header_color_contrast(
+        header_colors
+    )
+    assert "index.html: h1 fails" in results
+    assert "h2" not in results
+    assert "the h3 colors cannot be tested" in results
+    # a gradient is as readable as its worst stop
+    assert "index.html: h4 fails" in results
+
+
+def test_get_header_color_contrast_for_transparent_bg_over_dark_page(
+    large_project_css_report,
+):
+    values = {
+        "bg-color": cascade.CascadedValue(
+            "rgba(0,0,0,.5)", "h1", (0, 0, 1), 0, 0, "style.css"
+        ),
+        "color": cascade.CascadedValue(
+            "#fff", "h1", (0, 0, 1), 0, 0, "style.css"
+        ),
+    }
+    applied = large_project_css_report.set_header_color_details(
+        {}, values, "navy", "#000"
+    )
+    assert applied["page-bg-color"] == "navy"
+    header_colors = {"index.html": {"h1": applied}}
+    # white on half black over navy, not over white (3.94)
+    results = large_project_css_report.get_header_color_contrast(
+        header_colors
+    )
+    assert results == ""
+
+
+def test_get_contrast_audit_for_every_color_selector(
+    large_project_css_report,
+):
+    rows = large_project_css_report.get_contrast_audit()
+    pages = {row["html_file"] for row in rows}
+    assert pages == {"about.html", "gallery.html"}
+    for page in pages:
+        selectors = [
+            row["selector"] for row in rows if row["html_file"] == page
+        ]
+        assert len(selectors) == len(set(selectors))
+    hover = [row for row in rows if row["selector"] == "nav li a:hover"]
+    assert hover and all(row["report"]["Large AA"] == "Fail" for row in hover)
+    # @keyframes don't select anything
+    assert not [row for row in rows if row["selector"].endswith("%")]
+
+
+def test_get_contrast_audit_for_layered_gradient_background():
+    gradients_path = "tests/test_files/projects/page_with_gradients_and_alpha/"
+    gradients_report = report.Report(gradients_path)
+    gradients_report.generate_report()
+    rows = gradients_report.css_report.get_contrast_audit()
+    assert rows
+    # not white text on white for each transparent stop
+    assert all(row["contrast"] > 3 for row in rows)
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from bs4 import BeautifulSoup
+
+from webanalyst import report, report_export
+from webanalyst import validator as val
+
+about_me_path = "tests/test_files/projects/about_me/"
+
+nu_error = {
+    "type": "error",
+    "lastLine": 12,
+    "firstColumn": 5,
+    "lastColumn": 9,
+    "message": "Stray end tag “div”.",
+    "extract": "</div>",
+}
+nu_info = {"type": "info", "lastLine": 3, "message": "Consider lang."}
+
+css_row = BeautifulSoup(
+    '<tr class="error"><td class="linenumber" title="Line 7">7</td>'
+    '<td class="codeContext">h1</td><td class="parse-error">'
+    "Value Error : color <span>bleu</span> is not a color value</td></tr>",
+    "html.parser",
+)
+
+
+@pytest.fixture(scope="module")
+def about_me_report():
+    about_me = report.Report(about_me_path)
+    about_me.generate_report()
+    return about_me
+
+
+def test_get_line_number_for_validator_title():
+    assert report_export.get_line_number("Line 12") == 12
+
+
+def test_get_line_number_for_none():
+    assert report_export.get_line_number(None) is None
+
+
+def test_normalize_html_message_for_error():
+    results = report_export.normalize_html_message("index.html", nu_error)
+    assert results == {
+        "file": "index.html",
+        "type": "error",
+        "line": 12,
+        "column": 5,
+        "message": "Stray end tag “div”.",
+        "extract": "</div>",
+    }
+
+
+def test_normalize_html_message_for_info_as_warning():
+    results = report_export.normalize_html_message("index.html", nu_info)
+    assert results["type"] == "warning"
+    assert results["column"] is None
+
+
+def test_normalize_css_message_for_error_row():
+    details = {
+        "error": "error",
+        "line_number": "Line 7",
+        "context": "h1",
+        "error_msg": "Value Error : color bleu is not a color value",
+        "extract": css_row.find("span"),
+    }
+    results = report_export.normalize_css_message("style.css", details)
+    assert results["type"] == "error"
+    assert results["line"] == 7
+    assert results["extract"] == "bleu"
+
+
+def test_to_json_ready_for_tuples_and_tags():
+    value = {"style_tags": [("index.html", 0)], 1: css_row.find("span")}
+    results = report_export.to_json_ready(value)
+    assert results == {"style_tags": [["index.html", 0]], "1": "bleu"}
+
+
+def test_get_report_details_for_json_types(about_me_report):
+    details = about_me_report.get_report_details()
+    assert json.loads(json.dumps(details)) == details
+    assert isinstance(details["html"]["validator_messages"], list)
+    assert isinstance(details["css"]["css_validator_results"], list)
+
+
+def test_ndjson_writer_for_one_line_per_record(tmp_path):
+    path = str(tmp_path / "report.ndjson")
+    with report_export.NDJSONWriter(path) as writer:
+        writer.write({"project": "one"})
+        writer.write({"project": "two", "style_tags": ("index.html", 0)})
+        # flushed as written
+        with open(path) as f:
+            assert len(f.readlines()) == 2
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[1] == {"project": "two", "style_tags": ["index.html", 0]}
+
+
+def test_normalize_html_message_for_alert():
+    alert = val.get_markup_alert("HTML validation is turned off")
+    results = report_export.normalize_html_message("index.html", alert)
+    assert results["type"] == "warning"
+    assert results["line"] is None
+    assert results["extract"] is None
@@ -0,0 +1,110 @@
+import pytest
+
+from webanalyst import validation_cache
+from webanalyst import validator as val
+
+html_file_with_errors = "tests/test_files/sample_with_errors.html"
+markup_errors = [
+    {
+        "type": "error",
+        "lastLine": 3,
+        "lastColumn": 7,
+        "firstColumn": 1,
+        "message": "Stray end tag “p”.",
+        "extract": "</p>",
+        "hiliteStart": 0,
+        "hiliteLength": 4,
+    }
+]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return validation_cache.ValidationCache(str(tmp_path / "cache.sqlite3"))
+
+
+@pytest.fixture
+def validator_cache(cache):
+    original = val.results_cache, val.cache_path
+    val.set_results_cache(cache)
+    yield cache
+    val.results_cache, val.cache_path = original
+
+
+def test_get_key_for_same_payload_str_and_bytes():
+    key1 = validation_cache.get_key("nu", "<p>hi</p>")
+    key2 = validation_cache.get_key("nu", b"<p>hi</p>")
+    assert key1 == key2
+
+
+def test_get_key_for_different_validators():
+    key1 = validation_cache.get_key("nu 1", "<p>hi</p>")
+    key2 = validation_cache.get_key("nu 2", "<p>hi</p>")
+    assert key1 != key2
+
+
+def test_cache_for_miss_then_hit(cache):
+    assert cache.get("nu", "payload") is None
+    cache.set("nu", "payload", "[]")
+    assert cache.get("nu", "payload") == "[]"
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_cache_for_persistence(cache):
+    cache.set("nu", "payload", "[]")
+    reopened = validation_cache.ValidationCache(cache.path)
+    assert reopened.get("nu", "payload") == "[]"
+
+
+def test_cache_for_expired_entry(cache):
+    cache.set("nu", "payload", "[]")
+    cache.ttl = -1
+    assert cache.get("nu", "payload") is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_cache_for_lru_eviction_by_entries(cache):
+    cache.max_entries = 2
+    cache.set("nu", "one", "1")
+    cache.set("nu", "two", "2")
+    # touch "one" so "two" is the least recently used
+    cache.get("nu", "one")
+    cache.set("nu", "three", "3")
+    assert cache.get("nu", "two") is None
+    assert cache.get("nu", "one") == "1"
+    assert cache.get("nu", "three") == "3"
+
+
+def test_cache_for_eviction_by_bytes(cache):
+    cache.max_bytes = 10
+    cache.set("nu", "one", "x" * 6)
+    cache.set("nu", "two", "y" * 6)
+    assert cache.get_stats()["entries"] == 1
+    assert cache.get("nu", "two") == "y" * 6
+
+
+def test_get_markup_validity_for_cached_results(validator_cache):
+    with open(html_file_with_errors, "rb") as payload:
+        data = payload.read()
+    identity = val.get_markup_validator_identity()
+    validator_cache.set(identity, data, val.json.dumps(markup_errors))
+    results = val.get_markup_validity(html_file_with_errors)
+    assert results == markup_errors
+
+
+def test_validate_css_for_cached_results(validator_cache):
+    markup = '<div id="results_container"><div id="congrats"></div></div>'
+    identity = val.get_css_validator_identity()
+    validator_cache.set(identity, "p { color: red; }", markup)
+    results = val.validate_css("p { color: red; }")
+    assert val.is_css_valid(results)
+
+
+def test_set_cache_path_for_cache_on_first_use(tmp_path):
+    path = str(tmp_path / "validation.sqlite3")
+    assert val.get_results_cache() is None
+    val.set_cache_path(path)
+    assert val.get_results_cache().path == path
+    val.set_cache_path("off")
+    assert val.get_results_cache() is None
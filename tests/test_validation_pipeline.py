@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from webanalyst import validation_pipeline as pipeline
+from webanalyst import validator as val
+
+
+def get_http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.HTTPError(response=response)
+
+
+class FlakyRequest:
+    """fails with the given errors before succeeding"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, value):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return value
+
+
+def test_map_in_order_for_file_order():
+    def slow_square(n):
+        # later items finish first
+        time.sleep((5 - n) * 0.01)
+        return n * n
+
+    results = pipeline.map_in_order(slow_square, range(5), workers=5)
+    assert results == [0, 1, 4, 9, 16]
+
+
+def test_map_in_order_for_concurrency_limit():
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def track(n):
+        with lock:
+            running.append(n)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.remove(n)
+        return n
+
+    pipeline.map_in_order(track, range(8), workers=3)
+    assert max(peak) == 3
+
+
+def test_rate_limiter_for_same_host():
+    limiter = pipeline.RateLimiter(0.05)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.wait("https://validator.w3.org/nu/")
+    assert time.monotonic() - start >= 0.1
+
+
+def test_rate_limiter_for_different_hosts():
+    limiter = pipeline.RateLimiter(1)
+    start = time.monotonic()
+    limiter.wait("https://validator.w3.org/nu/")
+    limiter.wait("https://jigsaw.w3.org/css-validator")
+    assert time.monotonic() - start < 0.5
+
+
+def test_with_retries_for_connection_errors():
+    flaky = FlakyRequest(requests.ConnectionError(), get_http_error(503))
+    results = pipeline.with_retries(flaky, "ok", backoff=0)
+    assert results == "ok"
+    assert flaky.calls == 3
+
+
+def test_with_retries_for_client_error():
+    flaky = FlakyRequest(get_http_error(404))
+    with pytest.raises(requests.HTTPError):
+        pipeline.with_retries(flaky, "ok", backoff=0)
+    assert flaky.calls == 1
+
+
+def test_with_retries_for_too_many_failures():
+    flaky = FlakyRequest(*[requests.Timeout()] * 3)
+    with pytest.raises(requests.Timeout):
+        pipeline.with_retries(flaky, "ok", retries=2, backoff=0)
+
+
+def test_validate_css_many_for_order_with_local_engine():
+    engine = val.get_css_engine()
+    val.set_css_engine("local")
+    try:
+        codes = ["p { color: red; }", "p { colr: red; }"]
+        results = val.validate_css_many(codes)
+    finally:
+        val.set_css_engine(engine)
+    assert [val.is_css_valid(result) for result in results] == [True, False]
+
+
+def test_circuit_breaker_for_failing_host():
+    breaker = pipeline.CircuitBreaker(cooldown=60)
+    url = "https://validator.w3.org/nu/"
+    flaky = FlakyRequest(requests.ConnectionError())
+    with pytest.raises(requests.ConnectionError):
+        pipeline.with_retries(flaky, "ok", retries=0, breaker=breaker, url=url)
+    with pytest.raises(pipeline.HostUnavailable):
+        pipeline.with_retries(flaky, "ok", breaker=breaker, url=url)
+    # the host wasn't called while it cooled down
+    assert flaky.calls == 1
+
+
+def test_circuit_breaker_for_other_hosts():
+    breaker = pipeline.CircuitBreaker(cooldown=60)
+    breaker.record_failure("https://validator.w3.org/nu/")
+    results = pipeline.with_retries(
+        FlakyRequest(), "ok", breaker=breaker, url="https://localhost:8888/"
+    )
+    assert results == "ok"
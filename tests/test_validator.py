@@ -1,3 +1,7 @@
+import http.server
+import json
+import threading
+
 import pytest
 
 from webanalyst import validator as val
@@ -24,6 +28,44 @@ def invalid_markup():
     return invalid_markup
 
 
+class StandInValidator(http.server.BaseHTTPRequestHandler):
+    """a local stand-in for the Nu validator: one error per request"""
+
+    bodies = []
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        body = self.rfile.read(length)
+        self.bodies.append(body)
+        message = {"type": "error", "message": "{} bytes".format(length)}
+        content = json.dumps({"messages": [message]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_validator():
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), StandInValidator
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    original = val.w3cURL, val.results_cache, val.cache_path
+    val.w3cURL = "http://127.0.0.1:{}/?out=json".format(server.server_port)
+    val.set_results_cache(None)
+    StandInValidator.bodies = []
+    yield StandInValidator
+    val.w3cURL, val.results_cache, val.cache_path = original
+    server.shutdown()
+    server.server_close()
+
+
 @pytest.fixture
 def invalid_css_results():
     results = val.validate_css(invalid_css_code)
@@ -109,3 +151,64 @@ def test_validate_css_with_no_errors(valid_css_results):
 def test_validate_css_with_errors(invalid_css_results):
     results = val.validate_css(invalid_css_code)
     assert results == invalid_css_results
+
+
+def test_get_session_for_one_pooled_session():
+    assert val.get_session() is val.get_session()
+
+
+def test_set_pool_size_for_new_session():
+    session = val.get_session()
+    val.set_pool_size(4)
+    assert val.get_session() is not session
+    adapter = val.get_session().get_adapter("https://validator.w3.org")
+    assert adapter._pool_maxsize == 4
+
+
+def test_validate_markup_many_for_file_order(stand_in_validator):
+    paths = [
+        "tests/test_files/sample_with_errors.html",
+        "tests/test_files/html_with_css.html",
+        "tests/test_files/sample_with_errors.html",
+    ]
+    results = val.validate_markup_many(paths, workers=3)
+    expected = []
+    for path in paths:
+        with open(path, "rb") as f:
+            expected.append("{} bytes".format(len(f.read())))
+    assert [errors[0]["message"] for errors in results] == expected
+
+
+def test_get_markup_validity_for_whole_file_body(stand_in_validator):
+    path = "tests/test_files/sample_with_errors.html"
+    val.get_markup_validity(path)
+    with open(path, "rb") as f:
+        assert stand_in_validator.bodies == [f.read()]
+
+
+def test_set_markup_engine_for_local_nu_checker(stand_in_validator):
+    url = val.w3cURL
+    val.w3cURL = "https://validator.w3.org/nu/?out=json"
+    val.set_markup_engine("nu", url)
+    try:
+        results = val.get_markup_validity(html_file_with_errors)
+    finally:
+        val.set_markup_engine("w3c")
+    assert results[0]["type"] == "error"
+    assert len(stand_in_validator.bodies) == 1
+
+
+def test_set_markup_engine_for_unknown_engine():
+    with pytest.raises(ValueError):
+        val.set_markup_engine("tidy")
+
+
+def test_get_markup_validity_for_missing_vnu_jar():
+    jar_path = val.vnu_jar_path
+    val.set_markup_engine("vnu", "no/such/vnu.jar")
+    try:
+        results = val.get_markup_validity(html_file_with_errors)
+    finally:
+        val.set_markup_engine("vnu", jar_path)
+        val.set_markup_engine("w3c")
+    assert results[0]["type"] == "alert"
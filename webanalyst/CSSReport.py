@@ -1,13 +1,13 @@
 import logging
 import os
 import re
+import sys
 
 from bs4 import BeautifulSoup
 
-from . import CSSinator
+from . import CSSinator, cascade, gradients
 from . import HTMLinator as html
 from . import clerk
-from . import color_keywords as keywords
 from . import colortools as colors
 from . import report as rep
 from . import validator as val
@@ -22,8 +22,20 @@ report_path = "report/report.html"
 
 
 class CSSReport:
-    def __init__(self, readme_list, dir_path):
+    def __init__(
+        self,
+        readme_list,
+        dir_path,
+        document_cache=None,
+        report_path=report_path,
+        report_document=None,
+    ):
         self.__dir_path = dir_path
+        self.report_path = report_path
+        self.report_document = report_document
+        if document_cache is None:
+            document_cache = html.DocumentCache()
+        self.document_cache = document_cache
         self.html_level = "0"
         self.readme_list = readme_list
         self.html_files = []
@@ -39,6 +51,9 @@ class CSSReport:
         self.order_of_css_by_file = {}
         self.pages_contain_same_css_files = False
         self.repeat_selectors = {}
+        self.selector_index = None
+        # a Cascade of each stylesheet, by kind (see get_page_cascades)
+        self.sheet_cascades = {}
         self.repeat_declarations_blocks = {}
         self.set_readme_list()
         self.stylesheet_objects = []
@@ -382,6 +397,7 @@ class CSSReport:
                     )
                     global_bg = datum.get("global-bg-color")
                     global_col = datum.get("global-color")
+                    page_bg = datum.get("page-bg-color")
                     if selector not in background_foreground[page].keys():
                         background_foreground[page][selector] = {
                             "both_set": both_set,
@@ -390,6 +406,7 @@ class CSSReport:
                             "color": col,
                             "global-bg-color": global_bg,
                             "global-color": global_col,
+                            "page-bg-color": page_bg,
                         }
                     else:
                         # override if specificity is greater
@@ -410,6 +427,7 @@ class CSSReport:
                                 my_selector["both_set"] = True
                             my_selector["global-bg-color"] = global_bg
                             my_selector["global-color"] = global_col
+                            my_selector["page-bg-color"] = page_bg
         return background_foreground
 
     def get_html_pages_addressed(self, global_headers_data):
@@ -520,73 +538,159 @@ class CSSReport:
             # double check
             if "AA" in goals:
                 pass
+        # each heading's color over its background over the page's
+        # (unset colors are the browser's: black text on white)
+        headings = []
+        pairs = []
         for file, details in header_colors.items():
-            for selector in details.values():
-                # get the color unless it's not set,
-                # then get the global color
-                color = selector.get("color")
-                if not color:
-                    color = selector.get("global-color")
-                    if not color:
-                        color = "#000000"
-                color = self.get_color_hex(color)
-                if "warning" in color.lower():
-                    results += "WARNING for " + file["file"] + ": "
-                    results += color
-                    continue
-                bg_color = selector.get("bg-color")
-                if not bg_color:
-                    bg_color = selector.get("global-bg-color")
-                    if not bg_color:
-                        bg_color = "#ffffff"
-                bg_color = self.get_color_hex(bg_color)
-                if "warning" in bg_color.lower():
-                    results += "WARNING for " + file["file"] + ": "
-                    results += bg_color
-                    continue
-                # Cannot yet deal with gradients, so check first before crashing
-
-                # Test for contrast
-                contrast_report = colors.get_color_contrast_report(
-                    color, bg_color
+            for selector, data in details.items():
+                color = data.get("color") or data.get("global-color")
+                # a (semi) transparent heading background shows the page's
+                page_bg = data.get("page-bg-color") or data.get(
+                    "global-bg-color"
                 )
-                target = self.get_color_contrast_target("Large")
-                passes = contrast_report.get(target)
-                if passes == "Fail":
-                    selector = list(details.keys())[0]
-                    if not results:
-                        results = "<b>Fail</b>: \n<ul>"
-                    results += "<li>Page " + file + ": " + selector
-                    results += " fails color contrast report for " + target
-                    results += "</li>\n"
+                stack = [
+                    bg_color
+                    for bg_color in (page_bg, data.get("bg-color"))
+                    if bg_color
+                ]
+                headings.append((file, selector))
+                pairs.append((color or "#000000", stack))
+        if not pairs:
+            return results
+        contrast_reports = self.get_contrast_reports(pairs)
+        target = self.get_color_contrast_target("Large")
+        warnings = ""
+        for (file, selector), contrast_report in zip(
+            headings, contrast_reports
+        ):
+            if contrast_report is None:
+                warnings += "WARNING for " + file + ": the " + selector
+                warnings += " colors cannot be tested for contrast.\n"
+                continue
+            passes = contrast_report.get(target)
+            if passes == "Fail":
+                if not results:
+                    results = "<b>Fail</b>: \n<ul>"
+                results += "<li>Page " + file + ": " + selector
+                results += " fails color contrast report for " + target
+                results += "</li>\n"
         if results:
             results += "</ul>"
-        return results
+        return results + warnings
 
     def get_global_color_contrast(self, global_colors):
         results = ""
+        pairs = []
         for file in global_colors:
-            color = file.get("color")
-            color = self.get_color_hex(color)
-            if "warning" in color.lower():
-                results += "WARNING for " + file["file"] + ": "
-                results += color
-                continue
             bg_color = file.get("bg-color")
-            bg_color = self.get_color_hex(bg_color)
-            if "warning" in bg_color.lower():
-                results += "WARNING for " + file["file"] + ": "
-                results += color
+            stack = [bg_color] if bg_color else []
+            pairs.append((file.get("color") or "#000000", stack))
+        if not pairs:
+            return results
+        contrast_reports = self.get_contrast_reports(pairs)
+        target = self.get_color_contrast_target("Normal")
+        for file, contrast_report in zip(global_colors, contrast_reports):
+            if contrast_report is None:
+                results += "WARNING for " + file["html_file"] + ": the "
+                results += "global colors cannot be tested for contrast.\n"
                 continue
             # Test for contrast
-            contrast_report = colors.get_color_contrast_report(color, bg_color)
             results += "Results for " + file["html_file"] + ": "
-
-            target = self.get_color_contrast_target("Normal")
             results += self.process_contrast_report(contrast_report, target)
 
         return results
 
+    def get_contrast_reports(self, pairs):
+        """returns a contrast report for each (color, background stack)
+
+        Transparent colors are blended (all pairs at once) into what they
+        look like on the page, and a gradient is as good as its worst
+        stop. A pair with a value that isn't a color or a gradient (an
+        image) gets None.
+        """
+        min_contrasts = gradients.get_min_contrasts(pairs)
+        testable = [ratio for ratio in min_contrasts if ratio is not None]
+        reports = iter(colors.get_contrast_reports_by_ratio(testable))
+        return [
+            None if ratio is None else next(reports)
+            for ratio in min_contrasts
+        ]
+
+    def get_contrast_audit(self):
+        """returns a contrast row for every selector that sets a color
+
+        Every color_ruleset (@-rules included) of every page is cascaded,
+        so each selector gets the color & background that win on that
+        page. Unset colors are the page's global colors (or black text on
+        white), and a background is laid over the page's. Pages styled
+        alike are audited once, and every pair is checked in one batch.
+        Rows are dicts of html_file, selector, color, bg-color, contrast
+        (None if it can't be tested) and the contrast report.
+        """
+        all_styles = self.get_all_styles_in_order()
+        global_cascades = self.get_page_cascades(
+            all_styles, cascade.get_global_colors_cascade
+        )
+        color_cascades = self.get_page_cascades(
+            all_styles, cascade.get_color_rulesets_cascade
+        )
+        # pages that apply the same stylesheets share their cascades
+        audits = {}
+        page_audits = []
+        entries = []
+        pairs = []
+        for file, page_cascade in color_cascades.items():
+            global_cascade = global_cascades.get(file)
+            key = (page_cascade, global_cascade)
+            if key not in audits:
+                start = len(entries)
+                for entry, pair in self.get_audit_entries(
+                    page_cascade, global_cascade
+                ):
+                    entries.append(entry)
+                    pairs.append(pair)
+                audits[key] = start, len(entries)
+            page_audits.append((file, audits[key]))
+        min_contrasts = gradients.get_min_contrasts(pairs)
+        testable = [ratio for ratio in min_contrasts if ratio is not None]
+        reports = iter(colors.get_contrast_reports_by_ratio(testable))
+        for entry, ratio in zip(entries, min_contrasts):
+            entry["contrast"] = ratio
+            entry["report"] = None if ratio is None else next(reports)
+        rows = []
+        for file, (start, stop) in page_audits:
+            for entry in entries[start:stop]:
+                row = {"html_file": file}
+                row.update(entry)
+                rows.append(row)
+        return rows
+
+    def get_audit_entries(self, color_cascade, global_cascade=None):
+        """yields (entry, (color, background stack)) per styled selector"""
+        global_colors = {}
+        if global_cascade:
+            for prop in ("color", "bg-color"):
+                value = global_cascade.get("global", prop)
+                if value:
+                    global_colors[prop] = value.value
+        global_stack = []
+        if "bg-color" in global_colors:
+            global_stack.append(global_colors["bg-color"])
+        for selector, values in color_cascade.get_elements_styled().items():
+            color = values.get("color")
+            color = color.value if color else global_colors.get("color")
+            stack = list(global_stack)
+            bg_color = values.get("bg-color")
+            if bg_color:
+                stack.append(bg_color.value)
+            entry = {
+                "selector": selector,
+                "color": color,
+                "bg-color": stack[-1] if stack else None,
+            }
+            yield entry, (color or "#000000", stack)
+
     def get_color_contrast_target(self, size):
         gen_style_goals = self.report_details["general_styles_goals"]
         color_goals = gen_style_goals["Color Settings"]
@@ -618,31 +722,6 @@ class CSSReport:
 
         return results
 
-    def get_color_hex(self, color):
-        color_hex = ""
-        if "#" in color:
-            color_hex = color
-        elif keywords.is_a_keyword(color):
-            color_hex = keywords.get_hex_by_keyword(color)
-        elif "rgb" in color:
-            color_hex = colors.rgb_to_hex(color)
-        elif "hsl(" in color:
-            hsl = colors.get_hsl_from_string(color)
-            rgb = colors.hsl_to_rgb(hsl)
-            color_hex = colors.rgb_to_hex(rgb)
-        elif "hsla(" in color:
-            hsla = colors.get_hsl_from_string(color)
-            a = hsla[-1]
-            if len(hsla) == 4 and a < 1:
-                results = "Warning: you are using HSLA with "
-                results += "transparency applied. We cannot "
-                results += "test contrast with transparency applied.\n"
-                return results
-            elif len(hsla) == 4 and a == 1:
-                rgb = colors.hsl_to_rgb(color[:-1])
-                color_hex = colors.rgb_to_hex(rgb)
-        return color_hex
-
     def get_all_styles_in_order(self):
         """returns each stylesheet object in order of appearance"""
         # whether that's a styletag or external stylesheet
@@ -676,231 +755,160 @@ class CSSReport:
         return None
 
     def get_final_header_colors(self, all_styles, global_colors={}):
-        """get header colors from each stylesheet and tag"""
-        styles_checked = self.get_styles_checked(all_styles)
-        header_color_data = {}
-        # loop through all styles that have been used
-        # if colors were set on headers, add the details to
-        # header_color_data's stylesheet
-        for styles in styles_checked.values():
-            header_colors_set = CSSinator.get_header_color_details(
-                styles.rulesets
-            )
-
-            if header_colors_set:
-                header_color_data[styles.href] = header_colors_set
+        """get each page's header colors from its stylesheets and tags"""
+        page_cascades = self.get_page_cascades(
+            all_styles, cascade.get_header_colors_cascade
+        )
+        page_global_colors = {}
+        for colors_set in global_colors:
+            page_global_colors[colors_set.get("html_file")] = colors_set
 
-        # We have all header styles
         # Identify all unique headings applied for each HTML document
         applied_styles = []
         for page in self.html_files:
             filename = page.split("\\")[-1]
-            # intialize applied_styles for each page
-            applied = {
-                "html_file": filename,
-                "css_file": "",
-                "applied": False,
-                "selector": "",
-                "specificity": "",
-                "bg-color": "",
-                "color": "",
-                "global-bg-color": "",
-                "global-color": "",
-                "context-bg-color": "",
-                "context-color": "",
-            }
-            for styles in all_styles:
-                if filename in styles[0]:
-                    href = styles[1].href
-
-                    # check to see if the stylesheet has header colors
-                    # applied
-                    if href in header_color_data.keys():
-                        # get all the selectors for that stylesheet
-                        selectors = header_color_data[href]
-
-                        if ".html" in href:
-                            applied["css_file"] = "styletag"
-                        else:
-                            applied["css_file"] = href
-
-                        # get global bg color and color
-                        global_bg_color = ""
-                        global_color = ""
-                        for file in global_colors:
-                            if file.get("html_file") == filename:
-                                global_bg_color = file.get("bg-color")
-                                global_color = file.get("color")
-
-                        for selector in selectors:
-                            details = selector
-                            data = applied.copy()
-                            data = self.set_header_color_details(
-                                data, details, global_bg_color, global_color
-                            )
-                            applied_styles.append(data)
-                    elif styles[0] in styles[1].href:
-                        # We're in a styletag: see if we have header color data
-                        if header_color_data.get(href):
-                            selectors = header_color_data[href]
-                            if ".html" in href:
-                                applied["css_file"] = "styletag"
-                            else:
-                                applied["css_file"] = href
-
-                            # get global bg color and color
-                            global_bg_color = ""
-                            global_color = ""
-                            for file in global_colors:
-                                if file.get("html_file") == filename:
-                                    global_bg_color = file.get("bg-color")
-                                    global_color = file.get("color")
-
-                            for selector in selectors:
-                                details = selector
-                                data = applied.copy()
-                                data = self.set_header_color_details(
-                                    data,
-                                    details,
-                                    global_bg_color,
-                                    global_color,
-                                )
-                                applied_styles.append(data)
+            page_cascade = page_cascades.get(filename)
+            if page_cascade is None:
+                continue
+            global_colors_set = page_global_colors.get(filename, {})
+            global_bg_color = global_colors_set.get("bg-color", "")
+            global_color = global_colors_set.get("color", "")
+            styled = page_cascade.get_elements_styled()
+            for values in styled.values():
+                # intialize applied_styles for each heading selector
+                applied = {
+                    "html_file": filename,
+                    "css_file": "",
+                    "applied": False,
+                    "selector": "",
+                    "specificity": "",
+                    "bg-color": "",
+                    "color": "",
+                    "global-bg-color": "",
+                    "global-color": "",
+                    "page-bg-color": "",
+                    "context-bg-color": "",
+                    "context-color": "",
+                }
+                applied = self.set_header_color_details(
+                    applied, values, global_bg_color, global_color
+                )
+                applied_styles.append(applied)
 
         return applied_styles
 
     def get_final_global_colors(self, all_styles):
-        """get global colors from each stylesheet and each style tag"""
-        # track which stylesheets have already been checked,
-        # so there are no repetitions
-        styles_checked = self.get_styles_checked(all_styles)
-
-        # get global styles from only the styles that are checked
-        # so no duplicates
-        global_color_data = {}
-        for styles in styles_checked.values():
-            global_colors_set = CSSinator.get_global_color_details(
-                styles.rulesets
-            )
-            if global_colors_set:
-                # we have global colors set - let's do something:
-                global_color_data[styles.href] = global_colors_set
+        """get global colors from each page's stylesheets and style tags"""
+        page_cascades = self.get_page_cascades(
+            all_styles, cascade.get_global_colors_cascade
+        )
+        # a page's own style tag counts as applying them (set or not)
+        pages_with_styletags = set()
+        for file, styles in all_styles:
+            if file == styles.href:
+                pages_with_styletags.add(file)
 
         # Process to determine whether and which files have global
         applied_styles = []
         for page in self.html_files:
             filename = page.split("\\")[-1]
-            # initialize applied_styles for each page
+            page_cascade = page_cascades.get(filename)
+            if page_cascade is None:
+                continue
+            if (
+                not page_cascade.sources
+                and filename not in pages_with_styletags
+            ):
+                continue
             applied = {
                 "html_file": filename,
                 "css_file": "",
-                "applied": False,
+                "applied": True,
                 "selector": "",
                 "specificity": "",
                 "bg-color": "",
                 "color": "",
             }
-            for styles in all_styles:
-                if filename in styles[0]:
-                    href = styles[1].href
-                    if href in global_color_data.keys():
-                        details = global_color_data[href]
-                        if ".html" in href:
-                            applied["css_file"] = "styletag"
-                        else:
-                            applied["css_file"] = href
-                        applied = self.adjust_applied(applied, details)
-                    elif styles[0] == styles[1].href:
-                        details = global_color_data.get(href)
-                        applied = self.adjust_applied(applied, details)
-            if applied["applied"]:
-                applied_styles.append(applied)
+            if page_cascade.sources:
+                applied["css_file"] = self.get_css_file_label(
+                    page_cascade.sources[-1]
+                )
+            bg_color = page_cascade.get("global", "bg-color")
+            color = page_cascade.get("global", "color")
+            # the selector reported is the one that set the color
+            for value in (bg_color, color):
+                if value:
+                    applied["selector"] = value.selector
+                    applied["specificity"] = value.specificity
+            if bg_color:
+                applied["bg-color"] = bg_color.value
+            if color:
+                applied["color"] = color.value
+            applied_styles.append(applied)
 
         return applied_styles
 
-    def adjust_applied(self, old_styles, new_styles):
-        """returns old_styles adjusted according to new styles"""
-        old_styles["applied"] = True
-        # but only if there are new styles
-        if new_styles:
-            for style in new_styles:
-                new_selector = style["selector"]
-                old_selector = old_styles["selector"]
-                if old_selector:
-                    # we need to adjust all that applies
-                    # if selectors are the same OR
-                    # old specificity is greater than new, we keep
-                    # all old styles unless not set
-
-                    new_specificity = CSSinator.get_specificity(new_selector)
-                    if new_specificity >= old_styles["specificity"]:
-                        # new wins out for everything present
-                        old_styles["selector"] = style["selector"]
-                        old_styles["specificity"] = new_specificity
-                        if style.get("background-color"):
-                            old_styles["bg-color"] = style["background-color"]
-                        elif style.get("background"):
-                            old_styles["bg-color"] = style["background"]
-                        if style.get("color"):
-                            old_styles["color"] = style["color"]
-                    else:
-                        # old specificity is greater, so only apply anything not set
-                        if not old_styles["bg-color"]:
-                            if style.get("background-color"):
-                                old_styles["bg-color"] = style[
-                                    "background-color"
-                                ]
-                            elif style.get("background"):
-                                old_styles["bg-color"] = style["background"]
-                        if not old_styles["color"] and style.get("color"):
-                            old_styles["color"] = style["color"]
-            else:
-                # this is the first time, get all styles and apply
-                old_selector = style["selector"]
-                old_styles["selector"] = style["selector"]
-                old_styles["specificity"] = CSSinator.get_specificity(
-                    old_selector
-                )
-                if style.get("background-color"):
-                    old_styles["bg-color"] = style["background-color"]
-                elif style.get("background"):
-                    old_styles["bg-color"] = style["background"]
-                if style.get("color"):
-                    old_styles["color"] = style["color"]
-        return old_styles
-
-    def set_header_color_details(self, applied, details, global_bg, global_c):
-        """sets color details to applied and adds global colors if not set"""
-        applied["applied"] = True
+    def get_page_cascades(self, all_styles, new_cascade):
+        """returns a Cascade (made by new_cascade) for each HTML file
 
-        applied["selector"] = details["selector"]
-        applied["specificity"] = CSSinator.get_specificity(details["selector"])
-        if details.get("background-color"):
-            applied["bg-color"] = details["background-color"]
-        elif details.get("background"):
-            applied["bg-color"] = details["background"]
+        all_styles are (html file, stylesheet) in the order each page
+        applies them. Every stylesheet is only indexed once (and kept for
+        the next call), however many pages use it, and pages that apply
+        the same stylesheets in the same order share one (read-only)
+        Cascade.
+        """
+        sheet_cascades = self.sheet_cascades.setdefault(new_cascade, {})
+        styles_by_file = {}
+        for file, styles in all_styles:
+            styles_by_file.setdefault(file, []).append(styles)
+        cascades_by_styles = {}
+        page_cascades = {}
+        for file, file_styles in styles_by_file.items():
+            key = tuple(file_styles)
+            page_cascade = cascades_by_styles.get(key)
+            if page_cascade is None:
+                page_cascade = cascades_by_styles[key] = new_cascade()
+                for styles in file_styles:
+                    sheet_cascade = sheet_cascades.get(styles)
+                    if sheet_cascade is None:
+                        sheet_cascade = new_cascade()
+                        sheet_cascade.add_stylesheet(styles)
+                        sheet_cascades[styles] = sheet_cascade
+                    page_cascade.merge(sheet_cascade)
+            page_cascades[file] = page_cascade
+        return page_cascades
+
+    def get_css_file_label(self, href):
+        """style tags are named after their HTML file"""
+        if ".html" in href:
+            return "styletag"
+        return href
+
+    def set_header_color_details(self, applied, values, global_bg, global_c):
+        """sets cascaded colors to applied and adds global colors if not set
+
+        The page's background is always kept (as page-bg-color): it shows
+        through a heading background that isn't opaque.
+        """
+        applied["applied"] = True
+        applied["page-bg-color"] = global_bg
+        bg_color = values.get("bg-color")
+        color = values.get("color")
+        winner = color or bg_color
+        applied["css_file"] = self.get_css_file_label(winner.href)
+        applied["selector"] = winner.selector
+        applied["specificity"] = winner.specificity
+        if bg_color:
+            applied["bg-color"] = bg_color.value
         else:
             # background color was never set
             applied["global-bg-color"] = global_bg
-        if details.get("color"):
-            applied["color"] = details["color"]
+        if color:
+            applied["color"] = color.value
         else:
             applied["global-color"] = global_c
         return applied
 
-    def get_styles_checked(self, all_styles):
-        styles_checked = {}
-        for page, styles in all_styles:
-            stylename = None
-            if ".html" in styles.href:
-                # it's a styletag
-                stylename = page + " - styletag"
-            else:
-                stylename = styles.href
-            if stylename not in styles_checked.keys():
-                styles_checked[stylename] = styles
-        return styles_checked
-
     def set_color_data_defaults(self):
         default_colors = {"color": "#000000", "background": "#ffffff"}
         general_data = {"specificity": 1, "colors": {}, "contrast": ""}
@@ -1046,39 +1054,29 @@ class CSSReport:
         return number
 
     def set_repeat_selectors(self):
-        all_selectors = []
         # get the names of all linked stylesheets
         linked_stylesheets = self.get_linked_stylesheets()
         filenames = self.get_filenames_from_paths(linked_stylesheets)
-        implemented_selectors = self.get_implemented_selectors(
-            all_selectors, filenames
-        )
-        # sort then get repeated selectors (if any)
-        all_selectors.sort()
-        self.get_repeated_selectors(all_selectors, implemented_selectors)
+        # index every selector of the project once, then get repeats
+        self.selector_index = self.get_selector_index(filenames)
+        self.get_repeated_selectors(self.selector_index)
 
-    def get_repeated_selectors(self, all_selectors, implemented_selectors):
-        for selector in all_selectors:
-            count = all_selectors.count(selector)
-            if count > 1:
-                # get the stylesheets that "own" the selector
-                for page in implemented_selectors.keys():
-                    if selector in implemented_selectors[page]:
-                        pages = self.repeat_selectors.get(selector)
-                        if not pages:
-                            self.repeat_selectors[selector] = [
-                                page,
-                            ]
-                        elif page not in pages:
-                            self.repeat_selectors[selector].append(page)
-                        else:
-                            # At this point, only append if we have not
-                            # yet matched the number of pages to the count
-                            if len(self.repeat_selectors[selector]) < count:
-                                self.repeat_selectors[selector].append(page)
-
-                # sort the pages
-                self.repeat_selectors[selector].sort()
+    def get_selector_index(self, filenames):
+        """indexes the selectors of linked stylesheets and style tags"""
+        selector_index = CSSinator.SelectorIndex()
+        for stylesheet_object in self.stylesheet_objects:
+            if stylesheet_object.href in filenames:
+                selector_index.add_stylesheet(stylesheet_object)
+        for stylesheet in self.style_tag_contents:
+            selector_index.add_stylesheet(stylesheet)
+        return selector_index
+
+    def get_repeated_selectors(self, selector_index):
+        """records the stylesheets (one per occurrence) of each repeat"""
+        for selector, occurrences in selector_index.get_repeats().items():
+            self.repeat_selectors[selector] = sorted(
+                href for href, line in occurrences
+            )
 
     def get_implemented_selectors(self, all_selectors, filenames):
         implemented_selectors = (
@@ -1112,16 +1110,15 @@ class CSSReport:
         for stylesheet_object in self.stylesheet_objects:
             if stylesheet_object.href in filenames:
                 for selector in stylesheet_object.selectors:
-                    if (selector, stylesheet_object.href) not in all_selectors:
-                        all_selectors.append(selector)
-                        try:
-                            implemented_selectors[
-                                stylesheet_object.href
-                            ].append(selector)
-                        except KeyError:
-                            implemented_selectors[stylesheet_object.href] = [
-                                selector,
-                            ]
+                    all_selectors.append(selector)
+                    try:
+                        implemented_selectors[stylesheet_object.href].append(
+                            selector
+                        )
+                    except KeyError:
+                        implemented_selectors[stylesheet_object.href] = [
+                            selector,
+                        ]
         return implemented_selectors
 
     def get_filenames_from_paths(self, linked_stylesheets):
@@ -1144,7 +1141,9 @@ class CSSReport:
         declaration_blocks = {}
         for sheet in self.style_tag_contents:
             for ruleset in sheet.rulesets:
-                declaration_block = "{" + ruleset.declaration_block.text
+                declaration_block = sys.intern(
+                    "{" + ruleset.declaration_block.text
+                )
                 source = sheet.href
                 try:
                     if declaration_blocks[declaration_block]:
@@ -1162,7 +1161,9 @@ class CSSReport:
                 # it's possible someone places html, so only process
                 # if the declaration block is NOT a None type
                 if ruleset.declaration_block:
-                    declaration_block = "{" + ruleset.declaration_block.text
+                    declaration_block = sys.intern(
+                        "{" + ruleset.declaration_block.text
+                    )
                 else:
                     continue
                 source = sheet.href
@@ -1254,13 +1255,8 @@ class CSSReport:
         return results
 
     def get_children(self, path, parent):
-        code = html.get_html(path)
-        try:
-            head = code.find(parent)
-            children = head.findChildren()
-            return children
-        except Exception:
-            return None
+        document = self.document_cache.get_document(path)
+        return document.get_children(parent)
 
     def get_css_elements(self, nodes):
         styles = []
@@ -1288,7 +1284,7 @@ class CSSReport:
         html_files = clerk.get_all_files_of_type(self.__dir_path, "html")
         # get the contents of any style tag in each html doc
         for file in html_files:
-            style_tags = html.get_elements("style", file)
+            style_tags = html.get_elements("style", file, self.document_cache)
             for tag in style_tags:
                 filename = os.path.basename(file)
                 css_object = stylesheet(filename, tag.string)
@@ -1329,21 +1325,23 @@ class CSSReport:
     def validate_css(self):
         # Get CSS validation on CSS files
         errors = 0
-        for file_path in self.css_files:
-            # Run css code through validator
-            # Get code
-            code = clerk.file_to_string(file_path)
-            errors_in_file = val.validate_css(code)
+        # Run all css code (files, then style tags) through the validator
+        # at once - results come back in the same order
+        codes = [clerk.file_to_string(path) for path in self.css_files]
+        codes += [tag.text for tag in self.style_tag_contents]
+        results = val.validate_css_many(codes)
+        file_results = results[: len(self.css_files)]
+        tag_results = results[len(self.css_files) :]
+        for file_path, errors_in_file in zip(self.css_files, file_results):
             # Add to number of errors
             errors += len(errors_in_file)
             page_name = clerk.get_file_name(file_path)
             if errors > 0:
                 self.process_errors(page_name, errors_in_file)
         # Get CSS validation from style tag
-        for tag in self.style_tag_contents:
-            tag_errors = val.validate_css(tag.text)
+        for tag, tag_errors in zip(self.style_tag_contents, tag_results):
             # No need to process an error if we have none
-            if "Congratulations!" in tag_errors[0].text:
+            if val.is_css_valid(tag_errors):
                 continue
             errors += len(tag_errors)
             if len(tag_errors) > 0:
@@ -1425,7 +1423,10 @@ class CSSReport:
 
     def publish_results(self):
         # Get report
-        report_content = html.get_html(report_path)
+        if self.report_document:
+            report_content = self.report_document.soup
+        else:
+            report_content = html.get_html(self.report_path)
         # TODO Process all the CSS info into our CSS tables
 
         # Generate Validator Reports
@@ -1455,6 +1456,9 @@ class CSSReport:
         else:
             specific_results = ""
             for page, errors in self.css_errors.items():
+                if not isinstance(errors, list):
+                    # "No errors"
+                    continue
                 # Process general results
                 num_errors = len(errors)
                 cumulative_errors += num_errors
@@ -1556,8 +1560,10 @@ class CSSReport:
         # Any project specific goals?
 
         # Save new HTML as report/report.html
-        with open(report_path, "w") as f:
-            f.write(str(report_content.contents[0]))
+        # (a Report saves its shared report document once, at the end)
+        if not self.report_document:
+            with open(self.report_path, "w") as f:
+                f.write(str(report_content.contents[0]))
 
     def has_css_errors(self, css_errors):
         for page, item in css_errors.items():
@@ -2,10 +2,12 @@
 # by Chris Winikka
 # a set of tools to analyze CSS
 
+import functools
 import re
+import sys
 
 from . import color_keywords as keyword
-from . import colortools
+from . import colortools, css_parser, gradients
 
 # Regex Patterns
 regex_patterns = {
@@ -23,6 +25,31 @@ regex_patterns = {
     "grouped_selector": r"\w+\s*,\s*\w+"
 }
 
+# get_specificity_tuple's scanner: each match is one simple selector
+# (or something that doesn't count, like a combinator or *)
+specificity_re = re.compile(
+    r"""
+    (?P<id>\#[\w-]+)
+    |(?P<type>::[\w-]+
+        |:(?:before|after|first-line|first-letter)(?![\w-])
+        |[a-zA-Z][\w-]*)
+    |(?P<function>:[\w-]+\()
+    |(?P<class>\.[\w-]+|:[\w-]+|\[[^\]]*\]?)
+    |(?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# pseudo-classes as specific as their most specific argument
+selector_list_pseudo_classes = (
+    "not",
+    "is",
+    "has",
+    "matches",
+    "-webkit-any",
+    "-moz-any",
+)
+
 nested_at_rules = (
     "@supports",
     "@document",
@@ -44,107 +71,79 @@ class Stylesheet:
         self.href = href
         self.text = text
         self.original_text = text
-        self.nested_at_rules = []
+        self.nested_at_rules = {}
+        self.at_rules = []
         self.rulesets = []
         self.comments = []
         self.color_rulesets = []
-        self.minify()
-        self.extract_comments()
-        self.extract_nested_at_rules()
-        self.extract_rulesets_from_at_rules()
-        self.extract_rulesets()
+        self.selector_index = None
+        self.parse()
         self.selectors = []
         self.get_selectors()
 
-    def minify(self):
-        """remove all whitespace, line returns, and tabs from text"""
-        self.text = minify_code(self.text)
-
-    def extract_comments(self):
-        # split all CSS text at opening comment
-        text_comment_split = self.text.split("/*")
-        comments = []
-        code_without_comments = ""
-        # loop through the list of code
-        # in each iteration extract the comment
-
-        for i in text_comment_split:
-            # append comment to comments
-            if "*/" in i:
-                comment = i.split("*/")
-                comments.append("/*" + comment[0] + "*/")
-                # append code to code_without_comments
-                code_without_comments += comment[1]
-            else:
-                # no comments, just get code
-                code_without_comments += i
-        # add comments
-        self.comments = comments
-        # replace code (comments extracted)
-        self.text = code_without_comments
-
-    def extract_nested_at_rules(self):
-        # Search through nested at rules
-        at_rules = []
-        non_at_rules_css = []
-
-        # split at the double }} (end of a nested at rule)
-        css_split = self.text.split("}}", 3)
-        css_split = restore_braces(css_split)
-
-        if len(css_split) == 1:
+    def parse(self):
+        """tokenizes the CSS once, then builds rulesets, @rules & comments
+
+        text is left as the minified code of the top-level rulesets (no
+        comments and no @rules). The parse tree is dropped once they are
+        built: rulesets keep their line numbers, nothing else needs it.
+        """
+        tree = css_parser.parse(self.original_text)
+        self.comments = [
+            minify_code(comment.text) for comment in tree.comments
+        ]
+        code = []
+        for node in tree.children:
+            if isinstance(node, css_parser.AtRuleNode):
+                self.extract_at_rule(tree, node)
+                continue
+            self.add_rulesets(tree, node, self.rulesets, code=code)
+        self.text = "".join(code)
+
+    def extract_at_rule(self, tree, node):
+        """adds an @rule (and any @rules nested in it) to the stylesheet"""
+        if not node.has_block:
+            self.at_rules.append(minify_code(node.prelude) + ";")
             return
-        for code in css_split:
-            # continue if empty
-            if not code.strip():
+        rulesets = self.get_nested_rulesets(tree, node)
+        for child in node.children:
+            if isinstance(child, css_parser.AtRuleNode):
+                self.extract_at_rule(tree, child)
                 continue
-            for rule in nested_at_rules:
-                # check each
-                if rule in code:
-                    # we found a nested @rule
-                    # split code from @rule
-                    split_code = code.split(rule)
-                    if len(split_code) == 2:
-                        if split_code[0]:
-                            # an @rule was NOT at the beginning or else,
-                            # there would be an empty string
-                            non_at_rules_css.append(split_code[0])
-                            at_rules.append(rule + split_code[1])
-                        else:
-                            at_rules.append(rule + split_code[1])
-                    else:
-                        # it's only an @rule
-                        print("skipping non-nested @rule.")
-
-        self.text = "".join(non_at_rules_css)
-        self.nested_at_rules = at_rules
-
-    def extract_rulesets(self):
-        # split rulesets by closing of rulesets: }
-        ruleset_list = self.text.split("}")
-        for ruleset in ruleset_list:
-            if ruleset:
-                ruleset = Ruleset(ruleset + "}")
-                self.rulesets.append(ruleset)
-                self.get_color_ruleset(ruleset)
-
-    def extract_rulesets_from_at_rules(self):
-        nested_at_rule_dict = {}
-        nested_rules = self.nested_at_rules
-        for nested_rule in nested_rules:
-            nested_rule_split = nested_rule.split("{", 1)
-            key = nested_rule_split.pop(0)
-            rule_split = nested_rule_split[0].split("}")
-            rulesets = []
-            for rule in rule_split:
-                if len(rule) > 1:
-                    if rule[-1] != "}":
-                        rule = rule + "}"
-                    ruleset = Ruleset(rule)
-                    rulesets.append(ruleset)
-                    self.get_color_ruleset(ruleset)
-            nested_at_rule_dict[key] = rulesets
-        self.nested_at_rules = nested_at_rule_dict
+            self.add_rulesets(tree, child, rulesets)
+
+    def get_nested_rulesets(self, tree, node):
+        """returns the list of rulesets nested in an @rule's block"""
+        # keys keep the space before the opening brace (@media screen )
+        key = minify_code(
+            css_parser.strip_comments(tree.text[node.start : node.block_start])
+        )
+        return self.nested_at_rules.setdefault(key, [])
+
+    def add_rulesets(self, tree, node, rulesets, selector=None, code=None):
+        """adds a ruleset and the rules nested in it to rulesets
+
+        Nested rules (CSS nesting) become rulesets of their own, with the
+        selector they end up selecting (see get_nested_selector). An
+        @rule nested in a rule (a { @media print { ... } }) styles the
+        rule's selector inside that @rule.
+        """
+        source = minify_code(get_source(tree, node, selector))
+        ruleset = Ruleset(source)
+        ruleset.line = tree.get_line(node.start)
+        rulesets.append(ruleset)
+        self.get_color_ruleset(ruleset)
+        if code is not None:
+            code.append(source)
+        if selector is None:
+            selector = node.prelude
+        for child in node.children:
+            if not isinstance(child, css_parser.AtRuleNode):
+                child_selector = get_nested_selector(selector, child.prelude)
+                self.add_rulesets(tree, child, rulesets, child_selector, code)
+            elif child.has_block:
+                nested = self.get_nested_rulesets(tree, child)
+                self.add_rulesets(tree, child, nested, selector)
 
     def get_color_ruleset(self, ruleset):
         color_rulesets = []
@@ -174,6 +173,48 @@ class Stylesheet:
     def sort_selectors(self):
         self.selectors.sort()
 
+    def get_selector_index(self):
+        """returns the (cached) SelectorIndex of this stylesheet"""
+        if self.selector_index is None:
+            self.selector_index = SelectorIndex([self])
+        return self.selector_index
+
+
+class SelectorIndex:
+    """where each selector occurs in a set of stylesheets
+
+    Built in one pass over the (top-level) rulesets: selector -> list of
+    (href, line) occurrences, in stylesheet order. Counting or finding
+    repeats is then a lookup instead of a list.count per selector.
+    """
+
+    def __init__(self, sheets=()):
+        self.occurrences = {}
+        for sheet in sheets:
+            self.add_stylesheet(sheet)
+
+    def add_stylesheet(self, sheet):
+        for ruleset in sheet.rulesets:
+            self.occurrences.setdefault(ruleset.selector, []).append(
+                (sheet.href, ruleset.line)
+            )
+
+    def count(self, selector):
+        return len(self.occurrences.get(selector, ()))
+
+    def get_repeats(self):
+        """returns {selector: occurrences} of repeated selectors (sorted)"""
+        return {
+            selector: occurrences
+            for selector, occurrences in sorted(self.occurrences.items())
+            if len(occurrences) > 1
+        }
+
+    def has_repeats(self):
+        return any(
+            len(occurrences) > 1 for occurrences in self.occurrences.values()
+        )
+
 
 class NestedAtRule:
     def __init__(self, text):
@@ -200,20 +241,32 @@ class NestedAtRule:
 
 
 class Ruleset:
+    # stylesheets hold thousands of these: slots keep them small
+    __slots__ = ("__text", "selector", "declaration_block", "is_valid", "line")
+
     def __init__(self, text):
         self.__text = text
         self.selector = ""
         self.declaration_block = None
         self.is_valid = True
+        # where the ruleset starts in its stylesheet (if parsed from one)
+        self.line = None
         self.validate()
         self.initialize()
 
     def initialize(self):
         if self.is_valid:
-            contents = self.__text.split("{")
-            self.selector = contents[0].replace("\n", "").strip()
-            block = contents[1].replace("\n", "")
-            self.declaration_block = DeclarationBlock(block)
+            text = self.__text
+            if "\n" in text:
+                text = text.replace("\n", "")
+            start = text.index("{") + 1
+            end = text.find("{", start)
+            # interned: selectors repeat across every stylesheet of a class
+            self.selector = sys.intern(text[: start - 1].strip())
+            # the block's text is the ruleset's, sliced when asked for
+            self.declaration_block = DeclarationBlock(
+                text, start, end if end != -1 else None
+            )
 
     def validate(self):
         try:
@@ -230,16 +283,38 @@ class Ruleset:
 
 
 class DeclarationBlock:
-    def __init__(self, text):
-        self.text = text
+    """the declarations of a block; text is the block's code
+
+    The code may be given as a slice (start to end) of a longer text (a
+    ruleset's), which is only copied out when text is read.
+    """
+
+    __slots__ = ("__source", "__start", "__end", "declarations")
+
+    def __init__(self, text, start=0, end=None):
+        self.__source = text
+        self.__start = start
+        self.__end = end
         self.declarations = []
         self.__set_declarations()
 
+    @property
+    def text(self):
+        if self.__start == 0 and self.__end is None:
+            return self.__source
+        return self.__source[self.__start : self.__end]
+
+    @text.setter
+    def text(self, text):
+        self.__source = text
+        self.__start = 0
+        self.__end = None
+
     def __set_declarations(self):
         declarations = self.text
 
         # remove selectors and braces if present
-        if "{" in self.text:
+        if "{" in declarations:
             declarations = declarations.split("{")
             declarations = declarations[1]
         if "}" in declarations:
@@ -267,28 +342,45 @@ class DeclarationBlock:
 
 
 class Declaration:
+    """a property: value pair
+
+    The code of a valid declaration isn't kept (text rebuilds it from the
+    property and value); an invalid one keeps its code as it was.
+    """
+
+    __slots__ = ("__text", "property", "value", "is_valid")
+
     def __init__(self, text):
         self.__text = text
         self.property = ""
         self.value = ""
         self.is_valid = False
         self.set_declaration()
+        if self.is_valid:
+            self.__text = None
+
+    @property
+    def text(self):
+        if self.__text is None:
+            return self.get_declaration()
+        return self.__text
 
     def set_declaration(self):
         """validate while trying to set declaration"""
+        text = self.text
         # assume it's valid until proven otherwise
         self.is_valid = True
         # Make sure there's a colon for validity and separating
-        if ":" not in self.__text:
+        if ":" not in text:
             self.is_valid = False
         else:
-            elements = self.__text.split(":")
+            elements = text.split(":")
             # make sure there are 2 values after the split
             if len(elements) > 2:
                 self.is_valid = False
             else:
-                self.property = elements[0].strip()
-                self.value = elements[1].strip()
+                self.property = sys.intern(elements[0].strip())
+                self.value = sys.intern(elements[1].strip())
                 self.validate_declaration()
 
     def validate_declaration(self):
@@ -313,29 +405,6 @@ class Declaration:
         return self.property + ": " + self.value
 
 
-def get_nested_at_rule(code, rule):
-    at_rule = []
-    at_split = code.split(rule)
-    if len(at_split) > 1:
-        if at_split[0] == "":
-            # rule was at the beginning
-            at_rule.append(rule + " " + at_split[1])
-        else:
-            at_rule.append(rule + " " + at_split[0])
-    return at_rule
-
-
-def restore_braces(split):
-    result = []
-    if len(split) <= 1:
-        return split
-    for item in split:
-        if len(item) > 0:
-            item = item + "}}"
-            result.append(item)
-    return result
-
-
 def split_by_partition(text, part):
     # base case
     if text.count(part) == 0:
@@ -350,6 +419,43 @@ def split_by_partition(text, part):
         ] + split_by_partition(text_tuple[2], part)
 
 
+def get_source(tree, node, selector=None) -> str:
+    """returns the code of a ruleset node without comments
+
+    Rulesets with nested rules (CSS nesting) are rebuilt from their own
+    declarations, so a Ruleset never sees a second pair of braces (the
+    nested rules are rulesets of their own), as are nested rules given
+    the selector they end up selecting.
+    """
+    if selector is not None or node.children:
+        if selector is None:
+            selector = node.prelude
+        declarations = "".join(d.text + ";" for d in node.declarations)
+        return selector + " {" + declarations + "}"
+    code = css_parser.strip_comments(tree.text[node.start : node.end])
+    if not code.rstrip().endswith("}"):
+        # the block was never closed
+        code += "}"
+    return code
+
+
+def get_nested_selector(parent, child):
+    """returns what a rule nested in parent selects (CSS nesting)
+
+    & stands for the parent selector; without one, the nested selector
+    selects descendants of the parent's.
+    """
+    selectors = []
+    for parent_selector in split_selector_list(parent):
+        for child_selector in split_selector_list(child):
+            if "&" in child_selector:
+                selector = child_selector.replace("&", parent_selector)
+            else:
+                selector = parent_selector + " " + child_selector
+            selectors.append(selector)
+    return ", ".join(selectors)
+
+
 def minify_code(text: str) -> str:
     """remove all new lines, tabs, and double spaces"""
     text = text.replace("\n", "")
@@ -369,17 +475,7 @@ def missing_end_semicolon(css_code: str) -> bool:
 def has_repeat_selector(styles: Stylesheet) -> bool:
     """ checks stylesheet to determine whether any selectors are repeated 
         or not. """
-    # get & sort a list of all selectors
-    selectors = styles.selectors
-
-    # loop through and get a count of each
-    for selector in selectors:
-        count = selectors.count(selector)
-        # are there more than 1 of the same kind?
-        if count > 1:
-            return True
-    # otherwise
-    return False
+    return styles.get_selector_index().has_repeats()
 
 
 def get_nested_at_rule_selectors(sheet: Stylesheet) -> list:
@@ -477,10 +573,77 @@ def get_color_rulesets(objects):
 
 
 def get_specificity(selector):
-    id_selector = get_id_score(selector)
-    class_selector = get_class_score(selector)
-    type_selector = get_type_score(selector)
-    return "{}{}{}".format(id_selector, class_selector, type_selector)
+    return "{}{}{}".format(*get_specificity_tuple(selector))
+
+
+@functools.lru_cache(maxsize=16384)
+def get_specificity_tuple(selector):
+    """returns (ids, classes, types): compare these, not the strings
+
+    One pass over the selector, a simple selector at a time. The
+    selectors in :not(), :is() and :has() count as much as the most
+    specific of them, those in :where() not at all. A group (a, b) adds
+    up, as get_specificity always has: split groups to compare them.
+    """
+    ids = classes = types = 0
+    pos = 0
+    end = len(selector)
+    while pos < end:
+        match = specificity_re.match(selector, pos)
+        kind = match.lastgroup
+        pos = match.end()
+        if kind == "id":
+            ids += 1
+        elif kind == "type":
+            types += 1
+        elif kind == "class":
+            classes += 1
+        elif kind == "function":
+            close = find_closing_parenthesis(selector, pos)
+            name = match.group(kind)[1:-1].lower()
+            if name in selector_list_pseudo_classes:
+                arguments = split_selector_list(selector[pos:close])
+                scores = [get_specificity_tuple(arg) for arg in arguments]
+                if scores:
+                    most = max(scores)
+                    ids += most[0]
+                    classes += most[1]
+                    types += most[2]
+            elif name != "where":
+                # :nth-child(2n), :lang(en)...
+                classes += 1
+            pos = close + 1
+    return (ids, classes, types)
+
+
+def find_closing_parenthesis(text, pos):
+    """returns where the parenthesis open before pos closes (or the end)"""
+    depth = 1
+    for i in range(pos, len(text)):
+        if text[i] == "(":
+            depth += 1
+        elif text[i] == ")":
+            depth -= 1
+            if not depth:
+                return i
+    return len(text)
+
+
+def split_selector_list(text):
+    """splits a selector list on its top level commas"""
+    selectors = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(text):
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == "," and not depth:
+            selectors.append(text[start:i].strip())
+            start = i + 1
+    selectors.append(text[start:].strip())
+    return [selector for selector in selectors if selector]
 
 
 def get_id_score(selector):
@@ -578,15 +741,9 @@ def get_global_color_details(rulesets):
                     background_color = declaration.value
                 elif declaration.property == "color":
                     color = declaration.value
-                    if is_gradient(color):
-                        colors = process_gradient(color)
-                        todo = input("We have colors: " + colors)
-                        print(todo)
                 elif declaration.property == "background":
+                    # gradients are checked stop by stop (see gradients)
                     background_color = declaration.value
-                    if is_gradient(background_color):
-                        bg_colors = process_gradient(background_color)
-                        print("We have bg colors: " + str(bg_colors))
 
             if background_color or color:
                 global_rulesets.append(
@@ -613,58 +770,21 @@ def is_gradient(value):
 
 def process_gradient(code: str) -> list:
     """returns list of all colors from gradient sorted light to dark"""
+    found = gradients.parse_gradients(code)
+    # vendor-prefixed gradients repeat the standard one
+    standard = [gradient for gradient in found if not gradient.prefix]
     colors = []
-    data = code.split("),")
-
-    # split the last datum in data into two
-    last_item = data[-1].strip()
-    last_split = last_item.split("\n")
-    if len(last_split) == 2:
-        data.append(last_split[1])
-
-    # remove all vendor prefixes
-    pattern = regex_patterns["vendor_prefix"]
-    for datum in data:
-        datum = datum.strip()
-        if not re.match(pattern, datum):
-            colors.append(datum)
-
-    # capture only color codes and append to colors
-    only_colors = []
-    if colors:
-        # grab only color codes (Nothing else)
-        for gradient in colors:
-            color_codes = get_colors_from_gradient(gradient)
-            if color_codes:
-                only_colors += color_codes
-    only_colors = sort_color_codes(only_colors)
-    return only_colors
+    for gradient in standard or found:
+        colors += [stop.color for stop in gradient.stops]
+    return sort_color_codes(colors)
 
 
 def sort_color_codes(codes):
     """ sorts color codes from light to dark (luminance)"""
-    # convert code to rgb then calculate luminance
     colors = []
     for c in codes:
-        # get the color type and convert to hsl
-        temp_c = c
-        color_type = colortools.get_color_type(c)
-        has_alpha = colortools.has_alpha_channel(c)
-        is_hex = colortools.is_hex(temp_c)
-        if has_alpha and not is_hex:
-            temp_c = remove_alpha(c)
-        if "hsl" not in color_type:
-            if is_hex:
-                rgb = colortools.hex_to_rgb(temp_c)
-            else:
-                rgb = temp_c
-        else:
-            rgb = colortools.hsl_to_rgb(c)
-        if "<class 'str'>" == str(type(rgb)):
-            r, g, b = colortools.extract_rgb_from_string(rgb)
-            light = colortools.luminance((int(r), int(g), int(b)))
-        else:
-            light = colortools.luminance(rgb)
+        # alpha is ignored; anything that isn't a color counts as dark
+        light = colortools.get_color_luminance(c) or 0.0
         colors.append([light, c])
     colors.sort()
     colors.reverse()
@@ -674,26 +794,11 @@ def sort_color_codes(codes):
     return sorted
 
 
-def remove_alpha(color_code):
-    """ removes the alpha channel from rgba or hsla """
-    color_code = color_code.split(',')
-    a = color_code[0].index('a')
-    color_code[0] = color_code[0][:a] + color_code[0][a+1:]
-    color_code.pop(-1)
-    color_code = ",".join(color_code)
-    color_code += ")"
-    return color_code
-
-
 def get_colors_from_gradient(gradient):
     """extract all color codes from gradient"""
     colors = []
-    # use regex to pull all possible color codes first
-    append_color_codes("hsl", gradient, colors)
-    append_color_codes("rgb", gradient, colors)
-    append_color_codes("hex", gradient, colors)
-    append_color_codes("keywords", gradient, colors)
-
+    for found in gradients.parse_gradients(gradient):
+        colors += [stop.color for stop in found.stops]
     return colors
 
 
@@ -706,14 +811,10 @@ def append_color_codes(type, code, color_list):
         colors = re.findall(colortools.hex_regex, code)
     elif type == "keywords":
         words = re.findall(r"[+a-z+A-Z]*", code)
-        colors = []
-        for i in words:
-            # regex captures non-strings, so we don't process if empty
-            if i:
-                i = i.strip().lower()
-                is_keyword = keyword.is_a_keyword(i.strip(" "))
-                if is_keyword:
-                    colors.append(i)
+        # regex captures non-strings, so we don't process if empty
+        colors = keyword.get_keywords_in(
+            word.lower() for word in words if word
+        )
     if colors:
         # strip each color code (if hex regex)
         colors = [i.strip(" ") for i in colors]
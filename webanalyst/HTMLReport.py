@@ -16,8 +16,21 @@ report_path = "report/report.html"
 
 
 class HTMLReport:
-    def __init__(self, readme_list, dir_path):
+    def __init__(
+        self,
+        readme_list,
+        dir_path,
+        document_cache=None,
+        report_path=report_path,
+        report_document=None,
+    ):
         self.__dir_path = dir_path
+        self.report_path = report_path
+        self.report_document = report_document
+        if document_cache is None:
+            document_cache = html.DocumentCache()
+        self.document_cache = document_cache
+        self.element_census = None
         self.html_level = "0"
         self.__readme_list = readme_list
         self.html_requirements_list = []
@@ -109,6 +122,7 @@ class HTMLReport:
 
         # iterate through each element and get the total number
         # then compare to required number
+        census = self.get_element_census()
         for el in required_elements:
             double_el = ""
             if "or" in el:
@@ -121,14 +135,10 @@ class HTMLReport:
                 for i in my_elements:
                     if "or" in i:
                         continue
-                    actual_number += html.get_num_elements_in_folder(
-                        i, self.__dir_path
-                    )
+                    actual_number += census.get_num_elements(i)
                 el = my_elements[0] + "` or `" + my_elements[-1]
             else:
-                actual_number = html.get_num_elements_in_folder(
-                    el, self.__dir_path
-                )
+                actual_number = census.get_num_elements(el)
 
             # get how many of that element is required
             number_required = self.report_details["required_elements"][el]
@@ -153,12 +163,11 @@ class HTMLReport:
             "HTML5_essential_elements"
         ].copy()
         # get # of html files in folder - this is our multiplier
+        census = self.get_element_census()
         for el in enumerate(html5_elements):
             element = el[1].lower()
             # how many were found
-            number_found = html.get_num_elements_in_folder(
-                element, self.__dir_path
-            )
+            number_found = census.get_num_elements(element)
             number_required = self.report_details["required_elements"][
                 "HTML5_essential_elements"
             ][element.upper()]
@@ -179,19 +188,28 @@ class HTMLReport:
         print(html5_elements)
         # check all other tags to see if they meet -
         # record whether each one meets individually
+        census = self.get_element_census()
         for i in enumerate(html5_elements.items()):
             all_elements_meet = True
             key, min_value = i[1]
-            actual_value = html.get_num_elements_in_folder(
-                key, self.__dir_path
-            )
+            actual_value = census.get_num_elements(key)
             element_meets = actual_value >= min_value
             if not element_meets:
                 all_elements_meet = False  # it just takes one not meeting
         return all_elements_meet
 
+    def get_element_census(self):
+        """counts all elements in the project once and reuses the table"""
+        if self.element_census is None:
+            self.element_census = html.ElementCensus(
+                self.__dir_path, self.document_cache
+            )
+        return self.element_census
+
     def check_element_for_required_number(self, file_path, element, min_num):
-        num_elements = html.get_num_elements_in_file(element, file_path)
+        num_elements = html.get_num_elements_in_file(
+            element, file_path, self.document_cache
+        )
         return num_elements >= min_num
 
     def get_html_requirements_list(self):
@@ -263,10 +281,10 @@ class HTMLReport:
         # create a dictionary with doc titles for keys
         # and num of errors for value
 
-        # get titles and run them through validator
-        for file_path in self.html_files:
-            # Get error objects
-            errors_in_file = val.get_markup_validity(file_path)
+        # get titles and run them through validator (several at a time,
+        # results come back in file order)
+        all_errors = val.validate_markup_many(self.html_files)
+        for file_path, errors_in_file in zip(self.html_files, all_errors):
             # Get number of errors
             num_errors = len(errors_in_file)
             page_name = clerk.get_file_name(file_path)
@@ -360,7 +378,10 @@ class HTMLReport:
 
     def publish_results(self):
         # Get report
-        report_content = html.get_html(report_path)
+        if self.report_document:
+            report_content = self.report_document.soup
+        else:
+            report_content = html.get_html(self.report_path)
 
         # HTML Overview Table
         html_overview_tr = self.get_html_overview_row()
@@ -442,8 +463,10 @@ class HTMLReport:
         report_content.find(id=tbody_id).replace_with(tbody_contents)
 
         # Save new HTML as report/report.html
-        with open(report_path, "w") as f:
-            f.write(str(report_content.contents[0]))
+        # (a Report saves its shared report document once, at the end)
+        if not self.report_document:
+            with open(self.report_path, "w") as f:
+                f.write(str(report_content.contents[0]))
 
     def get_html_overview_row(self):
         # get a string version of can_attain_level
@@ -557,8 +580,8 @@ class HTMLReport:
         # in each file get the href of any link if that
         # href matches a file in the folder
         for file in self.html_files:
-            contents = clerk.file_to_string(file)
-            link_hrefs = clerk.get_linked_css(contents)
+            document = self.document_cache.get_document(file)
+            link_hrefs = document.get_linked_css()
             filename = clerk.get_file_name(file)
             linked[filename] = link_hrefs
         self.linked_stylesheets = linked
@@ -566,8 +589,8 @@ class HTMLReport:
     def check_for_inline_styles(self):
         files_with_inline_styles = []
         for file in self.html_files:
-            markup = clerk.file_to_string(file)
-            has_inline_styles = html.uses_inline_styles(markup)
+            document = self.document_cache.get_document(file)
+            has_inline_styles = document.uses_inline_styles()
             if has_inline_styles:
                 filename = clerk.get_file_name(file)
                 files_with_inline_styles.append(filename)
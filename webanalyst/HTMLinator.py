@@ -2,6 +2,7 @@
 # by Hundredvisionsguy
 # A library to assess HTML levels and skills
 
+import collections
 import os
 import re
 
@@ -18,45 +19,190 @@ def get_html(path):
     return None
 
 
-def get_num_elements_in_file(el, path):
+# elements that bs4 can't count reliably, so we count them in the raw text
+raw_text_elements = ("doctype", "html", "head", "title", "body")
+# one pass over the text for all of them (head must not match <header>)
+raw_text_elements_re = re.compile(r"<(!doctype|html|head(?=[\s>])|title|body)")
+
+
+class HTMLDocument:
+    """an HTML file read and parsed once (raw text and one soup)"""
+
+    def __init__(self, path, text, mtime=None):
+        self.path = path
+        self.mtime = mtime
+        self.text = text
+        self.soup = BeautifulSoup(text, "html.parser")
+        self.__element_counts = None
+
+    def get_element_counts(self):
+        """returns a Counter of every tag in the document (one traversal)"""
+        if self.__element_counts is None:
+            counts = collections.Counter(
+                tag.name for tag in self.soup.find_all(True)
+            )
+            for el in raw_text_elements:
+                counts.pop(el, None)
+            for match in raw_text_elements_re.finditer(self.text.lower()):
+                counts[match.group(1).lstrip("!")] += 1
+            self.__element_counts = counts
+        return self.__element_counts
+
+    def get_elements(self, el):
+        return self.soup.find_all(el)
+
+    def get_num_elements(self, el):
+        if el.lower() in raw_text_elements:
+            return count_elements_in_text(el, self.text)
+        return len(self.soup.find_all(el.lower()))
+
+    def get_children(self, parent):
+        try:
+            element = self.soup.find(parent)
+            return element.findChildren()
+        except Exception:
+            return None
+
+    def get_linked_css(self):
+        """returns a list of linked CSS files (see clerk.get_linked_css)"""
+        filenames = []
+        linked_files = self.soup.find_all("link")
+        if len(linked_files) > 1:
+            for file in linked_files:
+                linked_file = file.get("href")
+                if not linked_file or "https://" in linked_file:
+                    continue
+                filenames.append(linked_file)
+        elif len(linked_files) == 1:
+            filenames.append(linked_files[0].get("href"))
+        else:
+            return None
+        return filenames
+
+    def uses_inline_styles(self):
+        return bool(self.soup.find(style=True))
+
+
+class DocumentCache:
+    """parses each HTML file once and serves it until the file changes
+
+    Documents are keyed by absolute path and modification time, so a
+    file edited between two reports is parsed again.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.bytes_parsed = 0
+        self.__documents = {}
+
+    def get_document(self, path):
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        mtime = stat.st_mtime_ns
+        document = self.__documents.get(key)
+        if document is not None and document.mtime == mtime:
+            self.hits += 1
+            return document
+        self.misses += 1
+        self.bytes_parsed += stat.st_size
+        with open(path, encoding="utf-8") as fp:
+            document = HTMLDocument(path, fp.read(), mtime)
+        self.__documents[key] = document
+        return document
+
+    def get_stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "documents": len(self.__documents),
+            "bytes_parsed": self.bytes_parsed,
+        }
+
+    def clear(self):
+        self.__documents = {}
+
+
+class ElementCensus:
+    """counts every element of every HTML file in a project in one walk
+
+    All element-count queries for the project are then answered from
+    the table instead of walking and parsing the folder again.
+    """
+
+    def __init__(self, dir_path, cache=None):
+        self.dir_path = dir_path
+        if cache is None:
+            cache = DocumentCache()
+        self.__cache = cache
+        self.counts_by_file = {}
+        self.totals = collections.Counter()
+        self.take_census()
+
+    def take_census(self):
+        self.counts_by_file = {}
+        self.totals = collections.Counter()
+        for subdir, dirs, files in os.walk(self.dir_path):
+            for filename in files:
+                filepath = subdir + os.sep + filename
+                if filepath.endswith(".html"):
+                    document = self.__cache.get_document(filepath)
+                    counts = document.get_element_counts()
+                    self.counts_by_file[filepath] = counts
+                    self.totals.update(counts)
+
+    def get_num_elements(self, el):
+        """returns the number of an element across the whole project"""
+        return self.totals[el.lower()]
+
+    def get_num_elements_in_file(self, el, path):
+        counts = self.counts_by_file.get(path)
+        if counts is None:
+            return get_num_elements_in_file(el, path, self.__cache)
+        return counts[el.lower()]
+
+
+def count_elements_in_text(el, contents):
+    """counts elements bs4 won't find (doctype) by searching the text"""
+    contents = contents.lower()
+    substring = el.lower()
+    if el.lower() == "doctype":
+        substring = "<!" + substring
+    else:
+        substring = "<" + substring
+
+    # if the element is the head, you must use a regex
+    # to not count the <header> tag
+    if el.lower() == "head":
+        return len(re.findall(r"<head[\s>]", contents))
+    return contents.count(substring)
+
+
+def get_num_elements_in_file(el, path, cache=None):
+    if cache is not None:
+        return cache.get_document(path).get_num_elements(el)
     with open(path, encoding="utf-8") as fp:
-        if (
-            el.lower() in ["doctype", "html", "head", "title", "body"]
-            and el.lower() != "header"
-        ):
+        if el.lower() in raw_text_elements:
             # bs4 won't find doctype
-            contents = fp.read()
-            contents = contents.lower()
-            substring = el.lower()
-            if el.lower() == "doctype":
-                substring = "<!" + substring
-            else:
-                substring = "<" + substring
-
-            # if the element is the head, you must use a regex
-            # to not count the <header> tag
-            if el.lower() == "head":
-                count = len(re.findall(r"<head[\s>]", contents))
-            else:
-                count = contents.count(substring)
-            # return the number of doctypes
-            return count
+            return count_elements_in_text(el, fp.read())
         soup = BeautifulSoup(fp, "html.parser")
         elements = soup.find_all(el.lower())
     return len(elements)
 
 
-def get_num_elements_in_folder(el, dir_path):
+def get_num_elements_in_folder(el, dir_path, cache=None):
     elements = 0
     for subdir, dirs, files in os.walk(dir_path):
         for filename in files:
             filepath = subdir + os.sep + filename
             if filepath.endswith(".html"):
-                elements += get_num_elements_in_file(el, filepath)
+                elements += get_num_elements_in_file(el, filepath, cache)
     return elements
 
 
-def get_elements(el, path):
+def get_elements(el, path, cache=None):
+    if cache is not None:
+        return cache.get_document(path).get_elements(el)
     with open(path, encoding="utf-8") as fp:
         soup = BeautifulSoup(fp, "html.parser")
         elements = soup.find_all(el)
@@ -0,0 +1,284 @@
+# batch.py
+# grades a folder full of student projects at once
+#
+# Each project is graded by a worker process (a Report is single-threaded
+# and CPU bound once validation is cached) and written to its own report,
+# so any number of projects can be graded side by side.
+
+import concurrent.futures
+import os
+import sys
+import time
+
+from . import report as rep
+from . import report_export
+from . import validation_pipeline as pipeline
+from . import validator as val
+
+# the contrast levels an audit table shows
+contrast_levels = ("Normal AA", "Normal AAA", "Large AA", "Large AAA")
+
+
+def find_projects(root):
+    """returns the project folders (with a README.md) in root, sorted"""
+    projects = []
+    for name in sorted(os.listdir(root)):
+        dir_path = os.path.join(root, name)
+        if os.path.isfile(os.path.join(dir_path, "README.md")):
+            projects.append(dir_path)
+    return projects
+
+
+def get_output_path(output_dir, dir_path):
+    """each project gets its own report: output_dir/<project>/report.html"""
+    name = os.path.basename(os.path.normpath(dir_path))
+    return os.path.join(output_dir, name, "report.html")
+
+
+def get_profile_path(report_path):
+    """a project's cProfile stats are saved next to its report"""
+    return os.path.splitext(report_path)[0] + ".pstats"
+
+
+def get_ndjson_path(output_dir):
+    """a json batch also streams every project's details to one file"""
+    return os.path.join(output_dir, "report.ndjson")
+
+
+def get_validator_settings():
+    """the validator settings worker processes should share"""
+    return {
+        "css_engine": val.css_engine,
+        "markup_engine": val.markup_engine,
+        "nuURL": val.nuURL,
+        "vnu_jar_path": val.vnu_jar_path,
+        "cache_path": val.cache_path,
+        "max_workers": val.max_workers,
+        "rate_interval": val.rate_limiter.interval,
+    }
+
+
+def configure_worker(settings, jobs=1):
+    """applies the parent's validator settings in a worker process
+
+    Each worker has a rate limiter of its own, so with jobs workers each
+    one spaces its requests jobs times as far apart: together they ask
+    a validator no more often than one process would.
+    """
+    val.set_css_engine(settings["css_engine"])
+    val.nuURL = settings["nuURL"]
+    val.vnu_jar_path = settings["vnu_jar_path"]
+    val.set_markup_engine(settings["markup_engine"])
+    val.set_max_workers(settings["max_workers"])
+    val.set_cache_path(settings["cache_path"])
+    val.rate_limiter = pipeline.RateLimiter(settings["rate_interval"] * jobs)
+
+
+def grade_project(dir_path, output_path, output_format="html", profile=False):
+    """grades one project; returns a summary dict (never raises)
+
+    The HTML report is always written to output_path; with the json format
+    the report details are saved next to it (report.json) as well and
+    returned as results["details"]. With profile, the run's cProfile stats
+    are saved next to it too (report.pstats).
+    """
+    start = time.perf_counter()
+    results = {
+        "project": os.path.basename(os.path.normpath(dir_path)),
+        "dir_path": dir_path,
+        "report_path": output_path,
+        "status": "ok",
+        "error": "",
+        "seconds": 0.0,
+        "timings": {},
+        "stages": {},
+    }
+    try:
+        # Report expects the folder path to end with a separator
+        report = rep.Report(os.path.join(dir_path, ""), output_path)
+        profile_path = get_profile_path(output_path) if profile else None
+        report.generate_report(profile_path)
+        results["timings"] = report.timings
+        results["stages"] = report.get_stage_stats()
+        if output_format == "json":
+            json_path = os.path.splitext(output_path)[0] + ".json"
+            results["details"] = report.get_report_details()
+            report_export.save_json(results["details"], json_path)
+            results["report_path"] = json_path
+    except Exception as e:
+        results["status"] = "failed"
+        results["error"] = "{}: {}".format(type(e).__name__, e)
+    results["seconds"] = time.perf_counter() - start
+    return results
+
+
+def grade_projects(
+    root, output_dir="report", jobs=None, output_format="html", profile=False
+):
+    """grades every project in root on a pool of jobs processes
+
+    returns the summary dicts in project order. With the json format each
+    project's details are also written to output_dir/report.ndjson, a line
+    per project as soon as it is graded (so in the order they finish).
+    """
+    projects = find_projects(root)
+    output_paths = [get_output_path(output_dir, path) for path in projects]
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(projects)))
+    writer = None
+    if output_format == "json":
+        writer = report_export.NDJSONWriter(get_ndjson_path(output_dir))
+    try:
+        if jobs == 1:
+            results = []
+            for dir_path, output_path in zip(projects, output_paths):
+                item = grade_project(
+                    dir_path, output_path, output_format, profile
+                )
+                stream_results(writer, item)
+                results.append(item)
+            return results
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=configure_worker,
+            initargs=(get_validator_settings(), jobs),
+        ) as pool:
+            futures = [
+                pool.submit(
+                    grade_project,
+                    dir_path,
+                    output_path,
+                    output_format,
+                    profile,
+                )
+                for dir_path, output_path in zip(projects, output_paths)
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                stream_results(writer, future.result())
+            return [future.result() for future in futures]
+    finally:
+        if writer:
+            writer.close()
+
+
+def stream_results(writer, results):
+    """writes a graded project's NDJSON line (details and all)"""
+    details = results.pop("details", None)
+    if writer is None:
+        return
+    writer.write(
+        {
+            "project": results["project"],
+            "status": results["status"],
+            "error": results["error"],
+            "seconds": results["seconds"],
+            "details": details,
+        }
+    )
+
+
+def get_timings_table(results):
+    """returns a plain text table of each project's stage timings"""
+    stages = []
+    for item in results:
+        for stage in item["timings"]:
+            if stage not in stages:
+                stages.append(stage)
+    rows = [("Project",) + tuple(stages)]
+    for item in results:
+        timings = item["timings"]
+        rows.append(
+            (item["project"],)
+            + tuple(
+                "{:.3f}".format(timings[stage]) if stage in timings else "-"
+                for stage in stages
+            )
+        )
+    return format_table(rows)
+
+
+def get_stages_table(stages):
+    """returns a plain text table of a report's stage stats"""
+    rows = [("Stage", "Seconds", "Calls", "Bytes")]
+    for stage, stats in stages.items():
+        rows.append(
+            (
+                stage,
+                "{:.3f}".format(stats["seconds"]),
+                stats["calls"],
+                stats["bytes"],
+            )
+        )
+    return format_table(rows)
+
+
+def get_summary_table(results):
+    """returns a plain text table of projects, status and timings"""
+    headers = ("Project", "Status", "Seconds", "Report")
+    rows = [
+        (
+            item["project"],
+            item["status"],
+            "{:.2f}".format(item["seconds"]),
+            item["report_path"],
+        )
+        for item in results
+    ]
+    total = sum(item["seconds"] for item in results)
+    failed = sum(1 for item in results if item["status"] != "ok")
+    rows.append(
+        (
+            "{} projects".format(len(results)),
+            "{} failed".format(failed),
+            "{:.2f}".format(total),
+            "",
+        )
+    )
+    lines = format_table([headers] + rows).splitlines()
+    # separate the totals
+    lines.insert(len(lines) - 1, lines[1])
+    return "\n".join(lines)
+
+
+def get_contrast_audit_table(rows, levels=contrast_levels):
+    """returns a plain text table of a contrast audit's rows"""
+    table = [("Page", "Selector", "Color", "Background", "Contrast") + levels]
+    for row in rows:
+        report = row["report"] or {}
+        contrast = row["contrast"]
+        table.append(
+            (
+                row["html_file"],
+                row["selector"],
+                row["color"] or "-",
+                row["bg-color"] or "-",
+                "-" if contrast is None else "{:.2f}".format(contrast),
+            )
+            + tuple(report.get(level, "-") for level in levels)
+        )
+    return format_table(table)
+
+
+def format_table(rows):
+    """lines up rows of cells in columns, underlining the first row"""
+    widths = [
+        max(len(str(row[i])) for row in rows) for i in range(len(rows[0]))
+    ]
+    lines = []
+    for row in rows:
+        cells = [str(cell).ljust(width) for cell, width in zip(row, widths)]
+        lines.append("  ".join(cells).rstrip())
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python -m webanalyst.batch path/to/projects [jobs]
+    root = sys.argv[1]
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    batch_results = grade_projects(root, jobs=jobs)
+    for item in batch_results:
+        if item["error"]:
+            print("{}: {}".format(item["project"], item["error"]))
+    print(get_summary_table(batch_results))
@@ -0,0 +1,663 @@
+# benchmark.py
+# measures how fast (and how lean) grading is as projects grow
+#
+# Synthetic projects are generated in the shape of the projects in
+# tests/test_files/projects (a README with the usual goals, pages with
+# headings, paragraphs, links & a navbar, stylesheets of type, class and
+# id rules with colors, gradients and nested @media), in sizes from a
+# single page to a large site. Each benchmark is run against each size
+# with validation kept on this machine (CSS by the local validator, HTML
+# not at all, no results cache) so the numbers measure webanalyst and not
+# the network. Throughput is best-of-repeat wall time; peak memory comes
+# from a separate tracemalloc run, since tracing slows everything down.
+#
+#   python -m webanalyst.benchmark [--sizes small medium] [--repeat 3]
+#
+# With --specificity, it times scoring the generated stylesheets'
+# selectors instead: the specificity scanner, uncached and cached,
+# against the regexes get_specificity used to run.
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from . import CSSinator, CSSReport, HTMLReport, clerk
+from . import report as rep
+from . import validator as val
+from .batch import format_table
+
+# pages, stylesheets and rules (per stylesheet) of each project size
+sizes = {
+    "small": (1, 1, 40),
+    "medium": (8, 3, 250),
+    "large": (30, 6, 1200),
+}
+
+# README lines too long to write out in one piece
+errors_goal = (
+    "* Allowable Errors: 2 - this project does allow for HTML errors from "
+    "the validator\n"
+)
+elements_goal = (
+    "    * All required HTML 5 Elements: [`DOCTYPE`, `HTML`, `HEAD`, "
+    "`TITLE`, `BODY`]\n"
+)
+headers_goal = (
+    "        + Headers: background and foreground (h1 - h3 are required - "
+    "all others optional - but will be checked if present)\n"
+)
+contrast_goal = (
+    "        + Color Contrast (readability): must pass the [color contrast "
+    "analyzer tool](https://webaim.org/resources/contrastchecker/) at the "
+    "following levels\n"
+)
+
+readme_template = """# Project Name: Synthetic {size} project
+
+## Project Description
+***GOAL***: A generated project for benchmarking: {pages} page/s and
+{stylesheets} stylesheet/s of {rules} rules each.
+
+### HTML Level = 301
+This project does meet the requirements for attaining the next level in HTML.
+
+### CSS Level = 301
+This project does meet the requirements for attaining the next level in CSS.
+
+## Project Requirements
+### General
+* Number of Files:
+    * [HTML] At least {pages} HTML doc/s
+    * [CSS] At least {stylesheets} CSS sheets
+* Writing Goals: students are expected to aim for the following:
+    * Average Words Per Sentence: 10 - 20
+    * Average Sentences per paragraph: 1 - 5
+* Project Navigation:
+    * This project does require a navbar
+
+### HTML
+""" + errors_goal + """    * Allowed Errors include the following messages:
+* Required Elements
+""" + elements_goal + """    * Headers & Paragraphs:
+        + `H1`: 1 per page only
+        + `H2`: 2 or more
+        + `P` : 4 or more
+    * Other Tags:
+        + `A` : 3 or more
+        + `STRONG`: 3 - 5
+        + `EM`: 3 - 5
+### CSS
+* Standard Requirements:
+    * CSS Errors: None (total)
+    * Repeat selectors: None (per page)
+    * Repeat declaration blocks: None (per page)
+* General Styles:
+    * Font Families: number of font families to be set
+        + Minimum: 1
+        + Maximum: 2
+    * Color Settings:
+        + Entire Page colors set: background and foreground
+""" + headers_goal + contrast_goal + """            - Normal: AAA
+            - Large: AA
+* Project-specific Requirements:
+    * Required Selectors:
+        + type
+        + class
+        + id
+    * Required Properties:
+        + padding
+        + border
+"""
+
+page_template = """<!DOCTYPE html>
+<html lang="en">
+
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>{title}</title>
+{links}
+</head>
+
+<body>
+  <nav class="navbar">
+{nav}
+  </nav>
+  <h1>{title}</h1>
+{sections}
+</body>
+
+</html>
+"""
+
+words = (
+    "aurora glacier storm shore iceberg droplet winter mountain valley "
+    "river forest meadow harbor island canyon desert lantern compass "
+    "journey summit"
+).split()
+
+colors = (
+    "#082604",
+    "#46ABA6",
+    "#092756",
+    "#ffee80",
+    "#fff",
+    "#121212",
+    "rgb(42, 60, 87)",
+    "rgba(0, 0, 0, .5)",
+    "rgba(169, 235, 206, .25)",
+    "navy",
+    "white",
+    "hsl(210, 40%, 20%)",
+)
+
+type_selectors = ("p", "a", "h2", "h3", "li", "nav", "section", "em")
+properties = (
+    ("padding", ("4px", "1em 2em", "0 10px")),
+    ("margin", ("0 auto", "1rem", "8px 0")),
+    ("border", ("1px solid #ccc", "2px dashed navy", "none")),
+    ("border-radius", ("4px", "10px", "50%")),
+    ("text-align", ("left", "center", "right")),
+    ("font-size", ("1.2em", "14px", "larger")),
+    ("line-height", ("1.5", "20px")),
+    ("display", ("block", "flex", "inline-block")),
+)
+media_queries = (
+    "screen and (max-width: 600px)",
+    "(min-width: 900px)",
+    "print",
+)
+
+
+def get_sentence(rand):
+    num_words = rand.randint(10, 16)
+    sentence = " ".join(rand.choice(words) for _ in range(num_words))
+    return sentence.capitalize() + "."
+
+
+def get_page(rand, title, page_names, stylesheet_names):
+    links = "\n".join(
+        '  <link rel="stylesheet" href="css/{}">'.format(name)
+        for name in stylesheet_names
+    )
+    nav = "\n".join(
+        '    <a href="{0}">{0}</a>'.format(name) for name in page_names
+    )
+    sections = []
+    for i in range(3):
+        paragraphs = []
+        for j in range(2):
+            sentences = " ".join(get_sentence(rand) for _ in range(3))
+            if j == 0:
+                sentences += " <strong>{}</strong>".format(rand.choice(words))
+                sentences += " <em>{}</em>".format(rand.choice(words))
+            paragraphs.append("    <p>{}</p>".format(sentences))
+        sections.append(
+            '  <section class="section-{0}" id="part-{0}">\n'
+            "    <h2>{1}</h2>\n{2}\n  </section>".format(
+                i, rand.choice(words).title(), "\n".join(paragraphs)
+            )
+        )
+    return page_template.format(
+        title=title, links=links, nav=nav, sections="\n".join(sections)
+    )
+
+
+def get_gradient(rand):
+    """a background with vendor-prefixed gradients (fallback first)"""
+    start, stop = rand.choice(colors), rand.choice(colors)
+    angle = rand.choice(("top", "-45deg", "to bottom"))
+    lines = ["background: {};".format(start)]
+    for prefix in ("-webkit-", "-moz-", ""):
+        if angle == "to bottom" and prefix:
+            continue
+        lines.append(
+            "background: {}linear-gradient({}, {} 0%, {} 100%);".format(
+                prefix, angle, start, stop
+            )
+        )
+    lines.append(
+        "background: radial-gradient(circle, {} 10%, {} 40%);".format(
+            start, stop
+        )
+    )
+    return lines
+
+
+def get_declarations(rand):
+    declarations = [
+        "color: {};".format(rand.choice(colors)),
+        "background-color: {};".format(rand.choice(colors)),
+    ]
+    for prop, values in rand.sample(properties, 3):
+        declarations.append("{}: {};".format(prop, rand.choice(values)))
+    if rand.random() < 0.15:
+        declarations += get_gradient(rand)
+    return declarations
+
+
+def get_selector(rand, sheet, rule):
+    kind = rule % 3
+    if kind == 0:
+        selector = rand.choice(type_selectors)
+    elif kind == 1:
+        selector = ".{}-{}-{}".format(rand.choice(words), sheet, rule)
+    else:
+        selector = "#{}-{}-{}".format(rand.choice(words), sheet, rule)
+    if rand.random() < 0.3:
+        selector += " " + rand.choice(type_selectors)
+    if rand.random() < 0.1:
+        selector += ":hover"
+    return selector
+
+
+def get_ruleset(selector, declarations, indent=""):
+    body = "".join(
+        "{}  {}\n".format(indent, declaration) for declaration in declarations
+    )
+    return "{0}{1} {{\n{2}{0}}}\n".format(indent, selector, body)
+
+
+def get_stylesheet(rand, sheet, num_rules):
+    """num_rules rules; about one in ten inside (sometimes nested) @media"""
+    code = ["/* synthetic stylesheet {} */\n".format(sheet)]
+    if sheet == 0:
+        code.append(
+            get_ruleset(
+                "html",
+                [
+                    "font-family: Arial, Helvetica, sans-serif;",
+                    "color: #121212;",
+                    "background-color: #fff;",
+                ],
+            )
+        )
+        for header in ("h1", "h2", "h3"):
+            code.append(
+                get_ruleset(
+                    header,
+                    ["color: #092756;", "background-color: #ffee80;"],
+                )
+            )
+    rule = 0
+    while rule < num_rules:
+        if rand.random() < 0.1:
+            query = rand.choice(media_queries)
+            rulesets = []
+            for _ in range(min(3, num_rules - rule)):
+                selector = get_selector(rand, sheet, rule)
+                rulesets.append(
+                    get_ruleset(selector, get_declarations(rand), "  ")
+                )
+                rule += 1
+            inner = "".join(rulesets)
+            if rand.random() < 0.3:
+                inner = "  @supports (display: grid) {{\n{}  }}\n".format(
+                    inner
+                )
+            code.append("@media {} {{\n{}}}\n".format(query, inner))
+            continue
+        selector = get_selector(rand, sheet, rule)
+        code.append(get_ruleset(selector, get_declarations(rand)))
+        rule += 1
+    return "\n".join(code)
+
+
+def make_project(path, pages, stylesheets, rules, seed=0, size="custom"):
+    """writes a synthetic project to path (a folder) and returns path"""
+    rand = random.Random(seed)
+    os.makedirs(os.path.join(path, "css"), exist_ok=True)
+    readme = readme_template.format(
+        size=size, pages=pages, stylesheets=stylesheets, rules=rules
+    )
+    with open(os.path.join(path, "README.md"), "w") as f:
+        f.write(readme)
+    page_names = ["index.html"] + [
+        "page{}.html".format(i) for i in range(1, pages)
+    ]
+    stylesheet_names = ["style{}.css".format(i) for i in range(stylesheets)]
+    for i, name in enumerate(page_names):
+        title = "Synthetic Page {}".format(i)
+        with open(os.path.join(path, name), "w") as f:
+            f.write(get_page(rand, title, page_names, stylesheet_names))
+    for i, name in enumerate(stylesheet_names):
+        with open(os.path.join(path, "css", name), "w") as f:
+            f.write(get_stylesheet(rand, i, rules))
+    return path
+
+
+def get_project_bytes(dir_path):
+    """bytes of HTML & CSS in a project"""
+    files = clerk.get_all_files_of_type(dir_path, "html")
+    files += clerk.get_all_files_of_type(dir_path, "css")
+    return sum(os.path.getsize(path) for path in files)
+
+
+def use_local_validation():
+    """validates on this machine only; returns the settings to restore"""
+    settings = (
+        val.get_css_engine(),
+        val.get_markup_engine(),
+        val.get_results_cache(),
+    )
+    val.set_css_engine("local")
+    val.set_markup_engine("off")
+    val.set_results_cache(None)
+    return settings
+
+
+def restore_validation(settings):
+    css_engine, markup_engine, cache = settings
+    val.set_css_engine(css_engine)
+    val.set_markup_engine(markup_engine)
+    val.set_results_cache(cache)
+
+
+def get_readme_list(dir_path):
+    return clerk.file_to_string(dir_path + "README.md").split("\n")
+
+
+def parse_stylesheets(dir_path):
+    return [
+        CSSinator.Stylesheet(
+            clerk.get_file_name(path), clerk.file_to_string(path)
+        )
+        for path in clerk.get_all_files_of_type(dir_path, "css")
+    ]
+
+
+def run_html_report(dir_path, report_path):
+    html_report = HTMLReport.HTMLReport(
+        get_readme_list(dir_path),
+        dir_path,
+        None,
+        report_path,
+        rep.ReportDocument(),
+    )
+    html_report.generate_report()
+    return html_report
+
+
+def run_css_report(dir_path, report_path, html_report):
+    css_report = CSSReport.CSSReport(
+        get_readme_list(dir_path),
+        dir_path,
+        html_report.document_cache,
+        report_path,
+        html_report.report_document,
+    )
+    css_report.linked_stylesheets = html_report.linked_stylesheets
+    css_report.set_css_validation({})
+    css_report.generate_report(html_report.html_files)
+    return css_report
+
+
+def run_report(dir_path, report_path):
+    report = rep.Report(dir_path, report_path)
+    report.generate_report()
+    return report
+
+
+def get_benchmarks(dir_path, report_path):
+    """returns {name: (setup, run)}; setup's results are passed to run"""
+
+    def no_setup():
+        return ()
+
+    def css_report_setup():
+        # the CSS report grades what the HTML report found
+        return (run_html_report(dir_path, report_path),)
+
+    def contrast_audit_setup():
+        # the audit reads the stylesheets the CSS report parsed
+        html_report = run_html_report(dir_path, report_path)
+        return (run_css_report(dir_path, report_path, html_report),)
+
+    return {
+        "stylesheet": (
+            no_setup,
+            lambda: parse_stylesheets(dir_path),
+        ),
+        "html_report": (
+            no_setup,
+            lambda: run_html_report(dir_path, report_path),
+        ),
+        "css_report": (
+            css_report_setup,
+            lambda html_report: run_css_report(
+                dir_path, report_path, html_report
+            ),
+        ),
+        "report": (no_setup, lambda: run_report(dir_path, report_path)),
+        "contrast_audit": (
+            contrast_audit_setup,
+            lambda css_report: css_report.get_contrast_audit(),
+        ),
+    }
+
+
+def measure(setup, run, repeat=3):
+    """returns the best wall time of run and its traced memory (bytes)
+
+    memory is the peak while running and what is still held by run's
+    results (e.g. parsed stylesheets) once it returns.
+    """
+    best = None
+    # the reports print progress notes; keep them out of the results
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            for _ in range(repeat):
+                args = setup()
+                start = time.perf_counter()
+                run(*args)
+                seconds = time.perf_counter() - start
+                best = seconds if best is None else min(best, seconds)
+            args = setup()
+            tracemalloc.start()
+            try:
+                # hold on to the results while measuring
+                held = run(*args)
+                retained, peak = tracemalloc.get_traced_memory()
+                del held
+            finally:
+                tracemalloc.stop()
+    return best, peak, retained
+
+
+def run_benchmarks(size_names=None, repeat=3, names=None):
+    """runs the benchmarks on a generated project of each size
+
+    returns a result dict per benchmark and size.
+    """
+    if size_names is None:
+        size_names = list(sizes)
+    results = []
+    settings = use_local_validation()
+    # reports read project files relative to the working directory
+    work_dir = os.path.relpath(
+        tempfile.mkdtemp(prefix=".webanalyst-benchmark-", dir=os.getcwd())
+    )
+    try:
+        for size in size_names:
+            pages, stylesheets, rules = sizes[size]
+            dir_path = os.path.join(work_dir, size, "")
+            make_project(dir_path, pages, stylesheets, rules, size=size)
+            report_path = os.path.join(work_dir, size + "-report.html")
+            num_bytes = get_project_bytes(dir_path)
+            benchmarks = get_benchmarks(dir_path, report_path)
+            for name, (setup, run) in benchmarks.items():
+                if names and name not in names:
+                    continue
+                seconds, peak, retained = measure(setup, run, repeat)
+                results.append(
+                    {
+                        "benchmark": name,
+                        "size": size,
+                        "pages": pages,
+                        "stylesheets": stylesheets,
+                        "rules": stylesheets * rules,
+                        "bytes": num_bytes,
+                        "seconds": seconds,
+                        "bytes_per_second": num_bytes / seconds,
+                        "peak_bytes": peak,
+                        "retained_bytes": retained,
+                    }
+                )
+    finally:
+        restore_validation(settings)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def get_selectors(size, seed=0):
+    """every selector (including nested ones) of a size's stylesheets"""
+    pages, stylesheets, rules = sizes[size]
+    rand = random.Random(seed)
+    selectors = []
+    for i in range(stylesheets):
+        sheet = CSSinator.Stylesheet(
+            "style{}.css".format(i), get_stylesheet(rand, i, rules)
+        )
+        selectors += [ruleset.selector for ruleset in sheet.rulesets]
+        for rulesets in sheet.nested_at_rules.values():
+            selectors += [ruleset.selector for ruleset in rulesets]
+    return selectors
+
+
+def get_regex_specificity(selector):
+    """specificity as get_specificity used to find it (a regex a score)"""
+    return (
+        CSSinator.get_id_score(selector),
+        CSSinator.get_class_score(selector),
+        CSSinator.get_type_score(selector),
+    )
+
+
+def get_scanner_specificity(selector):
+    """the scanner with nothing cached"""
+    return CSSinator.get_specificity_tuple.__wrapped__(selector)
+
+
+def time_specificity(get_specificity, selectors, repeat=3):
+    """returns the best wall time of scoring every selector"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for selector in selectors:
+            get_specificity(selector)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def run_specificity_benchmarks(size_names=None, repeat=3):
+    """times the specificity scanner (uncached & cached) against the regexes
+
+    returns a result dict per way and size.
+    """
+    if size_names is None:
+        size_names = list(sizes)
+    ways = {
+        "regex": get_regex_specificity,
+        "scanner": get_scanner_specificity,
+        "scanner_cached": CSSinator.get_specificity_tuple,
+    }
+    results = []
+    for size in size_names:
+        selectors = get_selectors(size)
+        for way, get_specificity in ways.items():
+            # best of repeat: the cached time is for a warm cache
+            CSSinator.get_specificity_tuple.cache_clear()
+            seconds = time_specificity(get_specificity, selectors, repeat)
+            results.append(
+                {
+                    "benchmark": "specificity_" + way,
+                    "size": size,
+                    "selectors": len(selectors),
+                    "seconds": seconds,
+                }
+            )
+    return results
+
+
+def get_specificity_table(results):
+    rows = [("Benchmark", "Size", "Selectors", "Seconds", "Selectors/s")]
+    for item in results:
+        rows.append(
+            (
+                item["benchmark"],
+                item["size"],
+                item["selectors"],
+                "{:.5f}".format(item["seconds"]),
+                "{:.0f}".format(item["selectors"] / item["seconds"]),
+            )
+        )
+    return format_table(rows)
+
+
+def get_results_table(results):
+    rows = [
+        (
+            "Benchmark",
+            "Size",
+            "Rules",
+            "KiB",
+            "Seconds",
+            "KiB/s",
+            "Peak KiB",
+            "Held KiB",
+        )
+    ]
+    for item in results:
+        rows.append(
+            (
+                item["benchmark"],
+                item["size"],
+                item["rules"],
+                "{:.1f}".format(item["bytes"] / 1024),
+                "{:.4f}".format(item["seconds"]),
+                "{:.1f}".format(item["bytes_per_second"] / 1024),
+                "{:.1f}".format(item["peak_bytes"] / 1024),
+                "{:.1f}".format(item["retained_bytes"] / 1024),
+            )
+        )
+    return format_table(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark webanalyst on synthetic projects."
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", choices=list(sizes), default=list(sizes)
+    )
+    parser.add_argument("--benchmarks", nargs="+", metavar="NAME")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--specificity",
+        action="store_true",
+        help="time the specificity scanner against the regexes instead",
+    )
+    parser.add_argument("--json", help="also save the results (JSON) here")
+    args = parser.parse_args(argv)
+    if args.specificity:
+        results = run_specificity_benchmarks(args.sizes, args.repeat)
+        print(get_specificity_table(results))
+    else:
+        results = run_benchmarks(args.sizes, args.repeat, args.benchmarks)
+        print(get_results_table(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
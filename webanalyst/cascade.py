@@ -0,0 +1,189 @@
+# cascade.py
+# which declaration wins
+#
+# A Cascade keeps, for every (element, property), the one declaration
+# that wins: the highest specificity (a numeric (ids, classes, types)
+# tuple), then the latest in source order. A stylesheet is indexed into
+# its own Cascade once, however many pages link it, and a page's cascade
+# merges its sheets' cascades in the order the page applies them, so a
+# page costs as much as the elements its sheets style (not pages x rules
+# x rules).
+#
+# What counts as an element is up to the caller: get_elements maps a
+# ruleset's selector to (element, selector) pairs, and properties maps
+# the CSS properties of interest to the property they set. A
+# ColorRulesetCascade cascades a stylesheet's color_rulesets (@-rules
+# included) instead of its top level rulesets.
+
+import re
+from collections import namedtuple
+
+from . import CSSinator
+
+global_selectors = ("html", "body", ":root", "*")
+
+# the background shorthand sets the page's background color
+global_color_properties = {
+    "background-color": "bg-color",
+    "background": "bg-color",
+    "color": "color",
+}
+
+# @keyframes rulesets select moments of an animation, not elements
+keyframe_selector_re = re.compile(r"(?:from|to|\d*\.?\d+%)$", re.I)
+
+header_color_properties = {"background-color": "bg-color", "color": "color"}
+
+# a winning declaration: its value, where it came from and its rank
+CascadedValue = namedtuple(
+    "CascadedValue", "value selector specificity sheet position href"
+)
+
+
+class Cascade:
+    """the winning declaration of each (element, property)"""
+
+    def __init__(self, get_elements, properties):
+        self.get_elements = get_elements
+        self.properties = properties
+        self.winners = {}
+        # hrefs of the sheets that declared anything, in order
+        self.sources = []
+        self.num_sheets = 0
+
+    def add_stylesheet(self, sheet):
+        """cascades sheet's declarations after the sheets before"""
+        added = False
+        for position, selector_group, prop, value in self.get_declarations(
+            sheet
+        ):
+            prop = self.properties.get(prop)
+            if not prop:
+                continue
+            for element, selector in self.get_elements(selector_group):
+                cascaded = CascadedValue(
+                    value,
+                    selector,
+                    CSSinator.get_specificity_tuple(selector),
+                    self.num_sheets,
+                    position,
+                    sheet.href,
+                )
+                self.add(element, prop, cascaded)
+                added = True
+        if added:
+            self.sources.append(sheet.href)
+        self.num_sheets += 1
+
+    def get_declarations(self, sheet):
+        """yields (position, selector, property, value) of the (top level)
+        rulesets' valid declarations"""
+        for position, ruleset in enumerate(sheet.rulesets):
+            if not ruleset.declaration_block:
+                continue
+            for declaration in ruleset.declaration_block.declarations:
+                # browsers drop invalid declarations from the cascade, and
+                # a vendor-prefixed value is a fallback for old browsers,
+                # not what current ones use
+                if not declaration.is_valid:
+                    continue
+                if CSSinator.has_vendor_prefix(declaration.value):
+                    continue
+                yield (
+                    position,
+                    ruleset.selector,
+                    declaration.property,
+                    declaration.value,
+                )
+
+    def merge(self, cascade):
+        """cascades another cascade's sheets after the sheets before"""
+        offset = self.num_sheets
+        for key, value in cascade.winners.items():
+            winner = self.winners.get(key)
+            # its sheets come after ours, so it wins ties of specificity
+            if winner is None or value.specificity >= winner.specificity:
+                if offset:
+                    value = CascadedValue(
+                        value.value,
+                        value.selector,
+                        value.specificity,
+                        value.sheet + offset,
+                        value.position,
+                        value.href,
+                    )
+                self.winners[key] = value
+        self.sources += cascade.sources
+        self.num_sheets += cascade.num_sheets
+
+    def add(self, element, prop, value):
+        key = (element, prop)
+        winner = self.winners.get(key)
+        if winner is None or get_rank(value) >= get_rank(winner):
+            self.winners[key] = value
+
+    def get(self, element, prop):
+        """returns the winning CascadedValue (None if nothing set it)"""
+        return self.winners.get((element, prop))
+
+    def get_elements_styled(self):
+        """returns {element: {property: CascadedValue}} in source order"""
+        elements = {}
+        for (element, prop), value in self.winners.items():
+            elements.setdefault(element, {})[prop] = value
+        return elements
+
+
+class ColorRulesetCascade(Cascade):
+    """a Cascade of a stylesheet's color_rulesets
+
+    Those are the color & background declarations with a color value, at
+    the top level or nested in @-rules, in source order.
+    """
+
+    def get_declarations(self, sheet):
+        for position, ruleset in enumerate(sheet.color_rulesets):
+            for selector, declarations in ruleset.items():
+                for prop, value in declarations.items():
+                    yield position, selector, prop, value
+
+
+def get_rank(value):
+    """specificity first, then source order"""
+    return (value.specificity, value.sheet, value.position)
+
+
+def get_global_elements(selector):
+    """html, body, :root and * all style the page as a whole"""
+    if selector in global_selectors:
+        return [("global", selector)]
+    return []
+
+
+def get_header_elements(selector):
+    """each selector (of a group) that selects a heading styles its own"""
+    return [
+        (h_selector, h_selector)
+        for h_selector in CSSinator.get_header_selectors(selector)
+    ]
+
+
+def get_selector_elements(selector):
+    """each selector of a group styles its own element"""
+    return [
+        (item, item)
+        for item in CSSinator.split_selector_list(selector)
+        if not keyframe_selector_re.match(item)
+    ]
+
+
+def get_global_colors_cascade():
+    return Cascade(get_global_elements, global_color_properties)
+
+
+def get_header_colors_cascade():
+    return Cascade(get_header_elements, header_color_properties)
+
+
+def get_color_rulesets_cascade():
+    return ColorRulesetCascade(get_selector_elements, global_color_properties)
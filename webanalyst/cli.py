@@ -1,15 +1,191 @@
 """Console script for webanalyst."""
+import os
 import sys
 
 import click
 
+from . import batch as batch_grader
+from . import report as rep
+from . import validator as val
 
-@click.command()
-def main(args=None):
-    """Console script for webanalyst."""
-    click.echo("Replace this message by putting your code into " "webanalyst.cli.main")
-    click.echo("See click documentation at https://click.palletsprojects.com/")
-    return 0
+
+def configure_validators(offline, vnu_jar, workers, cache=None):
+    """applies the validator options shared by every command"""
+    if cache:
+        val.set_cache_path(cache)
+    if vnu_jar:
+        val.set_markup_engine("vnu", vnu_jar)
+    if offline:
+        # nothing may leave this machine: CSS is checked in-process and
+        # HTML only if there is a local Nu checker to do it
+        val.set_css_engine("local")
+        if val.get_markup_engine() not in ("nu", "vnu"):
+            val.set_markup_engine("off")
+    if workers:
+        val.set_max_workers(workers)
+
+
+def common_options(command):
+    """options shared by grade and batch"""
+    command = click.option(
+        "--offline",
+        is_flag=True,
+        help="Validate without the network: CSS in-process, HTML with "
+        "--vnu-jar (or not at all).",
+    )(command)
+    command = click.option(
+        "--vnu-jar",
+        type=click.Path(exists=True, dir_okay=False),
+        help="Validate HTML with this vnu.jar (one local JVM).",
+    )(command)
+    command = click.option(
+        "--validator-workers",
+        type=click.IntRange(min=1),
+        help="Validator requests in flight at once.",
+    )(command)
+    command = click.option(
+        "--cache",
+        type=click.Path(dir_okay=False),
+        help="Cache validator results in this SQLite file (e.g. "
+        "~/.cache/webanalyst/validation.sqlite3); off by default.",
+    )(command)
+    command = click.option(
+        "--pstats",
+        is_flag=True,
+        help="Profile each project (cProfile), saving report.pstats next "
+        "to its report.",
+    )(command)
+    command = click.option(
+        "--profile",
+        is_flag=True,
+        help="Print the time spent in each stage.",
+    )(command)
+    command = click.option(
+        "--format",
+        "output_format",
+        type=click.Choice(["html", "json"]),
+        default="html",
+        show_default=True,
+        help="Report format (json also writes the HTML report).",
+    )(command)
+    return command
+
+
+@click.group()
+def main():
+    """Grade web design projects (HTML & CSS) against their README goals."""
+
+
+@main.command()
+@click.argument(
+    "project", type=click.Path(exists=True, file_okay=False, dir_okay=True)
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False),
+    help="Where to write the report [default: report/report.html or "
+    "report/report.json]; json details are saved as a .json file next "
+    "to the HTML report.",
+)
+@click.option(
+    "--audit",
+    is_flag=True,
+    help="Print the contrast of every selector that sets a color, on "
+    "every page.",
+)
+@common_options
+def grade(
+    project,
+    output,
+    audit,
+    output_format,
+    profile,
+    pstats,
+    cache,
+    validator_workers,
+    vnu_jar,
+    offline,
+):
+    """Grade the project in PROJECT."""
+    configure_validators(offline, vnu_jar, validator_workers, cache)
+    if output is None:
+        output = os.path.splitext(rep.report_path)[0] + "." + output_format
+    # the HTML report is always written; json details go next to it
+    html_path = os.path.splitext(output)[0] + ".html"
+    if output_format == "json":
+        output = os.path.splitext(output)[0] + ".json"
+    report = rep.Report(os.path.join(project, ""), html_path)
+    profile_path = None
+    if pstats:
+        profile_path = batch_grader.get_profile_path(html_path)
+    report.generate_report(profile_path)
+    if output_format == "json":
+        report.save_report_details(output)
+    click.echo("Report saved to {}".format(output))
+    if profile_path:
+        click.echo("Profile saved to {}".format(profile_path))
+    if audit:
+        rows = report.get_contrast_audit()
+        click.echo(batch_grader.get_contrast_audit_table(rows))
+    if profile:
+        stats = report.get_stage_stats()
+        click.echo(batch_grader.get_stages_table(stats), err=True)
+
+
+@main.command()
+@click.argument(
+    "root", type=click.Path(exists=True, file_okay=False, dir_okay=True)
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(file_okay=False),
+    default="report",
+    show_default=True,
+    help="Folder for the reports (one sub-folder per project).",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    help="Projects graded at once [default: number of CPUs].",
+)
+@common_options
+def batch(
+    root,
+    output,
+    jobs,
+    output_format,
+    profile,
+    pstats,
+    cache,
+    validator_workers,
+    vnu_jar,
+    offline,
+):
+    """Grade every project (folder with a README.md) in ROOT."""
+    configure_validators(offline, vnu_jar, validator_workers, cache)
+    results = batch_grader.grade_projects(
+        root, output, jobs, output_format, pstats
+    )
+    for item in results:
+        if item["error"]:
+            click.echo(
+                "{}: {}".format(item["project"], item["error"]),
+                err=True,
+            )
+    click.echo(batch_grader.get_summary_table(results))
+    if profile:
+        click.echo(batch_grader.get_timings_table(results), err=True)
+        # and each project's stages, as grade --profile prints them
+        for item in results:
+            if item["stages"]:
+                click.echo("\n{}:".format(item["project"]), err=True)
+                stages_table = batch_grader.get_stages_table(item["stages"])
+                click.echo(stages_table, err=True)
+    failed = any(item["status"] != "ok" for item in results)
+    sys.exit(1 if failed else 0)
 
 
 if __name__ == "__main__":
@@ -2,6 +2,8 @@
 # a set of variables and functions to process color keywords and their
 # hexadecimal values
 
+from types import MappingProxyType
+
 basic_color_keywords = {
     "black": "#000000",
     "silverk": "#C0C0C0",
@@ -166,36 +168,67 @@ extended_color_keywords = [
 ]
 
 
+def build_keyword_index():
+    """returns every keyword's hex value (extended values win), read-only"""
+    color_keywords = dict(basic_color_keywords)
+    for i in extended_color_keywords:
+        items = i.split("\t")
+        key = items[0]
+        val = items[1]
+        color_keywords[key] = val
+    return MappingProxyType(color_keywords)
+
+
+# built once: looking up a keyword is a hash probe
+keyword_index = build_keyword_index()
+keyword_set = frozenset(keyword_index)
+# rgb from the hex values (the extended list's rgb column has typos)
+keyword_rgb_index = MappingProxyType(
+    {
+        key: tuple(int(val[i : i + 2], 16) for i in (1, 3, 5))
+        for key, val in keyword_index.items()
+    }
+)
+
+
 def get_basic_color_keywords():
     return basic_color_keywords
 
 
 def get_full_color_keywords():
     """returns a dictionary of all color keywords with their hex value"""
-    color_keywords = basic_color_keywords
-    for i in extended_color_keywords:
-        items = i.split("\t")
-        key = items[0]
-        val = items[1]
-        color_keywords[key] = val
-    return color_keywords
+    return dict(keyword_index)
 
 
 def get_all_keywords():
-    keywords = list(get_full_color_keywords().keys())
+    keywords = list(keyword_index)
     return keywords
 
 
 def is_a_keyword(word):
-    return word in get_all_keywords()
+    return word in keyword_set
 
 
 def get_hex_by_keyword(word):
-    keywords = get_full_color_keywords()
-    hex = keywords.get(word)
+    hex = keyword_index.get(word)
     return hex
 
 
+def get_rgb_by_keyword(word):
+    """returns a keyword's (r, g, b) or None"""
+    return keyword_rgb_index.get(word)
+
+
+def get_keywords_in(words):
+    """returns the words (in order, repeats and all) that are keywords"""
+    return [word for word in words if word in keyword_set]
+
+
+def get_hex_by_keywords(words):
+    """returns the hex value of each word (None if not a keyword)"""
+    return [keyword_index.get(word) for word in words]
+
+
 if __name__ == "__main__":
     # keywords = get_full_color_keywords()
     print(get_hex_by_keyword("beige"))
@@ -1,5 +1,14 @@
+import functools
+import math
 import re
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+from . import color_keywords
+
 """Main module."""
 hex_map = {
     "0": 0,
@@ -33,6 +42,105 @@ hsl_all_forms_re = r"hsl\(.*?\)|hsla\(.*?\)"
 hex_regex = r"(#\w{3}\s|#\w{6}\s|#\w{8}\s)"
 
 
+# rgb(), rgba(), hsl() and hsla(), with commas or spaces (and / alpha)
+color_function_re = re.compile(r"(rgba?|hsla?)\(([^()]*)\)$")
+color_argument_re = re.compile(r"\s*[,/]\s*|\s+")
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_color(value, current_color=None):
+    """returns any CSS color value as (r, g, b, alpha), None if it isn't one
+
+    r, g and b are 0 - 255 and alpha 0 - 1. Hex (3, 4, 6 or 8 digits),
+    rgb/rgba and hsl/hsla (comma or space separated), color keywords and
+    transparent are understood; currentColor is current_color (parsed),
+    or None if it isn't given.
+    """
+    value = value.strip().lower()
+    if value.startswith("#"):
+        return parse_hex(value[1:])
+    match = color_function_re.match(value)
+    if match:
+        name, arguments = match.groups()
+        arguments = color_argument_re.split(arguments.strip())
+        if len(arguments) not in (3, 4):
+            return None
+        try:
+            if name.startswith("rgb"):
+                rgb = tuple(parse_channel(arg) for arg in arguments[:3])
+            else:
+                hue = parse_hue(arguments[0])
+                saturation = parse_percentage(arguments[1])
+                lightness = parse_percentage(arguments[2])
+                rgb = hsl_to_rgb((hue, saturation, lightness))
+            alpha = 1.0
+            if len(arguments) == 4:
+                alpha = parse_alpha(arguments[3])
+        except ValueError:
+            return None
+        return rgb + (alpha,)
+    if value == "transparent":
+        return (0, 0, 0, 0.0)
+    if value == "currentcolor":
+        if current_color is None:
+            return None
+        return parse_color(current_color)
+    rgb = color_keywords.get_rgb_by_keyword(value)
+    if rgb is None:
+        return None
+    return rgb + (1.0,)
+
+
+def parse_hex(digits):
+    """returns hex digits (without the #) as (r, g, b, alpha) or None"""
+    if len(digits) in (3, 4):
+        digits = "".join(digit * 2 for digit in digits)
+    if len(digits) not in (6, 8):
+        return None
+    if not all(digit in hex_map for digit in digits):
+        return None
+    channels = [int(digits[i : i + 2], 16) for i in range(0, len(digits), 2)]
+    alpha = channels[3] / 255 if len(channels) == 4 else 1.0
+    return tuple(channels[:3]) + (alpha,)
+
+
+def parse_channel(arg):
+    """an rgb channel (a number or a percentage) clamped to 0 - 255"""
+    if arg.endswith("%"):
+        channel = float(arg[:-1]) * 255 / 100
+    else:
+        channel = float(arg)
+    return min(255, max(0, round(channel)))
+
+
+def parse_alpha(arg):
+    """an alpha value (a number or a percentage) clamped to 0 - 1"""
+    if arg.endswith("%"):
+        alpha = float(arg[:-1]) / 100
+    else:
+        alpha = float(arg)
+    return min(1.0, max(0.0, alpha))
+
+
+def parse_percentage(arg):
+    """a percentage (the % is optional) clamped to 0 - 100"""
+    return min(100.0, max(0.0, float(arg.rstrip("%"))))
+
+
+def parse_hue(arg):
+    """a hue in degrees (deg, grad, rad or turn) from 0 to 360"""
+    units = (("deg", 1), ("grad", 0.9), ("rad", 180 / math.pi), ("turn", 360))
+    for unit, degrees in units:
+        if arg.endswith(unit):
+            return float(arg[: -len(unit)]) * degrees % 360
+    return float(arg) % 360
+
+
+def rgba_to_hex(rgba):
+    """returns (r, g, b, alpha) as a 6 digit hex code (alpha is dropped)"""
+    return "#{:02x}{:02x}{:02x}".format(*rgba[:3])
+
+
 def passes_color_contrast(level, hex1, hex2):
     ratio = contrast_ratio(hex1, hex2)
     min_ratio = contrast_ratio_map[level]
@@ -43,8 +151,8 @@ def get_color_contrast_report(hex1, hex2):
     report = {}
     # check for gradients and apply to every color in the gradient
     # if "gradient" in hex1
+    contrast = contrast_ratio(hex1, hex2)
     for key, item in contrast_ratio_map.items():
-        contrast = contrast_ratio(hex1, hex2)
         passes = "Pass" if contrast >= item else "Fail"
         report[key] = passes
     return report
@@ -234,14 +342,11 @@ def luminance(rgb):
 
 
 def contrast_ratio(hex1, hex2):
-    try:
-        rgb1 = hex_to_rgb(hex1)
-        rgb2 = hex_to_rgb(hex2)
-    except ValueError as e:
-        print(f"Oops {str(e)}")
+    l1 = get_color_luminance(hex1)
+    l2 = get_color_luminance(hex2)
+    if l1 is None or l2 is None:
+        print(f"Oops {hex1} or {hex2} is not a valid color.")
         return 0
-    l1 = luminance(rgb1)
-    l2 = luminance(rgb2)
     # Make sure l1 is the lighter of the two or swap them
     if l1 < l2:
         temp = l1
@@ -254,6 +359,147 @@ def contrast_ratio(hex1, hex2):
     return float(ratio)
 
 
+# the relative luminance of every channel value (0 - 255)
+relative_luminances = [get_relative_luminance(val) for val in range(256)]
+
+
+def get_color_contrast_reports(pairs):
+    """returns a contrast report (see get_color_contrast_report) for each
+    (hex1, hex2) pair, checking every pair at every level at once"""
+    return get_contrast_reports_by_ratio(get_contrast_ratios(pairs))
+
+
+def get_contrast_reports_by_ratio(ratios):
+    """returns a contrast report for each contrast ratio"""
+    levels = list(contrast_ratio_map)
+    if np is None:
+        passes = [
+            [ratio >= contrast_ratio_map[level] for level in levels]
+            for ratio in ratios
+        ]
+    else:
+        targets = np.array([contrast_ratio_map[level] for level in levels])
+        passes = (np.array(ratios)[:, None] >= targets).tolist()
+    reports = []
+    for row in passes:
+        reports.append(
+            {
+                level: "Pass" if passed else "Fail"
+                for level, passed in zip(levels, row)
+            }
+        )
+    return reports
+
+
+def get_contrast_ratios(pairs):
+    """returns the contrast ratio of each (hex1, hex2) pair
+
+    The same ratios contrast_ratio gets (0 if a color isn't one), but
+    each color is converted once and, with NumPy, all pairs are compared
+    in one go.
+    """
+    colors = {}
+    rows = []
+    for pair in pairs:
+        rows.append([colors.setdefault(color, len(colors)) for color in pair])
+    luminances = [get_color_luminance(color) for color in colors]
+    if np is None:
+        ratios = []
+        for first, second in rows:
+            l1 = luminances[first]
+            l2 = luminances[second]
+            if l1 is None or l2 is None:
+                ratios.append(0)
+                continue
+            l1, l2 = max(l1, l2), min(l1, l2)
+            ratios.append((l1 + 0.05) / (l2 + 0.05))
+    else:
+        valid = np.array([lum is not None for lum in luminances], dtype=bool)
+        lums = np.array([lum or 0.0 for lum in luminances], dtype=float)
+        rows = np.array(rows, dtype=int).reshape(-1, 2)
+        l1 = lums[rows[:, 0]]
+        l2 = lums[rows[:, 1]]
+        ratios = (np.maximum(l1, l2) + 0.05) / (np.minimum(l1, l2) + 0.05)
+        ratios = np.where(valid[rows].all(axis=1), ratios, 0).tolist()
+    # truncated to 2 places just as contrast_ratio does
+    return [
+        float(format(ratio, ".3f")[:-1]) if ratio else 0 for ratio in ratios
+    ]
+
+
+def get_effective_colors(stacks, canvas="#ffffff"):
+    """returns the opaque hex color each stack of colors shows
+
+    A stack lists colors from the bottom (the page's background) up (an
+    element's background, then its text color, say); each is painted onto
+    the (opaque) canvas in turn. With NumPy every stack is painted at
+    once, a layer at a time. A stack with a value that isn't a color
+    shows None.
+    """
+    canvas = parse_color(canvas)[:3]
+    layers = []
+    for stack in stacks:
+        colors = [parse_color(color) for color in stack]
+        layers.append(None if None in colors else colors)
+    if np is None:
+        effective = []
+        for colors in layers:
+            if colors is None:
+                effective.append(None)
+                continue
+            rgb = canvas
+            for color in colors:
+                # painting onto an opaque color leaves it opaque
+                alpha = color[3]
+                rgb = tuple(
+                    color[i] * alpha + rgb[i] * (1 - alpha) for i in range(3)
+                )
+            effective.append(rgb)
+    else:
+        depth = max([len(colors) for colors in layers if colors] or [0])
+        # short stacks are topped up with transparent layers
+        painted = np.zeros((len(layers), depth, 4))
+        for row, colors in enumerate(layers):
+            if colors:
+                painted[row, : len(colors)] = colors
+        rgb = np.tile(np.array(canvas, dtype=float), (len(layers), 1))
+        for layer in range(depth):
+            alpha = painted[:, layer, 3:]
+            rgb = painted[:, layer, :3] * alpha + rgb * (1 - alpha)
+        effective = [
+            None if colors is None else tuple(row)
+            for colors, row in zip(layers, rgb.tolist())
+        ]
+    return [
+        None if rgb is None else rgba_to_hex([round(val) for val in rgb])
+        for rgb in effective
+    ]
+
+
+def get_effective_pairs(pairs, canvas="#ffffff"):
+    """returns (text, background) hex colors as they appear on the page
+
+    pairs are (text color, background stack); the background stack is
+    composited onto the canvas, then the text color onto that. Either
+    color is None if something in its stack isn't a color.
+    """
+    backgrounds = [list(stack) for text, stack in pairs]
+    texts = [list(stack) + [text] for text, stack in pairs]
+    effective = get_effective_colors(backgrounds + texts, canvas)
+    num_pairs = len(backgrounds)
+    return list(zip(effective[num_pairs:], effective[:num_pairs]))
+
+
+def get_color_luminance(color):
+    """returns the luminance of a color (None if it isn't one)"""
+    rgba = parse_color(color)
+    if rgba is None:
+        return None
+    r, g, b, alpha = rgba
+    table = relative_luminances
+    return table[r] * 0.2126 + table[g] * 0.7152 + table[b] * 0.0722
+
+
 def get_color_type(code):
     if "#" in code[0]:
         if len(code) > 7:
@@ -0,0 +1,226 @@
+# css_parser.py
+# a single-pass tokenizer & parser for CSS
+#
+# The whole stylesheet is scanned once with one regex that only stops at
+# the characters that matter to the structure of CSS (braces, semicolons,
+# parentheses, comments and strings). Everything in between is sliced out
+# of the source by offset, so parsing is linear in the size of the text
+# and every node keeps the offsets it was found at. Selectors, properties
+# and values are interned (sys.intern): the same few hundred of them turn
+# up in every stylesheet of a class, so each is stored once and compares
+# by identity.
+
+import bisect
+import re
+import sys
+
+# comments and strings are matched whole so nothing inside them counts
+token_re = re.compile(
+    r"/\*.*?(?:\*/|\Z)"
+    r"|\"(?:\\.|[^\"\\\n])*\"?"
+    r"|'(?:\\.|[^'\\\n])*'?"
+    r"|[{};()]",
+    re.S,
+)
+comment_re = re.compile(r"/\*.*?(?:\*/|\Z)", re.S)
+
+
+class CommentNode:
+    def __init__(self, text, start, end):
+        self.text = text
+        self.start = start
+        self.end = end
+
+
+class DeclarationNode:
+    def __init__(self, text, start, end):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.property = ""
+        self.value = ""
+        self.important = False
+        self.is_valid = ":" in text
+        if self.is_valid:
+            prop, value = text.split(":", 1)
+            value = value.strip()
+            if value.lower().endswith("!important"):
+                self.important = True
+                value = value[: -len("!important")].strip()
+            self.property = sys.intern(prop.strip())
+            self.value = sys.intern(value)
+
+
+class BlockNode:
+    """anything that can hold declarations and other rules"""
+
+    def __init__(self, prelude, start, block_start):
+        self.prelude = prelude
+        self.start = start
+        self.block_start = block_start
+        self.end = None
+        self.declarations = []
+        self.children = []
+
+    def get_rules(self):
+        """returns child rulesets (not @rules)"""
+        return [
+            child for child in self.children if isinstance(child, RuleNode)
+        ]
+
+    def get_at_rules(self):
+        return [
+            child for child in self.children if isinstance(child, AtRuleNode)
+        ]
+
+
+class RuleNode(BlockNode):
+    """a ruleset: selector { declarations }"""
+
+    @property
+    def selector(self):
+        return self.prelude
+
+
+class AtRuleNode(BlockNode):
+    """an @rule, either a statement (@import ...;) or a block (@media {})"""
+
+    def __init__(self, prelude, start, block_start=None):
+        super().__init__(prelude, start, block_start)
+        self.name = prelude.split()[0].split("(")[0].lower()
+
+    @property
+    def has_block(self):
+        return self.block_start is not None
+
+
+class ParsedStylesheet(BlockNode):
+    """the root of the tree: top-level rules, plus comments and errors"""
+
+    def __init__(self, text):
+        super().__init__("", 0, None)
+        self.text = text
+        self.end = len(text)
+        self.comments = []
+        self.errors = []
+        self.__line_starts = None
+
+    def add_error(self, offset, message):
+        self.errors.append((offset, message))
+
+    def get_line(self, offset):
+        """returns the (1-based) line number for an offset"""
+        if self.__line_starts is None:
+            self.__line_starts = [0] + [
+                match.end() for match in re.finditer("\n", self.text)
+            ]
+        return bisect.bisect_right(self.__line_starts, offset)
+
+    def walk(self):
+        """yields every block node in document order"""
+        stack = list(reversed(self.children))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+
+def strip_comments(text):
+    if "/*" not in text:
+        return text
+    return comment_re.sub("", text)
+
+
+def get_statement(text, start, end):
+    """returns cleaned text and offset of a statement between start & end"""
+    raw = text[start:end]
+    statement = strip_comments(raw).strip()
+    if not statement:
+        return "", start
+    offset = start + len(raw) - len(raw.lstrip())
+    return statement, offset
+
+
+def close_statement(sheet, container, start, end):
+    """turns the text before a ; or } into a declaration or @rule"""
+    statement, offset = get_statement(sheet.text, start, end)
+    if not statement:
+        return
+    if statement.startswith("@"):
+        container.children.append(AtRuleNode(statement, offset))
+    elif container is sheet:
+        sheet.add_error(offset, "Unexpected text outside of a ruleset")
+    else:
+        declaration = DeclarationNode(statement, offset, end)
+        if not declaration.is_valid:
+            sheet.add_error(offset, "Declaration is missing a colon")
+        container.declarations.append(declaration)
+
+
+def parse(text):
+    """parses CSS into a tree of rules, @rules, declarations & comments"""
+    sheet = ParsedStylesheet(text)
+    stack = [sheet]
+    segment_start = 0
+    paren_depth = 0
+    for match in token_re.finditer(text):
+        token = match.group()
+        pos = match.start()
+        first = token[0]
+        if first == "/":
+            if len(token) < 4 or not token.endswith("*/"):
+                sheet.add_error(pos, "Unterminated comment")
+            sheet.comments.append(CommentNode(token, pos, match.end()))
+        elif first == '"' or first == "'":
+            if len(token) < 2 or token[-1] != first:
+                sheet.add_error(pos, "Unterminated string")
+        elif first == "(":
+            paren_depth += 1
+        elif first == ")":
+            if paren_depth:
+                paren_depth -= 1
+        elif first == ";":
+            # semicolons inside url(...) and the like don't end anything
+            if paren_depth:
+                continue
+            close_statement(sheet, stack[-1], segment_start, pos)
+            segment_start = pos + 1
+        elif first == "{":
+            paren_depth = 0
+            prelude, offset = get_statement(text, segment_start, pos)
+            if prelude.startswith("@"):
+                node = AtRuleNode(prelude, offset, pos)
+            else:
+                if not prelude:
+                    offset = pos
+                    sheet.add_error(pos, "Block is missing a selector")
+                node = RuleNode(sys.intern(prelude), offset, pos)
+            stack[-1].children.append(node)
+            stack.append(node)
+            segment_start = pos + 1
+        elif first == "}":
+            paren_depth = 0
+            if len(stack) == 1:
+                sheet.add_error(pos, "Unexpected closing brace")
+                segment_start = pos + 1
+                continue
+            close_statement(sheet, stack[-1], segment_start, pos)
+            node = stack.pop()
+            node.end = pos + 1
+            segment_start = pos + 1
+
+    # whatever is left: a last statement and any blocks never closed
+    if len(stack) > 1:
+        close_statement(sheet, stack[-1], segment_start, len(text))
+    else:
+        statement, offset = get_statement(text, segment_start, len(text))
+        if statement.startswith("@"):
+            sheet.add_error(offset, "@rule is missing a semicolon")
+            sheet.children.append(AtRuleNode(statement, offset))
+        elif statement:
+            sheet.add_error(offset, "Unexpected text outside of a ruleset")
+    while len(stack) > 1:
+        node = stack.pop()
+        node.end = len(text)
+        sheet.add_error(node.block_start, "Missing closing brace")
+    return sheet
@@ -0,0 +1,699 @@
+# css_validator.py
+# an offline CSS validator
+#
+# Checks a stylesheet in-process: structure (braces, semicolons, strings
+# & comments) from css_parser, @rules against the known @rules, and each
+# declaration against a table of properties and the value types they
+# accept. Results read as the same #results_container markup the W3C
+# CSS validator returns, so anything that reads jigsaw results (see
+# CSSReport.process_errors) reads these too, but the markup is only
+# rendered for callers that need it: validator.is_css_valid and
+# get_css_errors_list read the messages directly.
+
+import functools
+import html
+import re
+
+from bs4 import BeautifulSoup
+
+from . import color_keywords as keyword
+from . import css_parser
+
+name = "webanalyst-local"
+version = "1.0"
+
+global_keywords = frozenset(
+    ("inherit", "initial", "unset", "revert", "revert-layer")
+)
+
+known_at_rules = frozenset(
+    (
+        "@charset",
+        "@import",
+        "@namespace",
+        "@media",
+        "@supports",
+        "@font-face",
+        "@keyframes",
+        "@page",
+        "@layer",
+        "@container",
+        "@counter-style",
+        "@font-feature-values",
+        "@property",
+        "@document",
+        "@viewport",
+    )
+)
+
+# @rules that hold rulesets (the others hold declarations)
+rule_at_rules = frozenset(
+    ("@media", "@supports", "@layer", "@container", "@document")
+)
+
+# value components
+number_re = r"[+-]?(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?"
+length_units = (
+    "px|em|rem|ex|ch|vw|vh|vmin|vmax|svh|lvh|dvh|svw|lvw|dvw|cm|mm|q|in"
+    "|pt|pc|lh|rlh|cqw|cqh|cqi|cqb|cqmin|cqmax"
+)
+value_types = {
+    "number": re.compile(number_re + "$"),
+    "integer": re.compile(r"[+-]?\d+$"),
+    "length": re.compile(
+        r"(?:" + number_re + r"(?:" + length_units + r")|[+-]?0*\.?0+)$",
+        re.I,
+    ),
+    "percentage": re.compile(number_re + "%$"),
+    "flex": re.compile(number_re + "fr$", re.I),
+    "angle": re.compile(number_re + "(?:deg|grad|rad|turn)$", re.I),
+    "time": re.compile(number_re + "m?s$", re.I),
+    "resolution": re.compile(number_re + "(?:dpi|dpcm|dppx|x)$", re.I),
+    "string": re.compile(r"(?:\".*\"|'.*')$", re.S),
+    "url": re.compile(r"url\(.*\)$", re.I | re.S),
+    "image": re.compile(
+        r"(?:-\w+-)?(?:url|(?:repeating-)?(?:linear|radial|conic)-gradient"
+        r"|image-set|image|element|cross-fade)\(.*\)$",
+        re.I | re.S,
+    ),
+    "hex": re.compile(r"#(?:[0-9a-f]{3,4}|[0-9a-f]{6}|[0-9a-f]{8})$", re.I),
+    "color-function": re.compile(
+        r"(?:rgba?|hsla?|hwb|lab|lch|oklab|oklch|color|color-mix|light-dark)"
+        r"\(.*\)$",
+        re.I | re.S,
+    ),
+    "ident": re.compile(r"-?[a-z_][\w-]*$", re.I),
+}
+
+# functions that can stand in for any value type
+any_value_re = re.compile(
+    r"(?:var|calc|min|max|clamp|env|attr|-\w+-calc)\(", re.I
+)
+
+# splits a value into components, keeping function calls whole
+component_re = re.compile(
+    r"[\w-]*\((?:[^()]|\((?:[^()]|\([^()]*\))*\))*\)"
+    r"|\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'"
+    r"|[^\s,/()]+|[,/()]"
+)
+
+color_names = frozenset(
+    [word.lower() for word in keyword.get_all_keywords()]
+    + ["transparent", "currentcolor"]
+)
+
+# property: (value types, keywords, max number of components)
+# None for the max means any number; a property with no types and no
+# keywords accepts any (lexically valid) value.
+length = ("length", "percentage")
+line_style = (
+    "none",
+    "hidden",
+    "dotted",
+    "dashed",
+    "solid",
+    "double",
+    "groove",
+    "ridge",
+    "inset",
+    "outset",
+)
+border = (("length", "color"), line_style + ("thin", "medium", "thick"), 3)
+size = (length, ("auto", "min-content", "max-content", "fit-content"), 1)
+max_size = (length, ("none", "min-content", "max-content", "fit-content"), 1)
+inset = (length, ("auto",), 1)
+color = (("color",), (), 1)
+overflow = ((), ("visible", "hidden", "clip", "scroll", "auto"), 2)
+any_value = ((), (), None)
+
+properties = {
+    "color": color,
+    "background-color": color,
+    "border-color": (("color",), (), 4),
+    "border-top-color": color,
+    "border-right-color": color,
+    "border-bottom-color": color,
+    "border-left-color": color,
+    "outline-color": color,
+    "text-decoration-color": color,
+    "caret-color": (("color",), ("auto",), 1),
+    "accent-color": (("color",), ("auto",), 1),
+    "column-rule-color": color,
+    "fill": (("color", "url"), ("none", "context-fill"), 2),
+    "stroke": (("color", "url"), ("none", "context-stroke"), 2),
+    "width": size,
+    "height": size,
+    "min-width": size,
+    "min-height": size,
+    "max-width": max_size,
+    "max-height": max_size,
+    "inline-size": size,
+    "block-size": size,
+    "top": inset,
+    "right": inset,
+    "bottom": inset,
+    "left": inset,
+    "inset": (length, ("auto",), 4),
+    "margin": (length, ("auto",), 4),
+    "margin-top": (length, ("auto",), 1),
+    "margin-right": (length, ("auto",), 1),
+    "margin-bottom": (length, ("auto",), 1),
+    "margin-left": (length, ("auto",), 1),
+    "margin-inline": (length, ("auto",), 2),
+    "margin-block": (length, ("auto",), 2),
+    "padding": (length, (), 4),
+    "padding-top": (length, (), 1),
+    "padding-right": (length, (), 1),
+    "padding-bottom": (length, (), 1),
+    "padding-left": (length, (), 1),
+    "padding-inline": (length, (), 2),
+    "padding-block": (length, (), 2),
+    "border": border,
+    "border-top": border,
+    "border-right": border,
+    "border-bottom": border,
+    "border-left": border,
+    "outline": (
+        ("length", "color"),
+        line_style + ("thin", "medium", "thick", "auto"),
+        3,
+    ),
+    "border-style": ((), line_style, 4),
+    "border-width": (("length",), ("thin", "medium", "thick"), 4),
+    "border-radius": (length, (), None),
+    "border-collapse": ((), ("collapse", "separate"), 1),
+    "border-spacing": (("length",), (), 2),
+    "box-sizing": ((), ("content-box", "border-box"), 1),
+    "display": (
+        (),
+        (
+            "none",
+            "contents",
+            "block",
+            "inline",
+            "inline-block",
+            "run-in",
+            "flow",
+            "flow-root",
+            "flex",
+            "inline-flex",
+            "grid",
+            "inline-grid",
+            "table",
+            "inline-table",
+            "table-row",
+            "table-cell",
+            "table-column",
+            "table-row-group",
+            "table-column-group",
+            "table-header-group",
+            "table-footer-group",
+            "table-caption",
+            "list-item",
+            "ruby",
+            "math",
+        ),
+        3,
+    ),
+    "position": (
+        (),
+        ("static", "relative", "absolute", "fixed", "sticky"),
+        1,
+    ),
+    "float": ((), ("left", "right", "none", "inline-start", "inline-end"), 1),
+    "clear": (
+        (),
+        ("left", "right", "both", "none", "inline-start", "inline-end"),
+        1,
+    ),
+    "visibility": ((), ("visible", "hidden", "collapse"), 1),
+    "overflow": overflow,
+    "overflow-x": overflow,
+    "overflow-y": overflow,
+    "z-index": (("integer",), ("auto",), 1),
+    "opacity": (("number", "percentage"), (), 1),
+    "font-size": (
+        length,
+        (
+            "xx-small",
+            "x-small",
+            "small",
+            "medium",
+            "large",
+            "x-large",
+            "xx-large",
+            "xxx-large",
+            "smaller",
+            "larger",
+        ),
+        1,
+    ),
+    "font-weight": (
+        ("number",),
+        ("normal", "bold", "bolder", "lighter"),
+        1,
+    ),
+    "font-style": (("angle",), ("normal", "italic", "oblique"), 2),
+    "font-variant": ((), (), None),
+    "line-height": (("number", "length", "percentage"), ("normal",), 1),
+    "letter-spacing": (("length",), ("normal",), 1),
+    "word-spacing": (length, ("normal",), 1),
+    "text-align": (
+        (),
+        (
+            "left",
+            "right",
+            "center",
+            "justify",
+            "justify-all",
+            "start",
+            "end",
+            "match-parent",
+        ),
+        1,
+    ),
+    "text-transform": (
+        (),
+        ("none", "capitalize", "uppercase", "lowercase", "full-width"),
+        2,
+    ),
+    "text-indent": (length, ("hanging", "each-line"), 3),
+    "vertical-align": (
+        length,
+        (
+            "baseline",
+            "sub",
+            "super",
+            "text-top",
+            "text-bottom",
+            "middle",
+            "top",
+            "bottom",
+        ),
+        1,
+    ),
+    "white-space": (
+        (),
+        ("normal", "nowrap", "pre", "pre-wrap", "pre-line", "break-spaces"),
+        1,
+    ),
+    "list-style-type": (("string", "ident"), (), 1),
+    "list-style-position": ((), ("inside", "outside"), 1),
+    "cursor": (("url", "number", "ident"), (), None),
+    "flex-direction": (
+        (),
+        ("row", "row-reverse", "column", "column-reverse"),
+        1,
+    ),
+    "flex-wrap": ((), ("nowrap", "wrap", "wrap-reverse"), 1),
+    "flex-grow": (("number",), (), 1),
+    "flex-shrink": (("number",), (), 1),
+    "flex-basis": (
+        length,
+        ("auto", "content", "max-content", "min-content"),
+        1,
+    ),
+    "order": (("integer",), (), 1),
+    "gap": (length, ("normal",), 2),
+    "row-gap": (length, ("normal",), 1),
+    "column-gap": (length, ("normal",), 1),
+    "grid-gap": (length, (), 2),
+    "grid-row-gap": (length, (), 1),
+    "grid-column-gap": (length, (), 1),
+    "transition-duration": (("time",), (), None),
+    "transition-delay": (("time",), (), None),
+    "animation-duration": (("time",), ("auto",), None),
+    "animation-delay": (("time",), (), None),
+    "animation-iteration-count": (("number",), ("infinite",), None),
+    "background-image": (("image",), ("none",), None),
+    "list-style-image": (("image",), ("none",), 1),
+    "content": any_value,
+}
+
+# properties checked for a name only (shorthands and complex grammars)
+other_properties = (
+    "align-content align-items align-self align-tracks all animation "
+    "animation-composition animation-direction animation-fill-mode "
+    "animation-name animation-play-state animation-timeline "
+    "animation-timing-function appearance aspect-ratio backdrop-filter "
+    "backface-visibility background background-attachment "
+    "background-blend-mode background-clip background-origin "
+    "background-position background-position-x background-position-y "
+    "background-repeat background-size block-size border-block "
+    "border-block-color border-block-end border-block-start "
+    "border-block-style border-block-width border-bottom-left-radius "
+    "border-bottom-right-radius border-bottom-style border-bottom-width "
+    "border-end-end-radius border-end-start-radius border-image "
+    "border-image-outset border-image-repeat border-image-slice "
+    "border-image-source border-image-width border-inline "
+    "border-inline-color border-inline-end border-inline-start "
+    "border-inline-style border-inline-width border-left-style "
+    "border-left-width border-right-style border-right-width "
+    "border-start-end-radius border-start-start-radius border-top-left-radius "
+    "border-top-right-radius border-top-style border-top-width "
+    "box-decoration-break box-shadow break-after break-before break-inside "
+    "caption-side clip clip-path column-count column-fill column-rule "
+    "column-rule-style column-rule-width column-span column-width columns "
+    "contain container container-name container-type content-visibility "
+    "counter-increment counter-reset counter-set direction empty-cells "
+    "filter flex flex-flow font font-family font-feature-settings "
+    "font-kerning font-language-override font-optical-sizing "
+    "font-palette font-size-adjust font-stretch font-synthesis "
+    "font-variant-alternates font-variant-caps font-variant-east-asian "
+    "font-variant-ligatures font-variant-numeric font-variant-position "
+    "font-variation-settings forced-color-adjust grid grid-area "
+    "grid-auto-columns grid-auto-flow grid-auto-rows grid-column "
+    "grid-column-end grid-column-start grid-row grid-row-end "
+    "grid-row-start grid-template grid-template-areas "
+    "grid-template-columns grid-template-rows hanging-punctuation hyphens "
+    "image-orientation image-rendering inset-block inset-block-end "
+    "inset-block-start inset-inline inset-inline-end inset-inline-start "
+    "isolation justify-content justify-items justify-self line-break "
+    "list-style margin-block-end margin-block-start margin-inline-end "
+    "margin-inline-start mask mask-clip mask-composite mask-image mask-mode "
+    "mask-origin mask-position mask-repeat mask-size mask-type "
+    "math-style max-block-size max-inline-size min-block-size "
+    "min-inline-size mix-blend-mode object-fit object-position offset "
+    "offset-anchor offset-distance offset-path offset-rotate "
+    "outline-offset outline-style outline-width overflow-anchor "
+    "overflow-block overflow-clip-margin overflow-inline overflow-wrap "
+    "overscroll-behavior overscroll-behavior-x overscroll-behavior-y "
+    "padding-block-end padding-block-start padding-inline-end "
+    "padding-inline-start page-break-after page-break-before "
+    "page-break-inside paint-order perspective perspective-origin "
+    "place-content place-items place-self pointer-events quotes resize "
+    "rotate scale scroll-behavior scroll-margin scroll-padding "
+    "scroll-snap-align scroll-snap-stop scroll-snap-type "
+    "scrollbar-color scrollbar-gutter scrollbar-width shape-image-threshold "
+    "shape-margin shape-outside tab-size table-layout text-align-last "
+    "text-combine-upright text-decoration text-decoration-line "
+    "text-decoration-skip-ink text-decoration-style "
+    "text-decoration-thickness text-emphasis text-emphasis-color "
+    "text-emphasis-position text-emphasis-style text-justify "
+    "text-orientation text-overflow text-rendering text-shadow "
+    "text-underline-offset text-underline-position text-wrap touch-action "
+    "transform transform-box transform-origin transform-style transition "
+    "transition-behavior transition-property transition-timing-function "
+    "translate unicode-bidi user-select view-transition-name "
+    "will-change word-break word-wrap writing-mode zoom "
+    # descriptors of @font-face, @page, @counter-style & @property
+    "src unicode-range font-display size marks bleed system symbols "
+    "additive-symbols negative prefix suffix range pad speak-as fallback "
+    "syntax inherits initial-value ascent-override descent-override "
+    "line-gap-override"
+).split()
+
+known_properties = frozenset(list(properties) + other_properties)
+
+
+class Message:
+    """an error or warning found in the CSS"""
+
+    def __init__(self, level, line, context, message, extract=""):
+        self.level = level
+        self.line = line
+        self.context = context
+        self.message = message
+        self.extract = extract
+
+
+def is_color(component):
+    lowered = component.lower()
+    if lowered in color_names:
+        return True
+    if value_types["hex"].match(component):
+        return True
+    return bool(value_types["color-function"].match(component))
+
+
+def is_of_type(component, value_type):
+    if value_type == "color":
+        return is_color(component)
+    return bool(value_types[value_type].match(component))
+
+
+def split_value(value):
+    """returns the components of a value (no commas or slashes)"""
+    return [
+        component
+        for component in component_re.findall(value)
+        if component not in (",", "/")
+    ]
+
+
+@functools.lru_cache(maxsize=4096)
+def check_value(prop, value):
+    """returns an error message if the value is not valid for prop
+
+    Cached: stylesheets repeat the same declarations over and over.
+    """
+    if not value:
+        return "Missing a value for “{}”".format(prop)
+    if value.count("(") != value.count(")"):
+        return "Parse Error"
+    grammar = properties.get(prop)
+    if not grammar or any_value_re.search(value):
+        return None
+    types, keywords, max_components = grammar
+    if not types and not keywords:
+        return None
+    components = split_value(value)
+    if len(components) == 1 and components[0].lower() in global_keywords:
+        return None
+    if max_components and len(components) > max_components:
+        return "Too many values or values are not recognized"
+    for component in components:
+        if component.lower() in keywords:
+            continue
+        if any(is_of_type(component, value_type) for value_type in types):
+            continue
+        return "“{}” is not a {} value".format(component, prop)
+    return None
+
+
+def check_declaration(declaration, context, line, messages):
+    prop = declaration.property.lower()
+    value = declaration.value
+    if prop.startswith("--"):
+        # custom properties take any value
+        return
+    if prop.startswith("-") or prop.startswith("*") or prop.startswith("_"):
+        messages.append(
+            Message(
+                "warning",
+                line,
+                context,
+                "“{}” is an unknown vendor extension".format(prop),
+            )
+        )
+        return
+    if prop not in known_properties:
+        messages.append(
+            Message(
+                "error",
+                line,
+                context,
+                "Property “{}” doesn't exist :".format(prop),
+                value,
+            )
+        )
+        return
+    error = check_value(prop, value)
+    if error:
+        messages.append(
+            Message(
+                "error",
+                line,
+                context,
+                "Value Error : {} {} :".format(prop, error),
+                value,
+            )
+        )
+
+
+def check_block(sheet, node, messages):
+    context = node.prelude
+    for declaration in node.declarations:
+        if not declaration.is_valid:
+            # already reported by the parser
+            continue
+        line = sheet.get_line(declaration.start)
+        check_declaration(declaration, context, line, messages)
+    for child in node.children:
+        check_node(sheet, child, messages)
+
+
+def check_node(sheet, node, messages):
+    line = sheet.get_line(node.start)
+    if isinstance(node, css_parser.AtRuleNode):
+        if node.name not in known_at_rules and not node.name.startswith("@-"):
+            messages.append(
+                Message(
+                    "error",
+                    line,
+                    node.prelude,
+                    "Unrecognized at-rule “{}”".format(node.name),
+                )
+            )
+            return
+        if node.has_block:
+            keyframes = node.name.endswith("keyframes")
+            if node.name not in rule_at_rules and not keyframes:
+                # @font-face, @page and friends only hold declarations
+                for child in node.get_rules():
+                    messages.append(
+                        Message(
+                            "error",
+                            sheet.get_line(child.start),
+                            node.prelude,
+                            "Parse Error",
+                            child.prelude,
+                        )
+                    )
+        check_block(sheet, node, messages)
+        return
+    check_block(sheet, node, messages)
+
+
+def check_statement_order(sheet, messages):
+    """@charset must be first, then @import (and @layer), before any rule"""
+    seen_rule = False
+    for index, node in enumerate(sheet.children):
+        name = getattr(node, "name", "")
+        if name == "@charset" and index:
+            messages.append(
+                Message(
+                    "error",
+                    sheet.get_line(node.start),
+                    node.prelude,
+                    "@charset must be the first statement of the style sheet",
+                )
+            )
+        elif name == "@import" and seen_rule:
+            messages.append(
+                Message(
+                    "error",
+                    sheet.get_line(node.start),
+                    node.prelude,
+                    "@import are not allowed after any valid statement "
+                    "other than @charset and @import.",
+                )
+            )
+        elif name not in ("@charset", "@import", "@layer"):
+            seen_rule = True
+
+
+def get_messages(css_code):
+    """returns a list of Messages (errors & warnings) for the CSS code"""
+    sheet = css_parser.parse(css_code)
+    messages = []
+    for offset, message in sheet.errors:
+        line = sheet.get_line(offset)
+        messages.append(
+            Message("error", line, "", "Parse Error", message.lower())
+        )
+    check_statement_order(sheet, messages)
+    for node in sheet.children:
+        check_node(sheet, node, messages)
+    messages.sort(key=lambda message: message.line)
+    return messages
+
+
+def get_row(message):
+    """a table row the way the W3C validator writes one"""
+    level = "parse-error" if message.level == "error" else "level0"
+    extract = ""
+    if message.extract:
+        extract = "<span>{}</span>".format(html.escape(message.extract))
+    return (
+        '<tr class="{}">\n'
+        '<td class="linenumber" title="Line {}">{}</td>\n'
+        '<td class="codeContext">{}</td>\n'
+        '<td class="{}">\n{} {}\n</td>\n'
+        "</tr>\n".format(
+            message.level,
+            message.line,
+            message.line,
+            html.escape(message.context),
+            level,
+            html.escape(message.message),
+            extract,
+        )
+    )
+
+
+def get_results_markup(messages):
+    errors = [message for message in messages if message.level == "error"]
+    warnings = [message for message in messages if message.level != "error"]
+    markup = '<div id="results_container">\n'
+    if errors:
+        markup += '<div id="errors">\n'
+        heading = "<h3>Sorry! We found the following errors ({})</h3>\n"
+        markup += heading.format(len(errors))
+        markup += '<div class="error-section-all">\n'
+        markup += '<div class="error-section">\n<table>\n'
+        markup += "".join(get_row(message) for message in errors)
+        markup += "</table>\n</div>\n</div>\n</div>\n"
+    else:
+        markup += '<div id="congrats">\n'
+        markup += "<h3>Congratulations! No Error Found.</h3>\n</div>\n"
+    if warnings:
+        markup += '<div id="warnings">\n'
+        markup += "<h3>Warnings ({})</h3>\n".format(len(warnings))
+        markup += '<div class="error-section-all">\n'
+        markup += '<div class="error-section">\n<table>\n'
+        markup += "".join(get_row(message) for message in warnings)
+        markup += "</table>\n</div>\n</div>\n</div>\n"
+    markup += "</div>"
+    return markup
+
+
+class Results:
+    """the Messages found in a stylesheet, as a jigsaw-like result set
+
+    The #results_container markup is only rendered (and parsed) the
+    first time a caller reads it as tags; is_valid, errors and warnings
+    read the Messages directly.
+    """
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.errors = [m for m in messages if m.level == "error"]
+        self.warnings = [m for m in messages if m.level != "error"]
+        self.tags = None
+
+    def is_valid(self):
+        return not self.errors
+
+    def get_tags(self):
+        """returns the result set of #results_container tags"""
+        if self.tags is None:
+            markup = get_results_markup(self.messages)
+            soup = BeautifulSoup(markup, "html.parser")
+            self.tags = soup.select("#results_container")
+        return self.tags
+
+    def __len__(self):
+        # there's always one #results_container
+        return 1
+
+    def __getitem__(self, index):
+        return self.get_tags()[index]
+
+    def __iter__(self):
+        return iter(self.get_tags())
+
+    def __str__(self):
+        return str(self.get_tags())
+
+    def __repr__(self):
+        return repr(self.get_tags())
+
+
+def validate_css(css_code):
+    """validates CSS code locally
+
+    returns Results, which read just like the result set of
+    #results_container tags validator.validate_css gets from the W3C.
+    """
+    return Results(get_messages(css_code))
@@ -0,0 +1,168 @@
+# gradients.py
+# the colors of CSS gradients
+#
+# parse_gradients reads every gradient in a value (linear, radial and
+# conic; repeating or not; vendor-prefixed or not, and the old
+# -webkit-gradient() too) into its kind and its color stops, each stop a
+# color and its position(s). A color is only as readable on a gradient as
+# on its worst stop: get_min_contrasts finds, for pairs of text colors
+# and background stacks, the lowest contrast against any stop, checking
+# every stop of every pair in one batch (see colortools).
+
+import functools
+import itertools
+import re
+from collections import namedtuple
+
+from . import colortools
+
+# function arguments may hold functions, which may hold functions
+nested_parentheses = r"(?:[^()]|\((?:[^()]|\([^()]*\))*\))"
+
+gradient_re = re.compile(
+    r"(?P<prefix>-(?:webkit|moz|ms|o)-)?(?P<repeating>repeating-)?"
+    r"(?P<kind>linear|radial|conic)?-?gradient"
+    r"\((?P<arguments>" + nested_parentheses + r"*)\)",
+    re.I,
+)
+argument_re = re.compile(r"(?:[^,()]|\(" + nested_parentheses + r"*\))+")
+component_re = re.compile(r"[\w-]*\(" + nested_parentheses + r"*\)|[^\s()]+")
+
+ColorStop = namedtuple("ColorStop", "color positions")
+Gradient = namedtuple("Gradient", "kind repeating prefix stops")
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_gradients(value):
+    """returns the gradients in a value (as a tuple of Gradients)"""
+    gradients = []
+    for match in gradient_re.finditer(value):
+        prefix = (match.group("prefix") or "").lower()
+        kind = (match.group("kind") or "").lower()
+        arguments = [
+            argument.strip()
+            for argument in argument_re.findall(match.group("arguments"))
+        ]
+        if kind:
+            stops = get_color_stops(arguments)
+        elif prefix == "-webkit-" and arguments:
+            # -webkit-gradient(linear, left top, ..., from(c), to(c))
+            kind = arguments[0].lower()
+            stops = get_legacy_color_stops(arguments[1:])
+        else:
+            continue
+        gradients.append(
+            Gradient(kind, bool(match.group("repeating")), prefix, stops)
+        )
+    return tuple(gradients)
+
+
+def get_color_stops(arguments):
+    """returns the ColorStops of a gradient's arguments
+
+    Each color starts a stop; what follows it (up to the next color) is
+    its position(s). Arguments without a color (direction, shape, color
+    hints) aren't stops.
+    """
+    stops = []
+    for argument in arguments:
+        positions = None
+        for component in component_re.findall(argument):
+            if colortools.parse_color(component):
+                positions = []
+                stops.append((component, positions))
+            elif positions is not None:
+                positions.append(component)
+    return tuple(ColorStop(color, tuple(pos)) for color, pos in stops)
+
+
+def get_legacy_color_stops(arguments):
+    """returns the ColorStops of -webkit-gradient's from(), to() and
+    color-stop() arguments"""
+    stops = []
+    for argument in arguments:
+        name, _, inside = argument.partition("(")
+        # only the parenthesis that closes from(), to() or color-stop()
+        if inside.endswith(")"):
+            inside = inside[:-1]
+        name = name.strip().lower()
+        if name == "from":
+            stops.append(ColorStop(inside.strip(), ("0%",)))
+        elif name == "to":
+            stops.append(ColorStop(inside.strip(), ("100%",)))
+        elif name == "color-stop":
+            position, _, color = inside.partition(",")
+            stops.append(ColorStop(color.strip(), (position.strip(),)))
+    return tuple(stops)
+
+
+def expand_stack(stack):
+    """returns every stack of plain colors a background stack can show
+
+    Each background in the stack may list layers (comma-separated, top
+    first); they're stacked bottom up, over the bottom layer's color if
+    it has one. A gradient layer shows each of its stops.
+    """
+    options = []
+    for background in stack:
+        if "gradient" not in background:
+            options.append([background])
+            continue
+        layers = [layer.strip() for layer in argument_re.findall(background)]
+        for index, layer in enumerate(reversed(layers)):
+            gradients = parse_gradients(layer)
+            if not gradients:
+                options.append([layer])
+                continue
+            if not index:
+                # only the bottom layer may have a background color
+                options += [
+                    [component]
+                    for component in component_re.findall(
+                        gradient_re.sub("", layer)
+                    )
+                    if colortools.parse_color(component)
+                ]
+            options.append([stop.color for g in gradients for stop in g.stops])
+    return [list(colors) for colors in itertools.product(*options)]
+
+
+def get_min_contrasts(pairs, canvas="#ffffff"):
+    """returns the lowest contrast of each (text color, background stack)
+
+    Gradients in a stack are checked stop by stop, and the worst counts.
+    Every stop of every pair is composited and checked in one batch (and
+    a pair that repeats is only checked once). A pair gets None if
+    something in its stack isn't a color or gradient.
+    """
+    unique_pairs = {}
+    indexes = [
+        unique_pairs.setdefault((text, tuple(stack)), len(unique_pairs))
+        for text, stack in pairs
+    ]
+    owners = []
+    flat_pairs = []
+    for index, (text, stack) in enumerate(unique_pairs):
+        for colors in expand_stack(stack):
+            owners.append(index)
+            flat_pairs.append((text, colors))
+    effective_pairs = colortools.get_effective_pairs(flat_pairs, canvas)
+    testable = [pair for pair in effective_pairs if None not in pair]
+    ratios = iter(colortools.get_contrast_ratios(testable))
+    min_contrasts = [None] * len(unique_pairs)
+    untestable = set()
+    for index, pair in zip(owners, effective_pairs):
+        if None in pair:
+            untestable.add(index)
+            continue
+        ratio = next(ratios)
+        if min_contrasts[index] is None or ratio < min_contrasts[index]:
+            min_contrasts[index] = ratio
+    for index in untestable:
+        min_contrasts[index] = None
+    return [min_contrasts[index] for index in indexes]
+
+
+def get_min_contrast(text_color, stack, canvas="#ffffff"):
+    """returns the lowest contrast of text_color on a background stack"""
+    return get_min_contrasts([(text_color, stack)], canvas)[0]
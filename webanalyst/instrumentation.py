@@ -0,0 +1,68 @@
+# instrumentation.py
+# where a report's time goes
+#
+# A Stages object records, for every named stage of a report, the wall
+# time spent in it, how many times it ran and how many bytes it parsed.
+# Stages are timed by calling through Stages.time or by wrapping a
+# report's methods (Stages.wrap), so the reports themselves don't change.
+# For the hot paths inside a stage, run_profiled writes a cProfile stats
+# file (read it with pstats or snakeviz).
+
+import cProfile
+import functools
+import time
+
+
+class Stages:
+    """wall time, call count and bytes parsed for each stage"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def record(self, stage, seconds, num_bytes=0):
+        stats = self.stages.setdefault(
+            stage, {"seconds": 0.0, "calls": 0, "bytes": 0}
+        )
+        stats["seconds"] += seconds
+        stats["calls"] += 1
+        stats["bytes"] += num_bytes
+
+    def time(self, stage, func, *args, count_bytes=None, **kwargs):
+        """runs func as (one call of) stage and returns its results
+
+        count_bytes, if given, returns a running total of bytes parsed;
+        the stage is credited with how much it went up.
+        """
+        bytes_before = count_bytes() if count_bytes else 0
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            num_bytes = count_bytes() - bytes_before if count_bytes else 0
+            self.record(stage, seconds, num_bytes)
+
+    def wrap(self, obj, method_name, stage, count_bytes=None):
+        """times every call of obj.method_name as stage"""
+        method = getattr(obj, method_name)
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            return self.time(
+                stage, method, *args, count_bytes=count_bytes, **kwargs
+            )
+
+        setattr(obj, method_name, timed)
+
+    def get_stats(self):
+        """returns {stage: {"seconds":, "calls":, "bytes":}} (a copy)"""
+        return {stage: dict(stats) for stage, stats in self.stages.items()}
+
+
+def run_profiled(path, func, *args, **kwargs):
+    """runs func under cProfile, saving the stats (pstats) to path"""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
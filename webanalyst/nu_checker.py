@@ -0,0 +1,120 @@
+# nu_checker.py
+# runs the Nu HTML checker (vnu.jar) as a persistent local subprocess
+#
+# Starting a JVM per document costs more than checking the document, so
+# the checker is started once in its web service mode and kept running;
+# every document is then posted to it over localhost, exactly as it would
+# be to validator.w3.org (see validator.get_markup_validity).
+
+import atexit
+import os
+import socket
+import subprocess
+import threading
+import time
+
+default_java = os.environ.get("WEBANALYST_JAVA", "java")
+# seconds to wait for the JVM to start listening
+default_startup_timeout = 60
+
+
+def get_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def is_listening(port):
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+class NuServer:
+    """a vnu.jar web service started on first use and stopped at exit"""
+
+    def __init__(
+        self,
+        jar_path,
+        port=None,
+        java=default_java,
+        startup_timeout=default_startup_timeout,
+    ):
+        self.jar_path = jar_path
+        self.port = port
+        self.java = java
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.__lock = threading.Lock()
+        atexit.register(self.stop)
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{}/?out=json".format(self.port)
+
+    def get_command(self):
+        return [
+            self.java,
+            "-cp",
+            self.jar_path,
+            "nu.validator.servlet.Main",
+            str(self.port),
+        ]
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        """starts the checker (if it isn't running) and returns its url"""
+        with self.__lock:
+            if self.is_running():
+                return self.url
+            if not os.path.isfile(self.jar_path):
+                raise FileNotFoundError(
+                    "Nu checker not found at {}".format(self.jar_path)
+                )
+            if self.port is None:
+                self.port = get_free_port()
+            self.process = subprocess.Popen(
+                self.get_command(),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            deadline = time.monotonic() + self.startup_timeout
+            while not is_listening(self.port):
+                if self.process.poll() is not None:
+                    raise RuntimeError(
+                        "Nu checker exited with code {}".format(
+                            self.process.returncode
+                        )
+                    )
+                if time.monotonic() > deadline:
+                    self.stop_process()
+                    raise TimeoutError("Nu checker did not start in time")
+                time.sleep(0.1)
+            return self.url
+
+    def stop(self):
+        with self.__lock:
+            self.stop_process()
+
+    def stop_process(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+    def get_identity(self):
+        """names the checker by its jar (not its port) for caching"""
+        name = os.path.basename(self.jar_path)
+        if not os.path.isfile(self.jar_path):
+            return "vnu " + name
+        return "vnu {} {}".format(name, os.path.getsize(self.jar_path))
@@ -1,11 +1,13 @@
 import logging
+import os
 import re
+import time
 
 from bs4 import BeautifulSoup
 
 from . import CSSReport
 from . import HTMLinator as html
-from . import HTMLReport, clerk
+from . import HTMLReport, clerk, instrumentation, report_export
 
 logging.basicConfig(
     format="%(asctime)s - %(message)s", datefmt="%d-%b-%y %H:%M:%S"
@@ -15,7 +17,8 @@ report_path = "report/report.html"
 
 
 class Report:
-    def __init__(self, dir_path):
+    def __init__(self, dir_path, report_path=report_path):
+        self.report_path = report_path
         self.__readme_path = dir_path + "README.md"
         self.__readme_text = clerk.file_to_string(self.__readme_path)
         self.__readme_list = re.split("[\n]", self.__readme_text)
@@ -23,6 +26,10 @@ class Report:
         self.html_report = None
         self.css_report = None
         self.__dir_path = dir_path
+        self.document_cache = html.DocumentCache()
+        self.report_document = None
+        self.timings = {}
+        self.stages = instrumentation.Stages()
 
     def get_readme_text(self):
         return self.__readme_text
@@ -30,6 +37,76 @@ class Report:
     def get_readme_list(self):
         return self.__readme_list
 
+    def get_report_details(self):
+        """returns the details of every report (for JSON output)
+
+        validator errors & warnings are normalized (see report_export).
+        """
+        return report_export.get_report_record(
+            self.__dir_path,
+            self.general_report,
+            self.html_report,
+            self.css_report,
+        )
+
+    def get_contrast_audit(self):
+        """returns the contrast of every color-setting selector on every
+        page (see CSSReport.get_contrast_audit)"""
+        return self.css_report.get_contrast_audit()
+
+    def save_report_details(self, path):
+        """saves the report details as JSON"""
+        report_export.save_json(self.get_report_details(), path)
+
+    def time_stage(self, stage, func, *args, count_bytes=None):
+        """runs func, recording its wall time (seconds) in timings"""
+        start = time.perf_counter()
+        results = self.stages.time(
+            stage, func, *args, count_bytes=count_bytes
+        )
+        self.timings[stage] = time.perf_counter() - start
+        return results
+
+    def get_stage_stats(self):
+        """returns wall time, calls & bytes parsed for every stage
+
+        report stages (prep, general, html, css, save) and the stages
+        inside each report (e.g. html.validate, css.parse) are included.
+        """
+        return self.stages.get_stats()
+
+    def get_bytes_parsed(self):
+        """HTML (documents) and CSS (stylesheets) parsed so far, in bytes"""
+        css_bytes = sum(
+            len(sheet.original_text)
+            for sheet in self.css_report.stylesheet_objects
+        )
+        return self.document_cache.bytes_parsed + css_bytes
+
+    def instrument_reports(self):
+        """times the stages inside each report (see instrumentation)"""
+        stages = (
+            (self.general_report, "analyze_results", "general.analyze"),
+            (self.general_report, "publish_results", "general.publish"),
+            (self.html_report, "analyze_results", "html.analyze"),
+            (self.html_report, "validate_html", "html.validate"),
+            (self.html_report, "publish_results", "html.publish"),
+            (self.css_report, "get_css_code", "css.parse"),
+            (self.css_report, "validate_css", "css.validate"),
+            (self.css_report, "publish_results", "css.publish"),
+        )
+        for report, method_name, stage in stages:
+            self.stages.wrap(
+                report,
+                method_name,
+                stage,
+                count_bytes=self.get_bytes_parsed,
+            )
+
+    def get_document_cache_stats(self):
+        """returns hits & misses of the HTML documents shared by reports"""
+        return self.document_cache.get_stats()
+
     @staticmethod
     def get_report_results_string(
         tr_class, type_column, target, results, results_key
@@ -69,25 +146,60 @@ class Report:
     def foo():
         pass
 
-    def generate_report(self):
+    def generate_report(self, profile_path=None):
+        """runs every report and saves the report page
+
+        with a profile_path, the run is profiled (cProfile) and the stats
+        are saved there.
+        """
+        if profile_path:
+            return instrumentation.run_profiled(
+                profile_path, self.generate_report
+            )
+
         # pull readme text
         self.get_readme_text()
 
+        # one report document, filled in by every report, saved at the end
+        start = time.perf_counter()
+        self.time_stage("prep", self.prep_report)
+
         # instantiate all reports
         self.general_report = GeneralReport(
-            self.__readme_list, self.__dir_path
+            self.__readme_list,
+            self.__dir_path,
+            self.document_cache,
+            self.report_path,
+            self.report_document,
         )
         self.html_report = HTMLReport.HTMLReport(
-            self.__readme_list, self.__dir_path
+            self.__readme_list,
+            self.__dir_path,
+            self.document_cache,
+            self.report_path,
+            self.report_document,
         )
         self.css_report = CSSReport.CSSReport(
-            self.__readme_list, self.__dir_path
+            self.__readme_list,
+            self.__dir_path,
+            self.document_cache,
+            self.report_path,
+            self.report_document,
         )
 
+        self.instrument_reports()
+
         # run each report
-        self.prep_report()
-        self.general_report.generate_report()
-        self.html_report.generate_report()
+        self.time_stage(
+            "general",
+            self.general_report.generate_report,
+            count_bytes=self.get_bytes_parsed,
+        )
+        self.time_stage(
+            "html",
+            self.html_report.generate_report,
+            count_bytes=self.get_bytes_parsed,
+        )
 
         # send linked stylesheets to css report
         self.css_report.linked_stylesheets = (
@@ -100,18 +212,53 @@ class Report:
         except KeyError:
             css_validation_results = {}
         self.css_report.set_css_validation(css_validation_results)
-        self.css_report.generate_report(self.html_report.html_files)
+        self.time_stage(
+            "css",
+            self.css_report.generate_report,
+            self.html_report.html_files,
+            count_bytes=self.get_bytes_parsed,
+        )
+        self.time_stage("save", self.report_document.save, self.report_path)
+        self.timings["total"] = time.perf_counter() - start
+        self.stages.record(
+            "total", self.timings["total"], self.get_bytes_parsed()
+        )
 
     def prep_report(self):
-        # Create a report HTML file in the report folder
-        report_template_content = clerk.file_to_string(report_template_path)
-        with open("report/report.html", "w") as f:
-            f.write(report_template_content)
+        # Parse the report template (once) for the reports to fill in
+        self.report_document = ReportDocument(report_template_path)
+
+
+class ReportDocument:
+    """the report page: parsed once, filled in by each report, saved once"""
+
+    def __init__(self, template_path=report_template_path):
+        self.soup = html.get_html(template_path)
+
+    def save(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # reports have always been saved from <html> on (no doctype)
+        with open(path, "w") as f:
+            f.write(str(self.soup.html))
 
 
 class GeneralReport:
-    def __init__(self, readme_list, dir_path):
+    def __init__(
+        self,
+        readme_list,
+        dir_path,
+        document_cache=None,
+        report_path=report_path,
+        report_document=None,
+    ):
         self.__dir_path = dir_path
+        self.report_path = report_path
+        self.report_document = report_document
+        if document_cache is None:
+            document_cache = html.DocumentCache()
+        self.document_cache = document_cache
         self.title = ""
         self.description = ""
         self.paragraphs = []
@@ -207,11 +354,15 @@ class GeneralReport:
         html_files = clerk.get_all_files_of_type(self.__dir_path, "html")
         for file in html_files:
             if not self.paragraphs:
-                self.paragraphs = list(html.get_elements("p", file))
+                self.paragraphs = list(
+                    html.get_elements("p", file, self.document_cache)
+                )
             else:
                 try:
                     # get list of any p elements
-                    paragraphs = html.get_elements("p", file)
+                    paragraphs = html.get_elements(
+                        "p", file, self.document_cache
+                    )
                     # then loop through and append each
                     for p in enumerate(paragraphs):
                         self.paragraphs.append(p[1])
@@ -301,7 +452,10 @@ class GeneralReport:
 
     def publish_results(self):
         # Get report
-        report_content = html.get_html(report_path)
+        if self.report_document:
+            report_content = self.report_document.soup
+        else:
+            report_content = html.get_html(self.report_path)
 
         goals_details = self.report_details["min_number_files"]
         goals_results = self.report_details["num_files_results"]
@@ -364,8 +518,10 @@ class GeneralReport:
         )
 
         # Save new HTML as report/general_report.html
-        with open(report_path, "w") as f:
-            f.write(str(report_content.contents[2]))
+        # (a Report saves its shared report document once, at the end)
+        if not self.report_document:
+            with open(self.report_path, "w") as f:
+                f.write(str(report_content.contents[2]))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,156 @@
+# report_export.py
+# machine-readable report output
+#
+# The HTML report is for people; dashboards want the numbers. Each
+# project's report details are exported as one JSON object, with the
+# HTML and CSS validators' messages (nu checker dicts and W3C table rows)
+# normalized to one shape, and a batch run streams those objects to an
+# NDJSON file, one line per project as it completes.
+
+import json
+import os
+import re
+
+
+def get_line_number(value):
+    """returns the number in a validator line value ("Line 12") or None"""
+    if isinstance(value, int):
+        return value
+    match = re.search(r"\d+", str(value or ""))
+    return int(match.group()) if match else None
+
+
+def get_text(value):
+    """returns the text of a tag (or string), None if there is none"""
+    if value is None:
+        return None
+    if hasattr(value, "get_text"):
+        value = value.get_text()
+    value = str(value).strip()
+    return value or None
+
+
+def normalize_html_message(page, message):
+    """returns a nu checker message as a normalized message"""
+    # the checker's info messages (and our alerts) are warnings
+    message_type = "error" if message.get("type") == "error" else "warning"
+    # alerts (validator.get_markup_alert) fill what they can't know with NA
+    extract = get_text(message.get("extract"))
+    return {
+        "file": page,
+        "type": message_type,
+        "line": get_line_number(message.get("lastLine")),
+        "column": get_line_number(message.get("firstColumn")),
+        "message": message.get("message", ""),
+        "extract": None if extract == "NA" else extract,
+    }
+
+
+def normalize_css_message(page, message):
+    """returns a CSS report's validator row as a normalized message"""
+    # CSSReport.get_results_details keys the row's type by itself
+    message_type = "error" if "error" in message else "warning"
+    return {
+        "file": page,
+        "type": message_type,
+        "line": get_line_number(message.get("line_number")),
+        "column": None,
+        "message": message.get("error_msg", ""),
+        "extract": get_text(message.get("extract")),
+    }
+
+
+def get_html_messages(html_report):
+    """returns the HTML report's validator errors & warnings, normalized"""
+    messages = []
+    for results in (
+        html_report.validator_errors,
+        html_report.validator_warnings,
+    ):
+        for page, page_messages in results.get("HTML", {}).items():
+            for message in page_messages:
+                messages.append(normalize_html_message(page, message))
+    return messages
+
+
+def get_css_messages(css_report):
+    """returns the CSS report's validator errors & warnings, normalized"""
+    messages = []
+    results = css_report.report_details.get("css_validator_results", {})
+    for page, page_messages in results.items():
+        # pages without errors are recorded as "No errors"
+        if not isinstance(page_messages, list):
+            continue
+        for message in page_messages:
+            messages.append(normalize_css_message(page, message))
+    return messages
+
+
+def to_json_ready(value):
+    """returns value made of JSON types only (tags become their text)"""
+    if isinstance(value, dict):
+        return {str(key): to_json_ready(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_ready(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(to_json_ready(item) for item in value)
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, "get_text"):
+        return value.get_text()
+    return str(value)
+
+
+def get_report_record(dir_path, general_report, html_report, css_report):
+    """returns the reports' details as one JSON-ready dict"""
+    html_details = dict(html_report.report_details)
+    html_details["validator_messages"] = get_html_messages(html_report)
+    css_details = dict(css_report.report_details)
+    css_details["css_validator_results"] = get_css_messages(css_report)
+    return to_json_ready(
+        {
+            "project": dir_path,
+            "general": general_report.report_details,
+            "html": html_details,
+            "css": css_details,
+        }
+    )
+
+
+def save_json(record, path):
+    """saves one record as (indented) JSON"""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(record, f, indent=2)
+
+
+class NDJSONWriter:
+    """appends records to an NDJSON file, a line at a time
+
+    Each line is flushed as soon as it is written, so whatever reads the
+    file (tail -f, an aggregation job) sees every record as it arrives.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.file = open(path, "w")
+
+    def write(self, record):
+        self.file.write(json.dumps(to_json_ready(record)) + "\n")
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -112,14 +112,13 @@ pseudoelements = (
 
 
 def get_repeat_selectors(sheet):
-    repeat_selectors = []
+    """returns [selector, count] of each repeated selector (sorted)"""
     sheet.sort_selectors()
-    for selector in sheet.selectors:
-        count = sheet.selectors.count(selector)
-        if count > 1:
-            if [selector, count] not in repeat_selectors:
-                repeat_selectors.append([selector, count])
-    return repeat_selectors
+    repeats = sheet.get_selector_index().get_repeats()
+    return [
+        [selector, len(occurrences)]
+        for selector, occurrences in repeats.items()
+    ]
 
 
 def has_type_selector(sheet):
@@ -308,13 +307,7 @@ def get_psuedoselectors(sheet):
 
 
 def has_repeat_selectors(sheet):
-    selectors = sheet.selectors[:]
-    selectors.sort()
-    for selector in selectors:
-        num_selector = selectors.count(selector)
-        if num_selector > 1:
-            return True
-    return False
+    return sheet.get_selector_index().has_repeats()
 
 
 def has_class_selector(sheet):
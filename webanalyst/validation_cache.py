@@ -0,0 +1,178 @@
+# validation_cache.py
+# a persistent cache of validator results
+#
+# Results are stored in SQLite, keyed by the SHA-256 of the validator's
+# identity (name & version or URL) and the exact payload that was sent, so
+# unchanged files are never re-submitted. Entries expire after a TTL and
+# the least recently used entries are evicted once the cache grows past
+# its entry or byte limits.
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+default_path = os.path.join(
+    os.path.expanduser("~"), ".cache", "webanalyst", "validation.sqlite3"
+)
+# a week
+default_ttl = 7 * 24 * 60 * 60
+default_max_entries = 10000
+default_max_bytes = 64 * 1024 * 1024
+
+
+def get_key(validator, payload):
+    """returns the SHA-256 hex digest of validator identity + payload"""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    digest = hashlib.sha256(validator.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(payload)
+    return digest.hexdigest()
+
+
+def get_file_key(validator, path, chunk_size=64 * 1024):
+    """get_key for a file's contents, read a chunk at a time"""
+    digest = hashlib.sha256(validator.encode("utf-8"))
+    digest.update(b"\0")
+    with open(path, "rb") as payload:
+        for chunk in iter(lambda: payload.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ValidationCache:
+    """an on-disk, size-bounded LRU cache of validator results (text)"""
+
+    def __init__(
+        self,
+        path=default_path,
+        ttl=default_ttl,
+        max_entries=default_max_entries,
+        max_bytes=default_max_bytes,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.__lock = threading.Lock()
+        self.__connection = None
+        self.__pid = None
+
+    def get_connection(self):
+        # connections can't cross a fork, so each process opens its own
+        if self.__connection is None or self.__pid != os.getpid():
+            if self.path != ":memory:":
+                folder = os.path.dirname(os.path.abspath(self.path))
+                os.makedirs(folder, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=30, check_same_thread=False
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, validator TEXT, value TEXT, "
+                "size INTEGER, created REAL, accessed REAL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_accessed "
+                "ON results (accessed)"
+            )
+            connection.commit()
+            self.__connection = connection
+            self.__pid = os.getpid()
+        return self.__connection
+
+    def get(self, validator, payload):
+        """returns the cached result or None (missing or expired)"""
+        return self.get_by_key(get_key(validator, payload))
+
+    def set(self, validator, payload, value):
+        self.set_by_key(get_key(validator, payload), validator, value)
+
+    def get_by_key(self, key):
+        now = time.time()
+        with self.__lock:
+            connection = self.get_connection()
+            row = connection.execute(
+                "SELECT value, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                connection.commit()
+                self.misses += 1
+                return None
+            connection.execute(
+                "UPDATE results SET accessed = ? WHERE key = ?", (now, key)
+            )
+            connection.commit()
+            self.hits += 1
+            return value
+
+    def set_by_key(self, key, validator, value):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self.__lock:
+            connection = self.get_connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO results "
+                "(key, validator, value, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, validator, value, size, now, now),
+            )
+            self.evict(connection)
+            connection.commit()
+
+    def evict(self, connection):
+        """drops least recently used entries until within the limits"""
+        count, total = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = connection.execute(
+            "SELECT key, size FROM results ORDER BY accessed DESC"
+        ).fetchall()
+        keep_count = 0
+        keep_bytes = 0
+        expired = []
+        for key, size in rows:
+            if (
+                keep_count < self.max_entries
+                and keep_bytes + size <= self.max_bytes
+            ):
+                keep_count += 1
+                keep_bytes += size
+            else:
+                expired.append((key,))
+        connection.executemany("DELETE FROM results WHERE key = ?", expired)
+
+    def clear(self):
+        with self.__lock:
+            connection = self.get_connection()
+            connection.execute("DELETE FROM results")
+            connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get_stats(self):
+        with self.__lock:
+            count, total = (
+                self.get_connection()
+                .execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+                )
+                .fetchone()
+            )
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": count,
+            "bytes": total,
+        }
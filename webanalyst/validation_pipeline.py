@@ -0,0 +1,138 @@
+# validation_pipeline.py
+# runs validator requests concurrently
+#
+# Validation is bound by network round-trips, not by Python, so a small
+# pool of threads keeps several requests in flight at once. A per-host
+# rate limiter keeps the pool polite to the W3C (or whatever validator
+# it points at), failed requests are retried with exponential backoff,
+# a host that keeps failing is skipped for a while rather than retried for
+# every file, and results always come back in the order the items went in
+# so reports stay deterministic.
+
+import concurrent.futures
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+default_workers = 4
+# seconds between two requests to the same host
+default_interval = 0.25
+default_retries = 3
+default_backoff = 0.25
+# seconds to stop calling a host that failed even after retries
+default_cooldown = 60
+
+local_hosts = frozenset(("localhost", "127.0.0.1", "::1"))
+
+# worth trying again: the validator is busy or briefly unavailable
+retry_status_codes = frozenset((429, 500, 502, 503, 504))
+
+
+class RateLimiter:
+    """spaces out requests to each host by at least interval seconds"""
+
+    def __init__(self, interval=default_interval):
+        self.interval = interval
+        self.__next_slot = {}
+        self.__lock = threading.Lock()
+
+    def wait(self, url):
+        """blocks until a request to the url's host is allowed"""
+        if not self.interval:
+            return
+        if urlparse(url).hostname in local_hosts:
+            # a validator on this machine doesn't need protecting
+            return
+        host = urlparse(url).netloc
+        with self.__lock:
+            now = time.monotonic()
+            slot = max(now, self.__next_slot.get(host, now))
+            self.__next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class HostUnavailable(requests.ConnectionError):
+    """raised instead of calling a host that is cooling down"""
+
+
+class CircuitBreaker:
+    """stops calls to a host for a while once it has failed outright"""
+
+    def __init__(self, cooldown=default_cooldown):
+        self.cooldown = cooldown
+        self.__down_until = {}
+        self.__lock = threading.Lock()
+
+    def check(self, url):
+        """raises HostUnavailable if the url's host is cooling down"""
+        host = urlparse(url).netloc
+        with self.__lock:
+            down_until = self.__down_until.get(host)
+        if down_until is not None and time.monotonic() < down_until:
+            raise HostUnavailable("{} is unavailable".format(host))
+
+    def record_failure(self, url):
+        host = urlparse(url).netloc
+        with self.__lock:
+            self.__down_until[host] = time.monotonic() + self.cooldown
+
+    def record_success(self, url):
+        host = urlparse(url).netloc
+        with self.__lock:
+            self.__down_until.pop(host, None)
+
+
+def is_retryable(error):
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in retry_status_codes
+    return False
+
+
+def with_retries(
+    func,
+    *args,
+    retries=default_retries,
+    backoff=default_backoff,
+    breaker=None,
+    url=None,
+    **kwargs
+):
+    """calls func, retrying with exponential backoff on network errors
+
+    Errors that aren't worth retrying (and the last error once retries run
+    out) are raised to the caller. With a breaker (and the url being
+    requested) a host that fails outright is not called again until it
+    has cooled down.
+    """
+    if breaker:
+        breaker.check(url)
+    attempt = 0
+    while True:
+        try:
+            results = func(*args, **kwargs)
+        except requests.RequestException as error:
+            if attempt >= retries or not is_retryable(error):
+                if breaker and is_retryable(error):
+                    breaker.record_failure(url)
+                raise
+            time.sleep(backoff * 2 ** attempt)
+            attempt += 1
+        else:
+            if breaker:
+                breaker.record_success(url)
+            return results
+
+
+def map_in_order(func, items, workers=default_workers):
+    """returns [func(item) for item in items], run on a pool of threads"""
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    workers = min(workers, len(items))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, items))
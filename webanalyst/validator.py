@@ -1,17 +1,61 @@
+import json
 import os
 import re
+import threading
 
 import bs4
 import mechanicalsoup
 import requests
 from bs4 import BeautifulSoup
 
-from . import clerk
+from . import clerk, css_validator, nu_checker, validation_cache
+from . import validation_pipeline as pipeline
 
 w3cURL = "https://validator.w3.org/nu/?out=json"
+cssValidatorURL = "https://jigsaw.w3.org/css-validator"
+
+# which Nu checker validates HTML: "w3c" (validator.w3.org), "nu" (a Nu
+# checker already running at nuURL), "vnu" (vnu.jar at vnu_jar_path,
+# started once as a local subprocess) or "off" (no HTML validation)
+markup_engines = ("w3c", "nu", "vnu", "off")
+markup_engine = os.environ.get("WEBANALYST_HTML_VALIDATOR", "w3c")
+nuURL = os.environ.get("WEBANALYST_NU_URL", "http://localhost:8888/?out=json")
+vnu_jar_path = os.environ.get("WEBANALYST_VNU_JAR", "vnu.jar")
+nu_server = None
+
+# which engine validates CSS: "w3c" (jigsaw) or "local" (in-process)
+css_engines = ("w3c", "local")
+css_engine = os.environ.get("WEBANALYST_CSS_VALIDATOR", "w3c")
+
+# validator results can be cached on disk by content hash. Caching is off
+# unless asked for: set WEBANALYST_CACHE (or call set_cache_path) to the
+# SQLite file to keep them in, e.g. validation_cache.default_path
+cache_path = os.environ.get("WEBANALYST_CACHE", "off")
+results_cache = None
+
+# how many validator requests may be in flight at once, and how far apart
+# requests to the same host are spaced
+max_workers = int(
+    os.environ.get("WEBANALYST_VALIDATOR_WORKERS", pipeline.default_workers)
+)
+rate_limiter = pipeline.RateLimiter()
+breaker = pipeline.CircuitBreaker()
+
+# one pooled (keep-alive) session for every markup validator request
+pool_size = int(os.environ.get("WEBANALYST_POOL_SIZE", 10))
+# seconds to connect, and to wait for the validator's response
+timeout = (5, float(os.environ.get("WEBANALYST_VALIDATOR_TIMEOUT", 60)))
+markup_headers = {
+    "content-type": "text/html; charset=utf-8",
+    "Accept-Charset": "UTF-8",
+}
+session = None
+session_lock = threading.Lock()
 
 # Instantiate a stateful browser
 browser = mechanicalsoup.StatefulBrowser()
+# browsers aren't thread safe, so worker threads each get their own
+thread_browsers = threading.local()
 
 
 def get_num_errors(report):
@@ -27,6 +71,13 @@ def clean_error_msg(msg):
 
 
 def get_css_errors_list(val_results):
+    if isinstance(val_results, css_validator.Results):
+        # the text of each message cell, without rendering it
+        messages = val_results.errors + val_results.warnings
+        return [
+            clean_error_msg("{} {}".format(msg.message, msg.extract))
+            for msg in messages
+        ]
     soup = bs4.BeautifulSoup(str(val_results), "lxml")
     errors = soup.find_all("td")
     num_errors = len(errors)
@@ -39,37 +90,192 @@ def get_css_errors_list(val_results):
     return error_list
 
 
+def get_results_cache():
+    """returns the validation cache (or None if caching is off)"""
+    global results_cache
+    if results_cache is None and cache_path != "off":
+        results_cache = validation_cache.ValidationCache(cache_path)
+    return results_cache
+
+
+def set_cache_path(path):
+    """caches validator results in the SQLite file at path ("off" or None
+    for no cache)"""
+    global results_cache, cache_path
+    results_cache = None
+    cache_path = path or "off"
+
+
+def set_results_cache(cache):
+    """sets the validation cache (a ValidationCache or None for no cache)"""
+    global results_cache, cache_path
+    results_cache = cache
+    if cache is None:
+        cache_path = "off"
+
+
+def set_max_workers(workers):
+    global max_workers
+    max_workers = max(1, int(workers))
+
+
+def get_browser():
+    """returns the stateful browser for the current thread"""
+    if threading.current_thread() is threading.main_thread():
+        return browser
+    if not hasattr(thread_browsers, "browser"):
+        thread_browsers.browser = mechanicalsoup.StatefulBrowser()
+    return thread_browsers.browser
+
+
+def get_session():
+    """returns the pooled session (created on first use)"""
+    global session
+    with session_lock:
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=pool_size, pool_maxsize=pool_size
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(markup_headers)
+    return session
+
+
+def set_pool_size(size):
+    """sets the connection pool size (the session is rebuilt)"""
+    global pool_size, session
+    with session_lock:
+        pool_size = max(1, int(size))
+        if session is not None:
+            session.close()
+        session = None
+
+
+def set_markup_engine(engine, location=None):
+    """sets the HTML validator engine (w3c, nu or vnu)
+
+    location is the url of a running Nu checker (nu) or the path to
+    vnu.jar (vnu).
+    """
+    global markup_engine, nuURL, vnu_jar_path, nu_server
+    if engine not in markup_engines:
+        raise ValueError(
+            "Unknown HTML validator {}, use one of {}".format(
+                engine, ", ".join(markup_engines)
+            )
+        )
+    if location and engine == "nu":
+        nuURL = location
+    if location and engine == "vnu" and location != vnu_jar_path:
+        vnu_jar_path = location
+        if nu_server is not None:
+            nu_server.stop()
+            nu_server = None
+    markup_engine = engine
+
+
+def get_markup_engine():
+    return markup_engine
+
+
+def get_nu_server():
+    """returns the local vnu.jar server (created on first use)"""
+    global nu_server
+    with session_lock:
+        if nu_server is None:
+            nu_server = nu_checker.NuServer(vnu_jar_path)
+    return nu_server
+
+
+def get_markup_url():
+    """returns the url documents are posted to (starting vnu if need be)"""
+    if markup_engine == "vnu":
+        return get_nu_server().start()
+    if markup_engine == "nu":
+        return nuURL
+    return w3cURL
+
+
+def get_markup_validator_identity():
+    if markup_engine == "vnu":
+        return get_nu_server().get_identity()
+    if markup_engine == "nu":
+        return "nu " + nuURL
+    return "nu " + w3cURL
+
+
 def get_markup_validity(filepath):
     """returns a list of errors (dict)"""
-    errors = []
-    payload = open(filepath)
-    with open(filepath, "rb") as payload:
-        headers = {
-            "content-type": "text/html; charset=utf-8",
-            "Accept-Charset": "UTF-8",
-        }
-        try:
-            r = requests.post(w3cURL, data=payload, headers=headers)
-            errors = r.json()
-            errors = errors["messages"]
-            print(errors[-1])
-        except IndexError:
-            errors = [
-                {
-                    "type": "alert",
-                    "lastLine": "NA",
-                    "lastColumn": "NA",
-                    "firstColumn": "NA",
-                    "message": "Problems connecting with the validator - "
-                    "probably no connection",
-                    "extract": "NA",
-                    "hiliteStart": "NA",
-                    "hiliteLength": "NA",
-                }
-            ]
+    if markup_engine == "off":
+        return [get_markup_alert("HTML validation is turned off")]
+    cache = get_results_cache()
+    if cache:
+        # hash the file a chunk at a time rather than reading it in whole
+        identity = get_markup_validator_identity()
+        key = validation_cache.get_file_key(identity, filepath)
+        cached = cache.get_by_key(key)
+        if cached is not None:
+            return json.loads(cached)
+    try:
+        url = get_markup_url()
+        errors = pipeline.with_retries(
+            post_markup, filepath, url, breaker=breaker, url=url
+        )
+    except (
+        requests.RequestException,
+        ValueError,
+        KeyError,
+        OSError,
+        RuntimeError,
+    ):
+        # vnu.jar missing or failing to start lands here too
+        message = (
+            "Problems connecting with the validator - probably no connection"
+        )
+        return [get_markup_alert(message)]
+    if cache:
+        cache.set_by_key(key, identity, json.dumps(errors))
     return errors
 
 
+def get_markup_alert(message):
+    """a validator message (alert) for when the page couldn't be checked"""
+    return {
+        "type": "alert",
+        "lastLine": "NA",
+        "lastColumn": "NA",
+        "firstColumn": "NA",
+        "message": message,
+        "extract": "NA",
+        "hiliteStart": "NA",
+        "hiliteLength": "NA",
+    }
+
+
+def post_markup(filepath, url):
+    """posts a file to the markup validator and returns its messages"""
+    rate_limiter.wait(url)
+    # requests streams the open file as the body
+    with open(filepath, "rb") as payload:
+        r = get_session().post(url, data=payload, timeout=timeout)
+    r.raise_for_status()
+    errors = r.json()
+    return errors["messages"]
+
+
+def validate_markup_many(paths, workers=None):
+    """returns a list of errors for each file (in the order of paths)
+
+    Files are streamed to the validator over the pooled session, several
+    at a time.
+    """
+    if workers is None:
+        workers = max_workers
+    return pipeline.map_in_order(get_markup_validity, paths, workers)
+
+
 def get_num_markup_errors(markup_errors):
     count = 0
     for i in markup_errors:
@@ -103,19 +309,80 @@ def get_num_html_files():
 
 def is_css_valid(validator_results):
     """Checks to make sure CSS code is valid"""
+    if isinstance(validator_results, css_validator.Results):
+        return validator_results.is_valid()
     # create a soup of validator results
     soup = BeautifulSoup(str(validator_results[0]), "html.parser")
     return bool(soup.find(id="congrats"))
 
 
+def set_css_engine(engine):
+    """sets the CSS validator engine (w3c or local)"""
+    global css_engine
+    if engine not in css_engines:
+        raise ValueError(
+            "Unknown CSS validator {}, use one of {}".format(
+                engine, ", ".join(css_engines)
+            )
+        )
+    css_engine = engine
+
+
+def get_css_engine():
+    return css_engine
+
+
+def get_css_validator_identity():
+    if css_engine == "local":
+        return "{} {}".format(css_validator.name, css_validator.version)
+    return "jigsaw " + cssValidatorURL
+
+
 def validate_css(css_code):
+    """returns the #results_container result set for the CSS code"""
+    if css_engine == "local":
+        # fast enough in-process that caching would only slow it down
+        return css_validator.validate_css(css_code)
+    cache = get_results_cache()
+    identity = get_css_validator_identity()
+    if cache:
+        cached = cache.get(identity, css_code)
+        if cached is not None:
+            soup = BeautifulSoup(cached, "html.parser")
+            return soup.select("#results_container")
+    return validate_css_with_w3c(css_code, cache)
+
+
+def validate_css_many(css_codes, workers=None):
+    """returns the validator results for each piece of CSS code (in order)"""
+    if css_engine == "local":
+        # no network to wait on, so threads would only add overhead
+        workers = 1
+    elif workers is None:
+        workers = max_workers
+    return pipeline.map_in_order(validate_css, css_codes, workers)
+
+
+def submit_css(css_code):
+    css_browser = get_browser()
+    rate_limiter.wait(cssValidatorURL)
+    css_browser.open(cssValidatorURL).raise_for_status()
+    # Fill-in the search form based on css_code
+    css_browser.select_form("#validate-by-input form")
+    css_browser["text"] = css_code
+    rate_limiter.wait(cssValidatorURL)
+    css_browser.submit_selected().raise_for_status()
+    return css_browser.get_current_page().select("#results_container")
+
+
+def validate_css_with_w3c(css_code, cache=None):
     try:
-        browser.open("https://jigsaw.w3.org/css-validator")
-        # Fill-in the search form based on css_code
-        browser.select_form("#validate-by-input form")
-        browser["text"] = css_code
-        browser.submit_selected()
-        results = browser.get_current_page().select("#results_container")
+        results = pipeline.with_retries(
+            submit_css, css_code, breaker=breaker, url=cssValidatorURL
+        )
+        if cache and results:
+            identity = get_css_validator_identity()
+            cache.set(identity, css_code, str(results[0]))
     except Exception:
         # Convert the file "no_css_connection.html" into a soup tag object
         no_connection_code = clerk.file_to_string(